@@ -1,7 +1,14 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
+import json
 import os
+import time
+from datetime import date as Date, timedelta
 from utils import TravelRecommender, AmadeusClient, BookingClient
+from utils.concurrency import gather_with_deadline
+from utils.autocomplete import PrefixIndex
+from utils import metrics
+from utils import refresh
 
 app = Flask(__name__, static_folder='static')
 CORS(app)
@@ -10,34 +17,122 @@ recommender = TravelRecommender()
 print(f"Travel Buddy Initialized: {len(recommender.df)} destinations loaded.")
 amadeus = AmadeusClient()
 booking = BookingClient()
+city_index = PrefixIndex.from_gazetteer(recommender.gazetteer)
+CITY_SEARCH_LIMIT = 8
+MAX_PAGE_SIZE = 50
+# /api/similar and /api/nearby answer between 1 and this many destinations
+MAX_NEIGHBOURS = 50
+MAX_BATCH_QUERIES = 1000
+ITINERARY_STOPS = (2, 6)
+# Worker processes for big /api/recommend/batch requests (0 keeps them in the request thread)
+BATCH_PROCESSES = int(os.getenv('BATCH_PROCESSES', 0))
+
+def refresh_destinations():
+    # Build the next recommender (and city index) off the request path, then swap the module
+    # globals; requests hold whichever instance they started with, no locks involved
+    global recommender, city_index
+    fresh = recommender.refreshed()
+    if fresh is None:
+        return
+    index = PrefixIndex.from_gazetteer(fresh.gazetteer)
+    recommender, city_index = fresh, index
+    fresh.response_cache.invalidate() # Entries of the old data_version are never read again
+    print(f"Destinations refreshed: {len(fresh.df)} destinations loaded.")
+
+# Countries, exchange rates and safety advisories are refreshed in the background; requests
+# only read the current snapshots. The scheduler starts with the first request each worker
+# process serves (see start_refresh), not at import, so a server that imports the app once
+# and forks workers (gunicorn --preload) still gets one scheduler per worker.
+scheduler = refresh.RefreshScheduler()
+if refresh.REFRESH_ENABLED:
+    scheduler.add('destinations', refresh_destinations, refresh.DESTINATIONS_INTERVAL)
+    scheduler.add('rates', lambda: recommender.currency_client.refresh(), refresh.RATES_INTERVAL, run_now=True)
+    scheduler.add('advisories', lambda: recommender.safety_client.refresh(), refresh.ADVISORIES_INTERVAL, run_now=True)
+
+# Seconds /api/extra-details waits for all upstreams before returning what it has
+EXTRA_DETAILS_DEADLINE = float(os.getenv('EXTRA_DETAILS_DEADLINE', 6))
+# Flight search for /api/extra-details: departure this many days ahead unless a date is given,
+# and at most this many days either side of it for the fare calendar
+DEPARTURE_DAYS_AHEAD = 30
+MAX_FLEX_DAYS = 7
+# Hotel stay for /api/extra-details: checks in on the departure date for the trip's days (nights)
+DEFAULT_TRIP_DAYS = 7
+MAX_TRIP_DAYS = 30
+# Server-Timing header on every response; otherwise only when a request sends "X-Server-Timing: 1"
+SERVER_TIMING = os.getenv('SERVER_TIMING') == '1'
+
+@app.before_request
+def start_refresh():
+    if refresh.REFRESH_ENABLED:
+        scheduler.start()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.server_timing = SERVER_TIMING or request.headers.get('X-Server-Timing') == '1'
+    if g.server_timing:
+        metrics.start_timing()
+
+@app.after_request
+def record_request(response):
+    # Streamed responses are timed up to the first byte
+    elapsed = time.perf_counter() - g.request_start
+    metrics.observe('travel_request_seconds', elapsed, endpoint=request.endpoint or 'unknown')
+    if g.server_timing:
+        response.headers['Server-Timing'] = metrics.server_timing(elapsed)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
     return send_from_directory(app.static_folder, 'index.html')
 
 @app.route('/api/extra-details', methods=['POST'])
-def extra_details():
+async def extra_details():
     data = request.json
     city = data.get('city')
     country_code = data.get('country_code')
     origin_city = data.get('origin_city', 'London')
-    
-    # In a real app, you'd map city to IATA code
-    # For demo, we'll try to get flight offers if we have an IATA-like code or mock
-    flights = []
-    if amadeus.token:
-        # Resolve Origin IATA
-        origin_iata = amadeus.get_iata_code(origin_city)
-        # Mock Destination IATA logic (first 3 chars) or use API if we had a robust city->iata mapper
-        dest_iata = city[:3].upper() 
-        flights = amadeus.get_flight_offers(origin_iata, dest_iata, '2026-06-01', 1)
-        
-    hotels = booking.get_hotels(city)
-    
+    origin_iata = "N/A"
+    try:
+        departure = Date.fromisoformat(data.get('date') or (Date.today() + timedelta(days=DEPARTURE_DAYS_AHEAD)).isoformat())
+        flex_days = int(data.get('flex_days', 0))
+        days = int(data.get('days', DEFAULT_TRIP_DAYS))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid date, flex_days or days: {e}"}), 400
+    if not 0 <= flex_days <= MAX_FLEX_DAYS:
+        return jsonify({"error": f"flex_days must be between 0 and {MAX_FLEX_DAYS}"}), 400
+    if not 1 <= days <= MAX_TRIP_DAYS:
+        return jsonify({"error": f"days must be between 1 and {MAX_TRIP_DAYS}"}), 400
+
+    async def fetch_flights():
+        nonlocal origin_iata
+        if not await amadeus.has_token_async():
+            return None
+        # Resolve IATA codes from the local gazetteer; only unknown origins go to the network
+        origin_iata = recommender.gazetteer.iata(origin_city) or await amadeus.get_iata_code_async(origin_city)
+        # Unknown destinations keep the old first-3-chars guess
+        dest_iata = recommender.gazetteer.iata(city) or city[:3].upper()
+        # Every day of departure +- flex_days at once, each day cached on its own
+        return await amadeus.get_fare_calendar_async(origin_iata, dest_iata, departure.isoformat(), 1, flex_days)
+
+    # Flights and hotels run concurrently; whatever isn't back by the deadline is reported, not awaited
+    results, status = await gather_with_deadline({
+        "flights": fetch_flights(),
+        "hotels": booking.get_hotels_async(city, departure, days)
+    }, EXTRA_DETAILS_DEADLINE)
+
+    fares = results.get('flights') or {}
     return jsonify({
-        "flights": flights[:2],
-        "hotels": hotels,
-        "origin_iata": origin_iata if amadeus.token else "N/A"
+        "flights": fares.get('offers', [])[:2],
+        "fare_calendar": fares.get('calendar', []),
+        "cheapest_date": fares.get('cheapest_date'),
+        "hotels": results.get('hotels') or [],
+        "origin_iata": origin_iata,
+        "status": status
     })
 
 @app.route('/api/city-search', methods=['GET'])
@@ -46,32 +141,111 @@ def city_search():
     if not keyword:
         return jsonify([])
     
-    if amadeus.token:
+    # Local prefix index first; Amadeus (cached) only for names we don't know
+    results = city_index.search(keyword, CITY_SEARCH_LIMIT)
+    if not results and amadeus.token:
         results = amadeus.search_locations(keyword)
-        return jsonify(results)
-    
-    # Mock fallback if no API key
-    return jsonify([
-        {"name": "London", "iata": "LON", "country": "GB"},
-        {"name": "New York", "iata": "NYC", "country": "US"},
-        {"name": "Paris", "iata": "PAR", "country": "FR"}
-    ])
+    return jsonify(results)
+
+def clamp_k(k):
+    return max(1, min(MAX_NEIGHBOURS, k))
+
+@app.route('/api/similar', methods=['GET'])
+def similar():
+    # ?city=Paris for "more like this", or ?q=beach+culture for a free-text vibe search
+    k = clamp_k(request.args.get('k', 5, type=int))
+    city = request.args.get('city')
+    if city:
+        return jsonify(recommender.similar_destinations(city, k))
+    return jsonify(recommender.search_vibe(request.args.get('q', ''), k))
+
+@app.route('/api/nearby', methods=['GET'])
+def nearby():
+    # ?city=Paris&k=10 for the nearest destinations; add radius_km or flight_hours to cap the distance
+    city = request.args.get('city', '')
+    k = clamp_k(request.args.get('k', 10, type=int))
+    radius_km = request.args.get('radius_km', type=float)
+    flight_hours = request.args.get('flight_hours', type=float)
+    return jsonify(recommender.nearby_destinations(city, k, radius_km, flight_hours))
+
+def optional_float(value):
+    return None if value in (None, '') else float(value)
+
+def recommend_args(data):
+    return dict(
+        continent=data.get('continent'),
+        budget=data.get('budget', 1000),
+        currency=data.get('currency', 'USD'),
+        days=int(data.get('days', 7)),
+        people=int(data.get('people', 1)),
+        origin_city=data.get('origin_city', 'London'),
+        vibe=data.get('vibe'),
+        top_k=int(data.get('top_k', 50)),
+        # Paging through the ranking: pass analysis.next_cursor back as cursor
+        cursor=max(0, int(data.get('cursor', 0))),
+        page_size=min(MAX_PAGE_SIZE, max(1, int(data.get('page_size', 4)))),
+        # Only destinations this close to the origin (km or hours of flight)
+        max_distance_km=optional_float(data.get('max_distance_km')),
+        max_flight_hours=optional_float(data.get('max_flight_hours'))
+    )
 
 @app.route('/api/recommend', methods=['POST'])
 def recommend():
     data = request.json
-    continent = data.get('continent')
-    budget = data.get('budget', 1000)
-    currency = data.get('currency', 'USD')
-    days = int(data.get('days', 7))
-    people = int(data.get('people', 1))
-    origin_city = data.get('origin_city', 'London')
     
     print(f"Received request: {data}")
     
-    recommendations = recommender.recommend(continent, budget, days, people, currency, origin_city)
+    recommendations = recommender.recommend(**recommend_args(data))
     
     return jsonify(recommendations)
 
+@app.route('/api/recommend/batch', methods=['POST'])
+def recommend_batch():
+    # {"queries": [<an /api/recommend body>, ...]} -> {"results": [<its response>, ...]} in order
+    queries = (request.json or {}).get('queries') or []
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+    try:
+        args = [recommend_args(query) for query in queries]
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+    return jsonify({"results": recommender.recommend_many(args, BATCH_PROCESSES)})
+
+@app.route('/api/itinerary', methods=['POST'])
+def itinerary():
+    # Cheapest ordered route through `stops` destinations of a continent within budget/days
+    data = request.json or {}
+    try:
+        stops = int(data.get('stops', 3))
+        days = int(data.get('days', 7))
+        people = int(data.get('people', 1))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid stops, days or people: {e}"}), 400
+    if not ITINERARY_STOPS[0] <= stops <= ITINERARY_STOPS[1]:
+        return jsonify({"error": f"stops must be between {ITINERARY_STOPS[0]} and {ITINERARY_STOPS[1]}"}), 400
+    if days < 1 or people < 1:
+        return jsonify({"error": "days and people must be at least 1"}), 400
+    round_trip = data.get('round_trip', True)
+    if not isinstance(round_trip, bool):
+        return jsonify({"error": "round_trip must be true or false"}), 400
+    return jsonify(recommender.plan_itinerary(
+        continent=data.get('continent'),
+        budget=data.get('budget', 1000),
+        days=days,
+        people=people,
+        stops=stops,
+        currency=data.get('currency', 'USD'),
+        origin_city=data.get('origin_city', 'London'),
+        round_trip=round_trip
+    ))
+
+@app.route('/api/recommend/stream', methods=['POST'])
+def recommend_stream():
+    # Same request body as /api/recommend; responds with one JSON event per line (NDJSON):
+    # a page ranked on cost first, weather updates for it, then the final page
+    args = recommend_args(request.json)
+    events = recommender.recommend_stream(**args)
+    return Response((json.dumps(event) + "\n" for event in events), mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,56 @@
+# Concurrent Amadeus calls across several token rollovers against a local fake OAuth server.
+# Usage (from the Travel directory): python -m benchmarks.bench_amadeus_tokens
+import os
+import time
+import threading
+from benchmarks.common import report
+from benchmarks.stubs import StubServer, FakeAmadeus
+from utils.api_clients import AmadeusClient
+
+THREADS = 32
+DURATION = 6
+TOKEN_TTL = 1.5
+
+
+def main():
+    os.environ.setdefault('AMADEUS_API_KEY', 'stub')
+    os.environ.setdefault('AMADEUS_API_SECRET', 'stub')
+    fake = FakeAmadeus(token_ttl=TOKEN_TTL)
+    with StubServer(fake.routes()) as stub:
+        client = AmadeusClient(base_url=stub.url, refresh_margin=0.3)
+        calls = [0]
+        failures = [0]
+        lock = threading.Lock()
+        stop = time.monotonic() + DURATION
+
+        def worker():
+            while time.monotonic() < stop:
+                ok = client.get_iata_code('paris') == 'PAR' and len(client.get_flight_offers('PAR', 'LON', '2026-06-01', 1)) > 0
+                with lock:
+                    calls[0] += 2
+                    failures[0] += 0 if ok else 1
+
+        def revoker():
+            # Mid-run revocation exercises the 401 -> refresh -> retry path
+            time.sleep(DURATION / 2)
+            fake.revoke_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)] + [threading.Thread(target=revoker)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        report("amadeus_tokens", [{
+            "threads": THREADS,
+            "duration_s": DURATION,
+            "token_ttl_s": TOKEN_TTL,
+            "calls": calls[0],
+            "failed_iterations": failures[0],
+            "token_requests": fake.token_requests,
+            "rejected_by_server": fake.rejected
+        }])
+
+
+if __name__ == '__main__':
+    main()
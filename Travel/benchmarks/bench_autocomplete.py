@@ -0,0 +1,93 @@
+# Autocomplete: in-process prefix-index latency, /api/city-search QPS and p99 under load,
+# and the Amadeus result cache for names the local index doesn't know.
+# Usage (from the Travel directory): python -m benchmarks.bench_autocomplete
+import logging
+import os
+import threading
+import time
+import numpy as np
+import requests
+from benchmarks.common import AppServer, load, percentiles, report
+from benchmarks.stubs import StubServer, FakeAmadeus
+from utils.autocomplete import PrefixIndex
+from utils.gazetteer import Gazetteer
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'san', 'to', 'ber', 'vi', 'na', 'port', 'ville', 'burg', 'do', 'ri', 'sha', 'el']
+CONCURRENCY = 16
+REQUESTS_PER_WORKER = 200
+
+
+def synthetic_gazetteer(n, seed=0):
+    rng = np.random.default_rng(seed)
+    gazetteer = Gazetteer()
+    gazetteer.load_csv('data/cities.csv')
+    for i in range(n):
+        name = ''.join(rng.choice(SYLLABLES, size=rng.integers(2, 5))).title()
+        gazetteer.add(f"{name} {i}" if i % 3 == 0 else name, 'Synthetica', 'SY', 0.0, 0.0)
+    return gazetteer
+
+
+def typo(word, rng):
+    i = int(rng.integers(1, len(word) - 1))
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def main():
+    results = []
+    rng = np.random.default_rng(1)
+    for n in (1000, 100000):
+        gazetteer = synthetic_gazetteer(n)
+        start = time.perf_counter()
+        index = PrefixIndex.from_gazetteer(gazetteer)
+        build_s = time.perf_counter() - start
+        names = [e['city'] for e in gazetteer.entries]
+        for kind, queries in (
+            ("prefix", [names[i][:int(rng.integers(2, 6))] for i in rng.integers(0, len(names), 2000)]),
+            ("typo", [typo(names[i][:6], rng) for i in rng.integers(0, len(names), 2000) if len(names[i]) >= 6])
+        ):
+            timings = []
+            for q in queries:
+                start = time.perf_counter()
+                index.search(q)
+                timings.append(time.perf_counter() - start)
+            results.append({
+                "scenario": f"in_process_{kind}",
+                "names": len(index),
+                "index_build_ms": round(build_s * 1000, 1),
+                "p50_us": round(float(np.percentile(timings, 50)) * 1e6, 1),
+                "p99_us": round(float(np.percentile(timings, 99)) * 1e6, 1)
+            })
+
+    fake = FakeAmadeus()
+    with StubServer(fake.routes(), latency=0.2) as stub:
+        os.environ.update({'AMADEUS_URL': stub.url, 'AMADEUS_API_KEY': 'stub', 'AMADEUS_API_SECRET': 'stub'})
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        import app as app_module
+        with AppServer(app_module.app) as server:
+            known = ['lon', 'par', 'new', 'ber', 'tok', 'sydn', 'bangok', 'rom', 'mad', 'ams']
+            local = threading.local()
+
+            def query():
+                if not hasattr(local, 'session'):
+                    local.session = requests.Session()
+                session = local.session
+                keyword = known[int(np.random.randint(len(known)))]
+                session.get(f"{server.url}/api/city-search", params={"keyword": keyword}).raise_for_status()
+
+            latencies, errors, wall = load(query, CONCURRENCY, REQUESTS_PER_WORKER)
+            results.append({"scenario": "http_local_index", "concurrency": CONCURRENCY, "requests": len(latencies),
+                            "errors": errors, "qps": int(len(latencies) / wall), **percentiles(latencies)})
+
+            # Unknown names go to Amadeus once, then come from the cache
+            stub.calls = 0
+            latencies, errors, wall = load(
+                lambda: requests.get(f"{server.url}/api/city-search", params={"keyword": "Qwertyville"}).raise_for_status(),
+                CONCURRENCY, 10
+            )
+            results.append({"scenario": "http_amadeus_cached", "requests": len(latencies), "errors": errors,
+                            "upstream_calls": stub.calls, **percentiles(latencies)})
+    report("autocomplete", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# recommend_many() vs one recommend() per query: queries/s for a batch of partner search
+# profiles (5 origins x 6 continents, mixed budgets/days/people/currencies), in-process and
+# over worker processes, plus /api/recommend x N vs one /api/recommend/batch. Checks that
+# every variant returns the same responses.
+# Usage (from the Travel directory): python -m benchmarks.bench_batch [--queries N] [--processes N]
+import argparse
+import json
+import logging
+import random
+import time
+from benchmarks.common import CONTINENTS, make_recommender, synthetic_destinations, report
+
+DESTINATIONS = 20000
+ORIGINS = ["London", "Paris", "New York", "Tokyo", "Sydney"]
+
+
+def profiles(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "continent": rng.choice(CONTINENTS), "budget": rng.choice([800, 1500, 3000, 6000, 12000]),
+        "days": rng.choice([3, 5, 7, 10]), "people": rng.randint(1, 4),
+        "currency": rng.choice(["USD", "EUR", "GBP"]), "origin_city": rng.choice(ORIGINS)
+    } for _ in range(n)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    recommender = make_recommender(synthetic_destinations(DESTINATIONS))
+    queries = profiles(args.queries)
+
+    def cold(fn):
+        # Every variant starts without cached scored sets
+        recommender.invalidate_results()
+        return timed(fn)
+
+    single_s, expected = cold(lambda: [recommender.recommend(**q) for q in queries])
+    batch_s, batch = cold(lambda: recommender.recommend_many(queries))
+    pool_s, pooled = cold(lambda: recommender.recommend_many(queries, processes=args.processes))
+    same = json.dumps(batch) == json.dumps(expected) and json.dumps(pooled) == json.dumps(expected)
+    results = [{"destinations": DESTINATIONS, "queries": len(queries), "same_results": same}]
+    for name, seconds in (("single_calls", single_s), ("recommend_many", batch_s),
+                          (f"recommend_many_{args.processes}_processes", pool_s)):
+        results.append({
+            "variant": name, "s": round(seconds, 3),
+            "queries_per_s": round(len(queries) / seconds, 1), "speedup": round(single_s / seconds, 2)
+        })
+
+    import app as app_module
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app_module.recommender = recommender
+    app_module.print = lambda *a, **kw: None # Keep the request log out of the timing
+    client = app_module.app.test_client()
+    http_single_s, _ = cold(lambda: [client.post('/api/recommend', json=q).json for q in queries])
+    http_batch_s, response = cold(lambda: client.post('/api/recommend/batch', json={"queries": queries}).json)
+    results.append({
+        "variant": "http", "single_requests_s": round(http_single_s, 3), "batch_request_s": round(http_batch_s, 3),
+        "speedup": round(http_single_s / http_batch_s, 2), "batch_results": len(response['results'])
+    })
+    report("batch", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Budget lower-bound index: recommend() with destinations pruned by their lower-bound trip cost
+# vs scoring every destination of the continent, cold (no cached scored sets) at budgets from
+# tight to loose on a large synthetic dataset. Checks that every bound is under the real trip
+# cost and that pruned and unpruned recommend() answer exactly the same, low budgets and
+# no-match answers (min_cost_found) included.
+# Usage (from the Travel directory): python -m benchmarks.bench_budget_index [--destinations N]
+import argparse
+import json
+import random
+import time
+import numpy as np
+from benchmarks.common import CONTINENTS, VIBES, make_recommender, percentiles, synthetic_destinations, report
+
+ORIGINS = ["London", "Paris", "New York", "Tokyo", "Sydney"]
+BUDGETS = [300, 800, 1500, 3000, 10000]
+RUNS = 10
+QUERIES = 300
+
+
+def random_queries(n, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        query = {
+            "continent": rng.choice(CONTINENTS), "budget": rng.choice([50, 200, 400, 700, 1000, 2000, 5000, 20000]),
+            "days": rng.randint(1, 14), "people": rng.randint(1, 4), "currency": rng.choice(["USD", "EUR", "JPY"]),
+            "origin_city": rng.choice(ORIGINS)
+        }
+        if rng.random() < 0.2:
+            query["vibe"] = rng.choice(VIBES)
+        if rng.random() < 0.2:
+            query["max_flight_hours"] = rng.choice([3, 6, 10])
+        queries.append(query)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--destinations', type=int, default=100000)
+    args = parser.parse_args()
+    recommender = make_recommender(synthetic_destinations(args.destinations))
+    index = recommender.budget_index
+    results = []
+
+    # Every bound at or under the real cost, for every destination from every origin
+    violations, slack = 0, []
+    for origin in ORIGINS:
+        lat, lng = recommender._resolve_origin_coords(origin)
+        base = recommender._score_base(CONTINENTS[0], origin, None, 50)
+        everything = recommender._score_base(None, origin, None, 50) if base['continent_msg'] else base
+        for days, people in ((1, 1), (7, 2), (14, 4)):
+            scored = recommender._scored_sets(everything, [days], [people])[0]
+            bounds = index.bounds(scored['rows'], lat, lng, days, people)
+            violations += int((bounds > scored['total']).sum())
+            slack.append(float(np.median(bounds / scored['total'])))
+    results.append({"check": "bounds", "destinations": args.destinations, "violations": violations,
+                    "median_bound_to_cost": round(float(np.median(slack)), 3)})
+
+    def answers(queries, pruning):
+        recommender.budget_index = index if pruning else None
+        recommender.invalidate_results()
+        return [recommender.recommend(**query) for query in queries]
+
+    queries = random_queries(QUERIES)
+    pruned, full = answers(queries, True), answers(queries, False)
+    results.append({
+        "check": "same_results", "queries": len(queries),
+        "no_match": sum(not r['recommendations'] for r in full),
+        "same": json.dumps(pruned) == json.dumps(full)
+    })
+
+    for budget in BUDGETS:
+        row = {"check": "cold_recommend", "budget_usd": budget, "days": 7, "people": 2}
+        for pruning in (False, True):
+            recommender.budget_index = index if pruning else None
+            samples = []
+            for run in range(RUNS):
+                recommender.invalidate_results()
+                start = time.perf_counter()
+                recommender.recommend(CONTINENTS[run % len(CONTINENTS)], budget, 7, 2, origin_city=ORIGINS[run % len(ORIGINS)])
+                samples.append(time.perf_counter() - start)
+            scored = recommender.scored_candidates(CONTINENTS[0], 7, 2, ORIGINS[0], budget_usd=budget)
+            name = "pruned" if pruning else "full"
+            row[f"{name}_scored_rows"] = scored['n']
+            row[f"{name}_p50_ms"] = percentiles(samples)['p50_ms']
+        row["speedup"] = round(row["full_p50_ms"] / row["pruned_p50_ms"], 2)
+        results.append(row)
+    recommender.budget_index = index
+    report("budget_index", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Upstream calls and latency with the shared client caches, against a slow local stub.
+# Usage (from the Travel directory): python -m benchmarks.bench_cache
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import report
+from benchmarks.stubs import StubServer, advisory_routes
+from utils.api_clients import SafetyClient
+from utils.cache import TTLCache
+
+COUNTRIES = [f"C{i}" for i in range(50)]
+
+
+def main():
+    results = []
+    with StubServer(advisory_routes(), latency=0.05) as stub:
+        cache = TTLCache('bench-safety', ttl=60)
+        safety = SafetyClient(base_url=f"{stub.url}/api", cache=cache)
+
+        # 20 simulated /api/recommend calls over the same continent
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            safety.get_safety_scores(COUNTRIES)
+            timings.append(time.perf_counter() - start)
+        results.append({
+            "scenario": "repeated_requests",
+            "requests": 20,
+            "upstream_calls": stub.calls,
+            "first_request_s": round(timings[0], 4),
+            "warm_request_s": round(min(timings[1:]), 5),
+            "cache": cache.stats()
+        })
+
+        # 64 concurrent misses for one key collapse into a single upstream call
+        stub.calls = 0
+        cache = TTLCache('bench-singleflight', ttl=60)
+        safety = SafetyClient(base_url=f"{stub.url}/api", cache=cache)
+        with ThreadPoolExecutor(max_workers=64) as pool:
+            list(pool.map(lambda _: safety.get_safety_score('FR'), range(64)))
+        results.append({"scenario": "single_flight", "callers": 64, "upstream_calls": stub.calls})
+
+        # Expired entries are served immediately while one background refresh runs
+        stub.calls = 0
+        cache = TTLCache('bench-stale', ttl=0.2, stale_ttl=60)
+        safety = SafetyClient(base_url=f"{stub.url}/api", cache=cache)
+        safety.get_safety_score('FR')
+        time.sleep(0.3)
+        start = time.perf_counter()
+        for _ in range(10):
+            safety.get_safety_score('FR')
+        stale_s = time.perf_counter() - start
+        time.sleep(0.2)
+        results.append({
+            "scenario": "stale_while_revalidate",
+            "stale_reads_s": round(stale_s, 5),
+            "upstream_calls": stub.calls,
+            "cache": cache.stats()
+        })
+
+        # Size bound
+        cache = TTLCache('bench-lru', ttl=60, maxsize=10)
+        safety = SafetyClient(base_url=f"{stub.url}/api", cache=cache)
+        safety.get_safety_scores(COUNTRIES)
+        results.append({"scenario": "lru_eviction", "cache": cache.stats()})
+    report("cache", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# Circuit breakers and adaptive timeouts: WeatherClient against a local stub that is healthy,
+# then hangs, then answers 500s, then recovers. Per phase: call latency (p50/p99), fallbacks
+# served and the breaker state changes, with breakers on vs CIRCUIT_BREAKER=0.
+# Usage (from the Travel directory): python -m benchmarks.bench_circuit
+import time
+from benchmarks.common import percentiles, report
+from benchmarks.stubs import StubServer, weather_routes
+from utils import circuit
+from utils.api_clients import WeatherClient
+from utils.cache import TTLCache
+
+LATENCY = 0.02
+CLIENT_TIMEOUT = 1.0
+OPEN_SECONDS = 1.0
+CALLS = 20
+
+
+def main():
+    results = []
+    with StubServer(weather_routes(), latency=LATENCY) as stub:
+        client = WeatherClient(base_url=stub.url, timeout=CLIENT_TIMEOUT, cache=TTLCache('bench-circuit', ttl=900))
+        client.api_key = 'stub'
+        weather = circuit.breaker('weather')
+        weather.open_seconds = OPEN_SECONDS
+        counter = [0]
+
+        def phase(name, calls, enabled):
+            latencies, fallbacks, states = [], 0, [weather.state]
+            for _ in range(calls):
+                counter[0] += 1 # A new city each call, so nothing comes from the cache
+                start = time.perf_counter()
+                result = client.get_weather(f"City{counter[0]}")
+                latencies.append(time.perf_counter() - start)
+                fallbacks += result['temp'] == "N/A"
+                if weather.state != states[-1]:
+                    states.append(weather.state)
+            results.append({
+                "circuit_breaker": enabled, "phase": name, "calls": calls, "fallbacks": fallbacks,
+                "states": " -> ".join(states), "timeout_s": round(weather.timeout(CLIENT_TIMEOUT), 3),
+                **percentiles(latencies)
+            })
+
+        for enabled in (True, False):
+            circuit.ENABLED = enabled
+            weather.reset()
+            stub.latency, stub.error_rate = LATENCY, 0.0
+            phase("healthy", 2 * CALLS, enabled)
+            stub.latency = 10
+            phase("hung", CALLS, enabled)
+            stub.latency, stub.error_rate = LATENCY, 1.0
+            phase("errors_500", CALLS, enabled)
+            stub.error_rate = 0.0
+            time.sleep(OPEN_SECONDS) # Let the open circuit admit its trial call
+            phase("recovered", CALLS, enabled)
+        circuit.ENABLED = True
+    report("circuit", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Origin x destination cost matrix: build time and size at 250x250 and 10k x 10k, row lookup
+# vs per-request prediction, and incremental destination additions.
+# Usage (from the Travel directory): python -m benchmarks.bench_cost_matrix
+import os
+import resource
+import shutil
+import tempfile
+import time
+import numpy as np
+from benchmarks.common import synthetic_destinations, timeit, report
+from utils.cost_matrix import CostMatrix
+from utils.ml_models import HybridMLEngine
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def main():
+    # 10k x 10k = 1e8 flight predictions, only practical with the NumPy evaluators
+    engine = HybridMLEngine(fast_inference=True)
+    results = []
+    tmp = tempfile.mkdtemp()
+    try:
+        for n in (250, 10000):
+            df = synthetic_destinations(n + 100)
+            base = df.iloc[:n]
+            origins = base[['lat', 'lng']].to_numpy()
+            matrix = CostMatrix(os.path.join(tmp, f"m{n}"))
+
+            rss_before = rss_mb()
+            start = time.perf_counter()
+            matrix.build(origins, base, engine, CostMatrix.fingerprint(origins, base, engine))
+            build_s = time.perf_counter() - start
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+            lat, lng = origins[n // 2]
+            lookup_s, (_, flights) = timeit(lambda: matrix.row(lat, lng))
+            predict_s, predicted = timeit(lambda: engine.predict_flight_costs(lat, lng, base), 3)
+            matches = bool(np.array_equal(np.asarray(flights).astype(int), predicted))
+
+            start = time.perf_counter()
+            matrix.add_destinations(origins, df, engine, CostMatrix.fingerprint(origins, df, engine))
+            add_s = time.perf_counter() - start
+
+            results.append({
+                "origins_x_destinations": f"{n}x{n}",
+                "build_s": round(build_s, 3),
+                "file_mb": round(matrix.nbytes() / 2**20, 1),
+                "rss_before_mb": round(rss_before, 1),
+                "peak_rss_mb": round(peak_rss, 1),
+                "row_lookup_us": round(lookup_s * 1e6, 1),
+                "predict_row_ms": round(predict_s * 1000, 2),
+                "matches_prediction": matches,
+                "add_100_destinations_s": round(add_s, 3),
+                "destinations_after_add": matrix.meta['n_destinations']
+            })
+            del matrix
+            shutil.rmtree(os.path.join(tmp, f"m{n}"), ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    report("cost_matrix", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# /api/extra-details latency (p50/p99) at fixed concurrency against delayed local stubs:
+# the concurrent async endpoint vs the same upstream calls made one after another.
+# Usage (from the Travel directory): python -m benchmarks.bench_extra_details
+import logging
+import os
+import time
+from datetime import date as Date
+import requests
+from benchmarks.common import AppServer, load, percentiles, report
+from benchmarks.stubs import StubServer, FakeAmadeus, booking_routes
+
+LATENCY = 0.2
+CONCURRENCY = 16
+REQUESTS_PER_WORKER = 5
+BODY = {"city": "Paris", "country_code": "FR", "origin_city": "London"}
+
+
+def main():
+    with StubServer(FakeAmadeus().routes(), latency=LATENCY) as amadeus_stub, \
+            StubServer(booking_routes(), latency=LATENCY) as booking_stub:
+        os.environ.update({
+            'AMADEUS_URL': amadeus_stub.url, 'AMADEUS_API_KEY': 'stub', 'AMADEUS_API_SECRET': 'stub',
+            'BOOKING_URL': booking_stub.url, 'RAPIDAPI_KEY': 'stub', 'EXTRA_DETAILS_DEADLINE': '1.5'
+        })
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        import app as app_module
+        from flask import jsonify, request
+
+        @app_module.app.route('/bench/extra-details-sequential', methods=['POST'])
+        def sequential_extra_details():
+            # The previous implementation: every upstream call in turn
+            data = request.json
+            origin_iata = app_module.amadeus.get_iata_code(data['origin_city'])
+            flights = app_module.amadeus.get_flight_offers(origin_iata, data['city'][:3].upper(), '2026-06-01', 1)
+            hotels = app_module.booking.get_hotels(data['city'], Date(2026, 6, 1), 7)
+            return jsonify({"flights": flights[:2], "hotels": hotels, "origin_iata": origin_iata})
+
+        results = []
+        with AppServer(app_module.app) as server:
+            session = requests.Session()
+            # Warm the token and hotel-location caches for both variants
+            session.post(f"{server.url}/api/extra-details", json=BODY)
+
+            for name, path in (("sequential", "/bench/extra-details-sequential"), ("async", "/api/extra-details")):
+                latencies, errors, wall = load(
+                    lambda: requests.post(f"{server.url}{path}", json=BODY).raise_for_status(),
+                    CONCURRENCY, REQUESTS_PER_WORKER
+                )
+                results.append({"variant": name, "upstream_latency_s": LATENCY, "concurrency": CONCURRENCY,
+                                "requests": len(latencies), "errors": errors, **percentiles(latencies)})
+
+            # A hung hotel upstream: flights still come back, hotels reported as timed out
+            booking_stub.latency = 10
+            start = time.perf_counter()
+            response = requests.post(f"{server.url}/api/extra-details", json=BODY).json()
+            results.append({
+                "variant": "async_hotels_hung",
+                "deadline_s": app_module.EXTRA_DETAILS_DEADLINE,
+                "elapsed_s": round(time.perf_counter() - start, 2),
+                "status": response['status'],
+                "flights_returned": len(response['flights'])
+            })
+    report("extra_details", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Sequential vs concurrent safety/weather lookups against a local stub with injected latency.
+# Usage (from the Travel directory): python -m benchmarks.bench_fanout
+import os
+import time
+from benchmarks.common import report
+from benchmarks.stubs import StubServer, advisory_routes, weather_routes
+from utils.api_clients import SafetyClient, WeatherClient
+
+COUNTRIES = [f"C{i}" for i in range(50)]
+LATENCY = 0.1
+
+
+def main():
+    os.environ.setdefault('OPENWEATHER_API_KEY', 'stub')
+    routes = {**advisory_routes(), **weather_routes()}
+    results = []
+    with StubServer(routes, latency=LATENCY) as stub:
+        safety = SafetyClient(base_url=f"{stub.url}/api")
+        weather = WeatherClient(base_url=stub.url)
+
+        start = time.perf_counter()
+        sequential = {c: safety.get_safety_score(c) for c in COUNTRIES}
+        for c in COUNTRIES:
+            weather.get_weather(c)
+        sequential_s = time.perf_counter() - start
+
+        # Start the concurrent run cold as well
+        safety.cache.invalidate()
+        weather.cache.invalidate()
+
+        start = time.perf_counter()
+        concurrent = safety.get_safety_scores(COUNTRIES)
+        weather.get_weather_many(COUNTRIES)
+        concurrent_s = time.perf_counter() - start
+
+        results.append({
+            "lookups": len(COUNTRIES) * 2,
+            "latency_s": LATENCY,
+            "sequential_s": round(sequential_s, 3),
+            "concurrent_s": round(concurrent_s, 3),
+            "identical": sequential == concurrent
+        })
+
+    # A hung upstream must not hold the request past the overall deadline
+    with StubServer(routes, latency=10) as stub:
+        safety = SafetyClient(base_url=f"{stub.url}/api", timeout=5, deadline=0.5)
+        start = time.perf_counter()
+        scores = safety.get_safety_scores(COUNTRIES[:4])
+        results.append({
+            "hung_upstream_deadline_s": 0.5,
+            "elapsed_s": round(time.perf_counter() - start, 3),
+            "all_defaults": all(v == 2.5 for v in scores.values())
+        })
+    report("fanout", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# sklearn predict() vs the NumPy fast-inference evaluators, per prediction and batched.
+# Usage (from the Travel directory): python -m benchmarks.bench_fast_inference
+import numpy as np
+from benchmarks.common import synthetic_destinations, timeit, report
+from utils.ml_models import HybridMLEngine
+
+CALLS = 500
+
+
+def main():
+    sk = HybridMLEngine(fast_inference=False)
+    fast = HybridMLEngine(fast_inference=True)
+    results = [{"validation_max_abs_error": fast.fast_inference_errors, "tolerance": fast.fast_tolerance}]
+
+    df = synthetic_destinations(CALLS)
+    rows = list(df.itertuples(index=False))
+    for name, fn in (
+        ("predict_flight_cost", lambda e: [e.predict_flight_cost(51.5, -0.12, r.lat, r.lng, r.continent) for r in rows]),
+        ("predict_daily_cost", lambda e: [e.predict_daily_cost(r.continent, r.population, 2.5) for r in rows])
+    ):
+        sk_s, sk_out = timeit(lambda: fn(sk), 3)
+        fast_s, fast_out = timeit(lambda: fn(fast), 3)
+        results.append({
+            "call": name,
+            "sklearn_us_per_prediction": round(sk_s / CALLS * 1e6, 1),
+            "fast_us_per_prediction": round(fast_s / CALLS * 1e6, 1),
+            "speedup": round(sk_s / fast_s, 1),
+            "identical": sk_out == fast_out
+        })
+
+    for n in (250, 50000):
+        df = synthetic_destinations(n)
+        safety = np.full(n, 2.5)
+        for name, fn in (
+            ("predict_flight_costs", lambda e: e.predict_flight_costs(51.5, -0.12, df)),
+            ("predict_daily_costs", lambda e: e.predict_daily_costs(df, safety))
+        ):
+            sk_s, sk_out = timeit(lambda: fn(sk))
+            fast_s, fast_out = timeit(lambda: fn(fast))
+            results.append({
+                "call": name,
+                "destinations": n,
+                "sklearn_s": round(sk_s, 5),
+                "fast_s": round(fast_s, 5),
+                "speedup": round(sk_s / fast_s, 1),
+                "identical": bool(np.array_equal(sk_out, fast_out))
+            })
+    report("fast_inference", results)
+
+
+if __name__ == '__main__':
+    main()
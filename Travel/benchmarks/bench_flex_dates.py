@@ -0,0 +1,52 @@
+# Flexible-date flight search: a +-N day fare calendar from a delayed Amadeus stub, fetched
+# concurrently vs one day after another, then again from the per-day cache. Checks that both
+# give the same calendar and that duplicate fares are dropped.
+# Usage (from the Travel directory): python -m benchmarks.bench_flex_dates
+import os
+import time
+from datetime import date as Date, timedelta
+from benchmarks.common import report
+from benchmarks.stubs import StubServer, FakeAmadeus
+from utils.api_clients import AmadeusClient
+from utils.cache import TTLCache
+
+LATENCY = 0.2
+
+
+def main():
+    departure = (Date.today() + timedelta(days=30)).isoformat()
+    results = []
+    with StubServer(FakeAmadeus().routes(), latency=LATENCY) as stub:
+        os.environ.update({'AMADEUS_API_KEY': 'stub', 'AMADEUS_API_SECRET': 'stub'})
+        for flex_days in (0, 3, 7):
+            client = AmadeusClient(base_url=stub.url, offers_cache=TTLCache(f'bench-offers-{flex_days}', ttl=900))
+            client.token # Token fetched outside the timings
+
+            start = time.perf_counter()
+            days = [(Date.fromisoformat(departure) + timedelta(days=d)).isoformat() for d in range(-flex_days, flex_days + 1)]
+            sequential = {day: client.get_flight_summaries('LON', 'PAR', day, 1) for day in days}
+            sequential_s = time.perf_counter() - start
+            client.offers_cache.invalidate()
+
+            calls = stub.calls
+            start = time.perf_counter()
+            fares = client.get_fare_calendar('LON', 'PAR', departure, 1, flex_days)
+            concurrent_s = time.perf_counter() - start
+            upstream = stub.calls - calls
+
+            start = time.perf_counter()
+            client.get_fare_calendar('LON', 'PAR', departure, 1, flex_days)
+            cached_s = time.perf_counter() - start
+
+            results.append({
+                "flex_days": flex_days, "days": len(fares['calendar']), "upstream_latency_s": LATENCY,
+                "sequential_s": round(sequential_s, 3), "concurrent_s": round(concurrent_s, 3),
+                "cached_ms": round(cached_s * 1000, 2), "upstream_calls": upstream,
+                "offers_per_day": fares['calendar'][0]['offers'], "cheapest_date": fares['cheapest_date'],
+                "same_calendar": all(day['price'] == sequential[day['date']][0]['price'] for day in fares['calendar'])
+            })
+    report("flex_dates", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Origin resolution throughput: per-request DataFrame scan vs the gazetteer index.
+# Usage (from the Travel directory): python -m benchmarks.bench_gazetteer
+import time
+from benchmarks.common import synthetic_destinations, report
+from utils.gazetteer import Gazetteer
+
+LOOKUPS = 2000
+
+
+def scan(df, city):
+    # The previous _resolve_origin_coords
+    match = df[df['city'].str.lower() == city.lower()]
+    if not match.empty:
+        return match.iloc[0]['lat'], match.iloc[0]['lng']
+    return 51.5, -0.12
+
+
+def main():
+    results = []
+    for n in (250, 50000):
+        df = synthetic_destinations(n)
+        queries = [f"city{i * 7919 % n}" for i in range(LOOKUPS)]
+
+        start = time.perf_counter()
+        gazetteer = Gazetteer()
+        gazetteer.add_destinations(df)
+        gazetteer.load_csv('data/cities.csv')
+        build_s = time.perf_counter() - start
+
+        scan_queries = queries[:200]
+        start = time.perf_counter()
+        expected = [scan(df, q) for q in scan_queries]
+        scan_s = (time.perf_counter() - start) / len(scan_queries)
+
+        start = time.perf_counter()
+        found = [gazetteer.lookup(q) for q in queries]
+        index_s = (time.perf_counter() - start) / len(queries)
+
+        results.append({
+            "destinations": n,
+            "index_build_ms": round(build_s * 1000, 1),
+            "scan_lookups_per_s": int(1 / scan_s),
+            "index_lookups_per_s": int(1 / index_s),
+            "same_coordinates": expected == [(p['lat'], p['lng']) for p in found[:len(scan_queries)]]
+        })
+    report("gazetteer", results)
+
+
+if __name__ == '__main__':
+    main()
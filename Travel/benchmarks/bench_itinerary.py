@@ -0,0 +1,78 @@
+# Itinerary planner: route search checked against brute-force enumeration, exact (Held-Karp
+# with branch and bound) vs beam search, and plan_itinerary() end to end for 2-6 stops over
+# a continent of a 20k-destination set (target: under 200 ms for 6 stops).
+# Usage (from the Travel directory): python -m benchmarks.bench_itinerary
+import itertools
+import time
+import numpy as np
+from benchmarks.common import CONTINENTS, make_recommender, percentiles, synthetic_destinations, timeit, report
+from utils.itinerary import RoutePlanner, exact_state_count
+
+DESTINATIONS = 20000
+RUNS = 20
+ORIGINS = ["London", "Paris", "New York", "Tokyo", "Sydney"]
+
+
+def random_planner(n, seed):
+    # Stops scattered over ~3000 km, costs in the range the models produce
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 3000, (n, 2))
+    legs = np.linalg.norm(points[:, None] - points[None], axis=2) / 10 + 50
+    outbound = rng.uniform(50, 600, n)
+    stays = rng.uniform(100, 900, n)
+    return RoutePlanner(legs, outbound, outbound, stays, stays / 3, 1)
+
+
+def brute_force(planner, stops):
+    return min(planner._total(list(route)) for route in itertools.permutations(range(planner.n), stops))
+
+
+def main():
+    results = []
+    # Search vs enumeration of every ordered route
+    for stops in (2, 3, 4, 5):
+        planner = random_planner(9, stops)
+        brute_s, expected = timeit(lambda: brute_force(planner, stops), 1)
+        search_s, (cost, _, info) = timeit(lambda: planner.plan(stops))
+        results.append({
+            "check": "vs_enumeration", "candidates": 9, "stops": stops,
+            "enumeration_ms": round(brute_s * 1000, 1), "search_ms": round(search_s * 1000, 2),
+            "states": info['states'], "same_cost": abs(cost - expected) < 1e-6
+        })
+
+    # Exact vs beam where both are feasible
+    gaps, exact_times, beam_times = [], [], []
+    for seed in range(10):
+        planner = random_planner(16, seed)
+        exact_s, (exact_cost, _, _) = timeit(lambda: planner.plan(6), 1)
+        beam_s, (beam_cost, _, _) = timeit(lambda: planner.plan(6, beam_width=500), 1)
+        gaps.append(beam_cost / exact_cost - 1)
+        exact_times.append(exact_s)
+        beam_times.append(beam_s)
+    results.append({
+        "check": "exact_vs_beam", "candidates": 16, "stops": 6, "exact_states": exact_state_count(16, 6),
+        "exact_ms": round(float(np.median(exact_times)) * 1000, 1),
+        "beam_ms": round(float(np.median(beam_times)) * 1000, 1),
+        "beam_max_gap_pct": round(max(gaps) * 100, 3)
+    })
+
+    # End to end
+    recommender = make_recommender(synthetic_destinations(DESTINATIONS))
+    for stops in range(2, 7):
+        samples = []
+        for run in range(RUNS):
+            start = time.perf_counter()
+            response = recommender.plan_itinerary(
+                CONTINENTS[run % len(CONTINENTS)], 20000, 14, 2, stops=stops, origin_city=ORIGINS[run % len(ORIGINS)]
+            )
+            samples.append(time.perf_counter() - start)
+        results.append({
+            "check": "plan_itinerary", "stops": stops, "eligible": response['analysis']['eligible'],
+            "method": response['analysis']['method'], **percentiles(samples),
+            "under_200ms": float(np.percentile(samples, 99)) < 0.2
+        })
+    report("itinerary", results)
+
+
+if __name__ == '__main__':
+    main()
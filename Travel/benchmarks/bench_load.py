@@ -0,0 +1,82 @@
+# Concurrent load against the three API endpoints, every upstream served by local stubs.
+# Reports requests/s, p50/p99/max latency and errors per endpoint, plus upstream calls made.
+# Usage (from the Travel directory):
+#   python -m benchmarks.bench_load [--concurrency N] [--requests N] [--latency S] [--error-rate R]
+import argparse
+import itertools
+import logging
+import threading
+import requests
+from benchmarks.common import AppServer, CONTINENTS, load, percentiles, report
+from benchmarks.stubs import upstream_stubs
+
+ORIGINS = ["London", "Paris", "New York", "Tokyo", "Sydney"]
+PREFIXES = ["lon", "par", "new", "tok", "syd", "ber", "mad", "rom"]
+CITIES = [("Paris", "FR"), ("Tokyo", "JP"), ("London", "GB"), ("Bangkok", "TH")]
+
+
+def endpoint_calls(base_url):
+    # name -> fn(i, session) making the i-th request; inputs rotate so caches see a mix of keys
+    def recommend(i, session):
+        body = {
+            "continent": CONTINENTS[i % len(CONTINENTS)], "budget": (1000, 3000, 8000)[i % 3],
+            "days": 7, "people": 2, "currency": ("USD", "EUR")[i % 2], "origin_city": ORIGINS[i % len(ORIGINS)]
+        }
+        session.post(f"{base_url}/api/recommend", json=body).raise_for_status()
+
+    def city_search(i, session):
+        session.get(f"{base_url}/api/city-search", params={"keyword": PREFIXES[i % len(PREFIXES)]}).raise_for_status()
+
+    def extra_details(i, session):
+        city, code = CITIES[i % len(CITIES)]
+        body = {"city": city, "country_code": code, "origin_city": ORIGINS[i % len(ORIGINS)]}
+        session.post(f"{base_url}/api/extra-details", json=body).raise_for_status()
+
+    return {"recommend": recommend, "city-search": city_search, "extra-details": extra_details}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=25, help="requests per worker and endpoint")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds each stub waits before answering")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of stub calls answered with a 500")
+    parser.add_argument('--endpoints', default="recommend,city-search,extra-details")
+    args = parser.parse_args()
+
+    with upstream_stubs(args.latency, args.error_rate) as stubs:
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        import app as app_module
+        app_module.print = lambda *a, **kw: None # Keep the request log out of the output
+
+        results = [{"concurrency": args.concurrency, "stub_latency_s": args.latency, "stub_error_rate": args.error_rate}]
+        with AppServer(app_module.app) as server:
+            calls = endpoint_calls(server.url)
+            for name in args.endpoints.split(','):
+                counter = itertools.count()
+                local = threading.local()
+
+                def call():
+                    # One keep-alive session per worker thread
+                    if not hasattr(local, 'session'):
+                        local.session = requests.Session()
+                    calls[name](next(counter), local.session)
+
+                upstream_before = {service: stub.calls for service, stub in stubs.items()}
+                latencies, errors, wall = load(call, args.concurrency, args.requests)
+                results.append({
+                    "endpoint": name,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "requests_per_s": round(len(latencies) / wall, 1),
+                    **percentiles(latencies),
+                    "upstream_calls": {
+                        service: stub.calls - upstream_before[service]
+                        for service, stub in stubs.items() if stub.calls != upstream_before[service]
+                    }
+                })
+    report("load", results)
+
+
+if __name__ == '__main__':
+    main()
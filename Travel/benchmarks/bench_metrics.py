@@ -0,0 +1,107 @@
+# Cost of the timing spans and upstream counters on recommend() and /api/recommend.
+# Two numbers per variant:
+#   ab_overhead_pct        metrics on vs off (METRICS=0), interleaved rounds, best round each
+#   estimated_overhead_pct instrumentation events per call x cost of one event / call time,
+#                          which stays stable on a noisy machine where the A/B gap is within noise
+# Usage (from the Travel directory): python -m benchmarks.bench_metrics
+import logging
+import time
+from benchmarks.common import make_recommender, synthetic_destinations, report
+
+DESTINATIONS = 250
+ROUNDS = 30
+CALLS_PER_ROUND = 20
+EVENT_LOOPS = 200000
+ARGS = ("Europe", 5000, 5, 2, "EUR", "London")
+
+
+def measure(fn, metrics):
+    # Best per-call seconds with metrics on and off
+    best = {True: float('inf'), False: float('inf')}
+    for _ in range(ROUNDS):
+        for enabled in (True, False):
+            metrics.ENABLED = enabled
+            start = time.perf_counter()
+            for _ in range(CALLS_PER_ROUND):
+                fn()
+            best[enabled] = min(best[enabled], (time.perf_counter() - start) / CALLS_PER_ROUND)
+    metrics.ENABLED = True
+    return best[True], best[False]
+
+
+def events_per_call(fn, metrics):
+    # Number of histogram observations and counter increments one call makes
+    counted = [0]
+    observe, inc = metrics.Histogram.observe, metrics.Metrics.inc
+
+    def counting(original):
+        def wrapper(*args, **kwargs):
+            counted[0] += 1
+            return original(*args, **kwargs)
+        return wrapper
+
+    metrics.Histogram.observe, metrics.Metrics.inc = counting(observe), counting(inc)
+    try:
+        fn()
+    finally:
+        metrics.Histogram.observe, metrics.Metrics.inc = observe, inc
+    return counted[0]
+
+
+def event_cost(metrics):
+    # Enabled minus disabled cost of one span, the most common event
+    def loop():
+        start = time.perf_counter()
+        for _ in range(EVENT_LOOPS):
+            with metrics.span('bench'):
+                pass
+        return (time.perf_counter() - start) / EVENT_LOOPS
+
+    on = min(loop() for _ in range(3))
+    metrics.ENABLED = False
+    off = min(loop() for _ in range(3))
+    metrics.ENABLED = True
+    return on - off
+
+
+def row(name, fn, metrics, per_event):
+    on, off = measure(fn, metrics)
+    events = events_per_call(fn, metrics)
+    return {
+        "variant": name,
+        "metrics_on_us": round(on * 1e6, 1),
+        "metrics_off_us": round(off * 1e6, 1),
+        "ab_overhead_pct": round((on - off) / off * 100, 2),
+        "events_per_call": events,
+        "estimated_overhead_pct": round(events * per_event / off * 100, 2)
+    }
+
+
+def main():
+    from utils import metrics
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    recommender = make_recommender(synthetic_destinations(DESTINATIONS))
+    recommender.recommend(*ARGS)
+    per_event = event_cost(metrics)
+
+    def cold():
+        # Full scoring: filter, safety, inference, weather and ranking spans all fire
+        recommender.invalidate_results()
+        recommender.recommend(*ARGS)
+
+    results = [
+        row("recommend_cached", lambda: recommender.recommend(*ARGS), metrics, per_event),
+        row("recommend_cold", cold, metrics, per_event)
+    ]
+
+    import app as app_module
+    app_module.recommender = recommender
+    app_module.print = lambda *args, **kwargs: None # Keep the request log out of the timing
+    client = app_module.app.test_client()
+    body = {"continent": "Europe", "budget": 5000, "days": 5, "people": 2, "currency": "EUR"}
+    results.append(row("http_recommend", lambda: client.post('/api/recommend', json=body), metrics, per_event))
+    report("metrics_overhead", [{"event_cost_us": round(per_event * 1e6, 3)}] + results)
+
+
+if __name__ == '__main__':
+    main()
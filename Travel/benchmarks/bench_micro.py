@@ -0,0 +1,94 @@
+# Micro-benchmarks for the three hot components, every upstream served by local stubs:
+# HybridMLEngine predictions, DestinationLoader.fetch_data and TravelRecommender.recommend.
+# Usage (from the Travel directory): python -m benchmarks.bench_micro [--latency S] [--error-rate R]
+import argparse
+import os
+import tempfile
+import numpy as np
+from benchmarks.common import synthetic_destinations, timeit, report
+from benchmarks.stubs import upstream_stubs
+
+ORIGIN = (51.5, -0.12)
+BATCH_SIZES = (250, 50000)
+SCALAR_CALLS = 1000
+ARGS = ("Europe", 3000, 7, 2, "EUR", "London")
+
+
+def bench_engine(results):
+    from utils.ml_models import HybridMLEngine
+    engine = HybridMLEngine()
+    scalar_flight, _ = timeit(lambda: [engine.predict_flight_cost(*ORIGIN, 48.85, 2.35, 'Europe') for _ in range(SCALAR_CALLS)])
+    scalar_daily, _ = timeit(lambda: [engine.predict_daily_cost('Europe', 67000000, 1.5) for _ in range(SCALAR_CALLS)])
+    results.append({
+        "component": "engine_scalar",
+        "flight_us_per_call": round(scalar_flight / SCALAR_CALLS * 1e6, 1),
+        "daily_us_per_call": round(scalar_daily / SCALAR_CALLS * 1e6, 1)
+    })
+    for n in BATCH_SIZES:
+        df = synthetic_destinations(n)
+        safety = np.random.default_rng(1).uniform(0, 5, size=n)
+        flight, _ = timeit(lambda: engine.predict_flight_costs(*ORIGIN, df))
+        daily, _ = timeit(lambda: engine.predict_daily_costs(df, safety))
+        results.append({
+            "component": "engine_batch", "rows": n,
+            "flight_ms": round(flight * 1000, 2), "daily_ms": round(daily * 1000, 2)
+        })
+
+
+def bench_loader(results, stubs, countries):
+    from utils.destinations_data import DestinationLoader
+    loader = DestinationLoader()
+    best, rows = timeit(loader.fetch_data)
+    results.append({
+        "component": "fetch_data", "countries": countries, "destinations": len(rows),
+        "ms": round(best * 1000, 2), "restcountries_calls": stubs["restcountries"].calls
+    })
+
+
+def bench_recommend(results, stubs):
+    from utils.cache import CACHES
+    from utils.cost_matrix import CostMatrix
+    from utils.feature_store import FeatureStore
+    from utils.recommender import TravelRecommender
+    with tempfile.TemporaryDirectory() as tmp:
+        # Own artifact directories, so the real feature store and matrix are left alone
+        recommender = TravelRecommender(
+            feature_store=FeatureStore(os.path.join(tmp, 'destinations')),
+            cost_matrix=CostMatrix(os.path.join(tmp, 'cost_matrix'))
+        )
+
+        def cold():
+            # Empty result and client caches: safety, weather and rates go to the stubs
+            for cache in list(CACHES.values()):
+                cache.invalidate()
+            return recommender.recommend(*ARGS)
+
+        upstream_before = stubs["advisory"].calls + stubs["weather"].calls
+        cold_s, response = timeit(cold)
+        upstream = stubs["advisory"].calls + stubs["weather"].calls - upstream_before
+        cached_s, _ = timeit(lambda: recommender.recommend(*ARGS))
+        results.append({
+            "component": "recommend", "destinations": len(recommender.df),
+            "cold_ms": round(cold_s * 1000, 2), "cached_ms": round(cached_s * 1000, 3),
+            "upstream_calls_per_cold_run": upstream // 5,
+            "recommendations": len(response['recommendations'])
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds each stub waits before answering")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of stub calls answered with a 500")
+    parser.add_argument('--countries', type=int, default=250, help="records served by the restcountries stub")
+    args = parser.parse_args()
+
+    results = []
+    bench_engine(results)
+    with upstream_stubs(args.latency, args.error_rate, args.countries) as stubs:
+        bench_loader(results, stubs, args.countries)
+        bench_recommend(results, stubs)
+    report("micro", [{"latency_s": args.latency, "error_rate": args.error_rate}] + results)
+
+
+if __name__ == '__main__':
+    main()
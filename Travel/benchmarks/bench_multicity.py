@@ -0,0 +1,145 @@
+# Multi-city dataset (WORLD_CITIES_PATH): build time, frame size compact vs object columns,
+# recommend() latency, and per-worker memory with the feature store memory-mapped
+# (FEATURE_MMAP=1) vs read into each process. Workers load at the same time and report
+# Rss/Pss/shared from /proc/self/smaps_rollup (Linux).
+# Usage (from the Travel directory): python -m benchmarks.bench_multicity [--cities N] [--workers N]
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.common import timeit, report
+from benchmarks.stubs import synthetic_countries, upstream_stubs
+
+COUNTRIES = 250
+ARGS = ("Europe", 3000, 7, 2, "EUR", "London")
+
+
+def world_cities(path, n, seed=0):
+    # simplemaps-style CSV spread over the synthetic restcountries codes; a few rows use
+    # codes no country has, which the loader drops
+    rng = np.random.default_rng(seed)
+    codes = [c['cca2'] for c in synthetic_countries(COUNTRIES)] + ["ZZ"]
+    pick = rng.integers(0, len(codes), size=n)
+    pd.DataFrame({
+        "city": [f"City{i % (n // 3 + 1)}" for i in range(n)], # Names repeat across countries
+        "iso2": np.array(codes)[pick],
+        "lat": rng.uniform(-60, 70, size=n).round(4),
+        "lng": rng.uniform(-180, 180, size=n).round(4),
+        "population": rng.integers(500, 20000000, size=n)
+    }).to_csv(path, index=False)
+
+
+def memory():
+    # kB figures for this process
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        "rss_mb": round(fields.get('Rss', 0) / 1024, 1),
+        "pss_mb": round(fields.get('Pss', 0) / 1024, 1),
+        "shared_mb": round((fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)) / 1024, 1),
+        "private_mb": round((fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024, 1)
+    }
+
+
+def worker(root, mmap, barrier, results):
+    from utils.cost_matrix import CostMatrix
+    from utils.feature_store import FeatureStore
+    from utils.recommender import TravelRecommender
+    before = memory()
+    recommender = TravelRecommender(
+        feature_store=FeatureStore(os.path.join(root, 'destinations'), mmap=mmap),
+        cost_matrix=CostMatrix(os.path.join(root, 'cost_matrix'))
+    )
+    recommender.recommend(*ARGS)
+    # Every worker holds its data before anyone measures, so shared pages count once per worker
+    barrier.wait()
+    after = memory()
+    results.put({
+        "loaded_mb": {key: round(after[key] - before[key], 1) for key in after},
+        **after
+    })
+    barrier.wait()
+
+
+def run_workers(root, mmap, workers):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(root, mmap, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {
+        "variant": "mmap" if mmap else "in_memory",
+        "workers": workers,
+        "pss_total_mb": round(sum(r['pss_mb'] for r in rows), 1),
+        "per_worker": rows
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cities', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        cities_path = os.path.join(root, 'world_cities.csv')
+        world_cities(cities_path, args.cities)
+        with upstream_stubs(countries=COUNTRIES):
+            os.environ['WORLD_CITIES_PATH'] = cities_path
+            from utils.cache import CACHES
+            from utils.cost_matrix import CostMatrix
+            from utils.feature_store import FeatureStore
+            from utils.recommender import TravelRecommender
+            start = time.perf_counter()
+            recommender = TravelRecommender(
+                feature_store=FeatureStore(os.path.join(root, 'destinations')),
+                cost_matrix=CostMatrix(os.path.join(root, 'cost_matrix')),
+                rebuild_features=True
+            )
+            build_s = time.perf_counter() - start
+            df = recommender.df
+
+            def cold():
+                for cache in list(CACHES.values()):
+                    cache.invalidate()
+                return recommender.recommend(*ARGS)
+
+            cold_s, _ = timeit(cold, 3)
+            cached_s, _ = timeit(lambda: recommender.recommend(*ARGS))
+            artifact = os.path.join(root, 'destinations')
+            results = [{
+                "cities_in_file": args.cities,
+                "destinations": len(df),
+                "build_s": round(build_s, 2),
+                "frame_mb": round(df.memory_usage(deep=True).sum() / 1e6, 2),
+                "object_frame_mb": round(df.astype(object).memory_usage(deep=True).sum() / 1e6, 2),
+                "artifact_mb": round(sum(
+                    os.path.getsize(os.path.join(artifact, name)) for name in os.listdir(artifact)
+                ) / 1e6, 2),
+                "recommend_cold_ms": round(cold_s * 1000, 2),
+                "recommend_cached_ms": round(cached_s * 1000, 3)
+            }]
+            del recommender, df
+            for mmap in (True, False):
+                results.append(run_workers(root, mmap, args.workers))
+    finally:
+        os.environ.pop('WORLD_CITIES_PATH', None)
+        shutil.rmtree(root, ignore_errors=True)
+    report("multicity", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# recommend() with the response cache: cold vs warm latency, hit rate over a stream of
+# queries with varied budgets/currencies, and invalidation.
+# Usage (from the Travel directory): python -m benchmarks.bench_response_cache
+import time
+import numpy as np
+from benchmarks.common import synthetic_destinations, make_recommender, report, CONTINENTS
+
+QUERIES = 500
+
+
+def main():
+    recommender = make_recommender(synthetic_destinations(5000))
+    rng = np.random.default_rng(0)
+    origins = ['London', 'Paris', 'New York', 'Tokyo', 'london ', 'PARIS']
+
+    timings = {"miss": [], "hit": []}
+    for _ in range(QUERIES):
+        query = dict(
+            continent=str(rng.choice(CONTINENTS)), budget=int(rng.integers(500, 8000)),
+            days=int(rng.choice([5, 7, 10])), people=int(rng.choice([1, 2])),
+            currency=str(rng.choice(['USD', 'EUR', 'GBP'])), origin_city=str(rng.choice(origins))
+        )
+        misses = recommender.response_cache.misses
+        start = time.perf_counter()
+        recommender.recommend(**query)
+        elapsed = time.perf_counter() - start
+        timings["miss" if recommender.response_cache.misses > misses else "hit"].append(elapsed)
+
+    stats = recommender.response_cache.stats()
+    recommender.invalidate_results()
+    start = time.perf_counter()
+    recommender.recommend('Europe', 3000, 7, 1)
+    after_invalidate_s = time.perf_counter() - start
+
+    report("response_cache", [{
+        "queries": QUERIES,
+        "hit_rate": round(stats['hits'] / (stats['hits'] + stats['misses']), 3),
+        "miss_ms_p50": round(float(np.median(timings['miss'])) * 1000, 2),
+        "hit_ms_p50": round(float(np.median(timings['hit'])) * 1000, 2),
+        "after_invalidate_ms": round(after_invalidate_s * 1000, 2),
+        "cache": stats
+    }])
+
+
+if __name__ == '__main__':
+    main()
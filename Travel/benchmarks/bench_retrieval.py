@@ -0,0 +1,35 @@
+# Similarity retrieval latency against dataset size, and the effect of top-K preselection on recommend().
+# Usage (from the Travel directory): python -m benchmarks.bench_retrieval
+import time
+from benchmarks.common import synthetic_destinations, make_recommender, timeit, report
+
+
+def main():
+    results = []
+    for n in (1000, 10000, 100000):
+        df = synthetic_destinations(n)
+        start = time.perf_counter()
+        recommender = make_recommender(df)
+        build_s = time.perf_counter() - start
+
+        similar_s, similar = timeit(lambda: recommender.similar_destinations('City0', 10))
+        vibe_s, vibe = timeit(lambda: recommender.search_vibe('beach and nightlife', 10))
+        # Invalidate first so the response cache doesn't hide the scoring work
+        full_s, _ = timeit(lambda: recommender.invalidate_results() or recommender.recommend('Europe', 5000, 7, 1), 3)
+        top_s, _ = timeit(lambda: recommender.invalidate_results() or recommender.recommend(
+            'Europe', 5000, 7, 1, vibe='beach nightlife', top_k=50), 3)
+        results.append({
+            "destinations": n,
+            "index_build_s": round(build_s, 3),
+            "feature_nnz": int(recommender.features.nnz),
+            "similar_ms": round(similar_s * 1000, 2),
+            "vibe_search_ms": round(vibe_s * 1000, 2),
+            "recommend_full_scan_ms": round(full_s * 1000, 1),
+            "recommend_top50_ms": round(top_s * 1000, 1),
+            "sample_vibe_match": vibe[0]['description'] if vibe else None
+        })
+    report("retrieval", results)
+
+
+if __name__ == '__main__':
+    main()
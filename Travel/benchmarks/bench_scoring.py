@@ -0,0 +1,54 @@
+# Compares the per-row scoring path with the batched HybridMLEngine API.
+# Usage (from the Travel directory): python -m benchmarks.bench_scoring
+import numpy as np
+from benchmarks.common import synthetic_destinations, timeit, report
+from utils.ml_models import HybridMLEngine
+
+ORIGIN = (51.5, -0.12)
+DAYS, PEOPLE, BUDGET = 7, 2, 3000
+PER_ROW_SAMPLE = 2000
+
+
+def score_per_row(engine, df, safety):
+    totals = []
+    for i, row in enumerate(df.itertuples(index=False)):
+        ml_daily = engine.predict_daily_cost(row.continent, row.population, safety[i])
+        final_daily_cost = (row.base_cost * 0.7) + (ml_daily * 0.3)
+        ml_flight_cost = engine.predict_flight_cost(ORIGIN[0], ORIGIN[1], row.lat, row.lng, row.continent)
+        totals.append((final_daily_cost * DAYS * PEOPLE) + (ml_flight_cost * PEOPLE))
+    totals = np.array(totals)
+    return totals, totals <= BUDGET
+
+
+def score_batch(engine, df, safety):
+    ml_daily = engine.predict_daily_costs(df, safety)
+    final_daily_cost = (df['base_cost'].to_numpy() * 0.7) + (ml_daily * 0.3)
+    ml_flight_cost = engine.predict_flight_costs(ORIGIN[0], ORIGIN[1], df)
+    totals = (final_daily_cost * DAYS * PEOPLE) + (ml_flight_cost * PEOPLE)
+    return totals, totals <= BUDGET
+
+
+def main():
+    engine = HybridMLEngine()
+    results = []
+    for n in (250, 50000):
+        df = synthetic_destinations(n)
+        safety = np.random.default_rng(1).uniform(0, 5, size=n)
+        # The per-row path takes minutes at 50k, so it is timed on a sample and extrapolated
+        sample = min(n, PER_ROW_SAMPLE)
+        row_time, (row_totals, row_mask) = timeit(lambda: score_per_row(engine, df.iloc[:sample], safety[:sample]), 1)
+        row_time *= n / sample
+        batch_time, (batch_totals, batch_mask) = timeit(lambda: score_batch(engine, df, safety))
+        results.append({
+            "destinations": n,
+            "per_row_s": round(row_time, 4),
+            "per_row_extrapolated": sample < n,
+            "batch_s": round(batch_time, 4),
+            "speedup": round(row_time / batch_time, 1),
+            "identical": bool(np.array_equal(row_totals, batch_totals[:sample]) and np.array_equal(row_mask, batch_mask[:sample]))
+        })
+    report("scoring", results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Spatial index (ball tree, haversine) vs a vectorized brute-force haversine scan:
+# build time, nearest-K and radius query latency at 1k/100k/1M destinations, plus
+# recommend() with a flight-time limit. Checks both methods return the same rows.
+# Usage (from the Travel directory): python -m benchmarks.bench_spatial
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.common import make_recommender, synthetic_destinations, timeit, report
+from utils.ml_models import HybridMLEngine
+from utils.spatial import SpatialIndex, flight_hours_to_km
+
+SIZES = (1000, 100000, 1000000)
+QUERIES = 500
+K = 10
+RADIUS_KM = 500
+ARGS = ("Europe", 5000, 5, 2, "EUR", "London")
+
+
+def points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"lat": rng.uniform(-60, 70, size=n).round(4), "lng": rng.uniform(-180, 180, size=n).round(4)})
+
+
+def per_query_us(fn, queries):
+    start = time.perf_counter()
+    for lat, lng in queries:
+        fn(lat, lng)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    engine = HybridMLEngine()
+    rng = np.random.default_rng(1)
+    queries = list(zip(rng.uniform(-60, 70, size=QUERIES), rng.uniform(-180, 180, size=QUERIES)))
+    results = []
+    for n in SIZES:
+        df = points(n)
+        lat, lng = df['lat'].to_numpy(), df['lng'].to_numpy()
+        build_s, index = timeit(lambda: SpatialIndex(df), 3)
+
+        def brute_nearest(q_lat, q_lng):
+            d = engine.haversine_distances(q_lat, q_lng, lat, lng)
+            best = np.argpartition(d, K)[:K]
+            return best[np.argsort(d[best], kind='stable')]
+
+        def brute_within(q_lat, q_lng):
+            return np.flatnonzero(engine.haversine_distances(q_lat, q_lng, lat, lng) <= RADIUS_KM)
+
+        # Same rows from both (nearest: same set, order can differ on exact distance ties)
+        same = all(
+            set(index.nearest(q_lat, q_lng, K)[0]) == set(brute_nearest(q_lat, q_lng))
+            and set(index.within(q_lat, q_lng, RADIUS_KM)[0]) == set(brute_within(q_lat, q_lng))
+            for q_lat, q_lng in queries[:50]
+        )
+        brute_queries = queries[:max(5, QUERIES * 1000 // n)]
+        results.append({
+            "destinations": n,
+            "build_ms": round(build_s * 1000, 1),
+            "nearest_us": round(per_query_us(lambda a, b: index.nearest(a, b, K), queries), 1),
+            "nearest_brute_us": round(per_query_us(brute_nearest, brute_queries), 1),
+            "within_us": round(per_query_us(lambda a, b: index.within(a, b, RADIUS_KM), queries), 1),
+            "within_brute_us": round(per_query_us(brute_within, brute_queries), 1),
+            "within_mean_results": round(float(np.mean([len(index.within(a, b, RADIUS_KM)[0]) for a, b in queries[:50]])), 1),
+            "same_results": same
+        })
+
+    # recommend() over 100k destinations, continent only vs within 2 hours of flight
+    recommender = make_recommender(synthetic_destinations(100000))
+    for name, kwargs in (("continent", {}), ("within_2h", {"max_flight_hours": 2})):
+        def cold():
+            recommender.invalidate_results()
+            return recommender.recommend(*ARGS, **kwargs)
+        best, response = timeit(cold, 3)
+        results.append({
+            "variant": f"recommend_{name}", "destinations": len(recommender.df),
+            "radius_km": flight_hours_to_km(2) if kwargs else None,
+            "checked": response['analysis'].get('total_checked', 0), "ms": round(best * 1000, 2)
+        })
+    report("spatial", results)
+
+
+if __name__ == '__main__':
+    main()
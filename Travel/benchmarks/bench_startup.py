@@ -0,0 +1,30 @@
+# TravelRecommender start-up time with and without the prebuilt feature store.
+# Usage (from the Travel directory): python -m benchmarks.bench_startup
+import os
+import shutil
+import tempfile
+from benchmarks.common import report, timeit
+from utils.feature_store import FeatureStore
+from utils.recommender import TravelRecommender
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        store = FeatureStore(os.path.join(tmp, 'destinations'))
+        cold_s, recommender = timeit(lambda: TravelRecommender(feature_store=store, rebuild_features=True), 1)
+        warm_s, _ = timeit(lambda: TravelRecommender(feature_store=store))
+        load_s, _ = timeit(store.load)
+        report("startup", [{
+            "destinations": len(recommender.df),
+            "without_artifact_s": round(cold_s, 4),
+            "with_artifact_s": round(warm_s, 4),
+            "artifact_load_only_s": round(load_s, 5),
+            "artifact": store.metadata()
+        }])
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
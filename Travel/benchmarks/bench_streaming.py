@@ -0,0 +1,114 @@
+# Time to first result: /api/recommend (waits for every weather lookup) vs
+# /api/recommend/stream (cost-ranked page first) against a weather stub where some
+# cities are slow. Also times a follow-up page and the bounded-heap ranking.
+# Usage (from the Travel directory): python -m benchmarks.bench_streaming
+import json
+import logging
+import os
+import random
+import time
+import requests
+from benchmarks.common import AppServer, make_recommender, synthetic_destinations, timeit, report
+from benchmarks.stubs import StubServer, weather_routes
+
+DESTINATIONS = 150
+SLOW_EVERY = 10 # One city in SLOW_EVERY answers in SLOW_LATENCY instead of 50-150ms
+SLOW_LATENCY = 1.5
+REPEAT = 3
+RANK_ROWS = 50000
+BODY = {"continent": "Europe", "budget": 100000, "days": 5, "people": 2, "origin_city": "Paris"}
+
+
+def slow_weather_routes():
+    # The same city is slow every round, so both variants wait on the same stragglers
+    routes = weather_routes()
+    fast = routes['/weather']
+
+    def weather(params, body, headers):
+        city = params.get('q', '')
+        slow = sum(map(ord, city)) % SLOW_EVERY == 0
+        time.sleep(SLOW_LATENCY if slow else random.uniform(0.05, 0.15))
+        return fast(params, body, headers)
+    return {'/weather': weather}
+
+
+def timed_stream(url, body):
+    # (seconds to first event, seconds to last event, events)
+    start = time.perf_counter()
+    first = None
+    events = []
+    with requests.post(url, json=body, stream=True) as response:
+        for line in response.iter_lines():
+            if line:
+                events.append(json.loads(line))
+                if first is None:
+                    first = time.perf_counter() - start
+    return first, time.perf_counter() - start, events
+
+
+def main():
+    random.seed(0)
+    with StubServer(slow_weather_routes()) as weather_stub:
+        os.environ.update({'OPENWEATHER_URL': weather_stub.url, 'OPENWEATHER_API_KEY': 'stub'})
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        import app as app_module
+        from utils.api_clients import WeatherClient
+        from utils.cache import TTLCache
+
+        weather_cache = TTLCache('bench-streaming-weather', ttl=1800)
+        recommender = make_recommender(synthetic_destinations(DESTINATIONS))
+        recommender.weather_client = WeatherClient(cache=weather_cache)
+        app_module.recommender = recommender
+
+        results = []
+        with AppServer(app_module.app) as server:
+            blocking, streamed = [], []
+            for _ in range(REPEAT):
+                # Cold weather each round; the scored set stays cached as it would in production
+                weather_cache.invalidate()
+                start = time.perf_counter()
+                requests.post(f"{server.url}/api/recommend", json=BODY).raise_for_status()
+                blocking.append(time.perf_counter() - start)
+
+                weather_cache.invalidate()
+                streamed.append(timed_stream(f"{server.url}/api/recommend/stream", BODY))
+
+            fits = recommender.scored_candidates('Europe', 5, 2, 'Paris')['n']
+            results.append({
+                "variant": "blocking", "candidates": fits,
+                "first_result_ms": round(min(blocking) * 1000, 1),
+                "complete_ms": round(min(blocking) * 1000, 1)
+            })
+            results.append({
+                "variant": "stream", "candidates": fits,
+                "first_result_ms": round(min(s[0] for s in streamed) * 1000, 1),
+                "complete_ms": round(min(s[1] for s in streamed) * 1000, 1),
+                "events": len(streamed[-1][2])
+            })
+
+            # Next page: scored set and weather are cached, nothing is rescored or refetched
+            calls = weather_stub.calls
+            best, page = timeit(lambda: requests.post(
+                f"{server.url}/api/recommend", json={**BODY, "cursor": 4}).json())
+            results.append({
+                "variant": "next_page", "ms": round(best * 1000, 2),
+                "returned": len(page['recommendations']), "next_cursor": page['analysis']['next_cursor'],
+                "weather_calls": weather_stub.calls - calls
+            })
+
+    # Ranking a large candidate list: bounded heap for one page vs ranking everything
+    rng = random.Random(1)
+    candidates = [{"total_cost_usd": rng.uniform(200, 5000), "safety_raw": rng.uniform(0, 5),
+                   "weather_temp": rng.uniform(-5, 35)} for _ in range(RANK_ROWS)]
+    full, ranked = timeit(lambda: recommender._rank_candidates(candidates, 5000))
+    heap, top = timeit(lambda: recommender._rank_candidates(candidates, 5000, 4))
+    results.append({
+        "variant": "rank", "rows": RANK_ROWS,
+        "full_sort_ms": round(full * 1000, 2), "heap_top4_ms": round(heap * 1000, 2),
+        "same_top4": [c['ml_score'] for c in ranked[:4]] == [c['ml_score'] for c in top]
+    })
+    report("streaming", results)
+
+
+if __name__ == '__main__':
+    main()
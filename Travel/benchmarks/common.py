@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+# Benchmarks are run from the Travel directory: python -m benchmarks.<name>
+TRAVEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if TRAVEL_DIR not in sys.path:
+    sys.path.insert(0, TRAVEL_DIR)
+
+CONTINENTS = ['Europe', 'Asia', 'Africa', 'Oceania', 'North America', 'South America']
+VIBES = ['beach', 'mountain', 'historic', 'nightlife', 'food', 'island', 'desert', 'lake', 'wine', 'ski',
+         'temple', 'jungle', 'museum', 'surf', 'festival', 'market', 'castle', 'safari', 'fjord', 'volcano']
+
+
+def synthetic_destinations(n, seed=0):
+    # Same columns as DestinationLoader.fetch_data output
+    rng = np.random.default_rng(seed)
+    continent = rng.choice(CONTINENTS, size=n)
+    population = rng.integers(100000, 300000000, size=n)
+    vibes = rng.choice(VIBES, size=(n, 2))
+    return pd.DataFrame({
+        "city": [f"City{i}" for i in range(n)],
+        "country": [f"Country{i}" for i in range(n)],
+        "country_code": [f"C{i}" for i in range(n)],
+        "continent": continent,
+        "subregion": continent,
+        "base_cost": rng.integers(40, 250, size=n),
+        "population": population,
+        "lat": rng.uniform(-60, 70, size=n).round(2),
+        "lng": rng.uniform(-180, 180, size=n).round(2),
+        "description": [
+            f"A beautiful destination in {c}. Known for its {v[0]} and {v[1]} scene and population of {p:,}."
+            for c, v, p in zip(continent, vibes, population)
+        ]
+    })
+
+
+class OfflineSafety:
+    def get_safety_score(self, code):
+        return (sum(map(ord, code)) % 50) / 10
+
+    def get_safety_scores(self, codes):
+        return {c: self.get_safety_score(c) for c in codes}
+
+    def lookup_safety_scores(self, codes):
+        return self.get_safety_scores(codes), 0
+
+
+class OfflineWeather:
+    def get_weather(self, city):
+        return {"temp": 10 + len(city) % 20, "description": "clear sky"}
+
+    def get_weather_many(self, cities):
+        return {c: self.get_weather(c) for c in cities}
+
+
+class OfflineCurrency:
+    def get_rates(self):
+        return {"EUR": 0.92, "GBP": 0.79, "JPY": 150.0}
+
+
+def make_recommender(df, engine=None):
+    # TravelRecommender over an in-memory frame, no network or artifacts involved
+    from utils.recommender import TravelRecommender
+    from utils.ml_models import HybridMLEngine
+    from utils.cache import TTLCache
+    from utils.destinations_data import DestinationLoader
+    from utils.cost_matrix import CostMatrix
+    from utils.spatial import SpatialIndex
+    from utils.budget_index import BudgetIndex
+    recommender = TravelRecommender.__new__(TravelRecommender)
+    recommender.safety_client = OfflineSafety()
+    recommender.weather_client = OfflineWeather()
+    recommender.currency_client = OfflineCurrency()
+    recommender.ml_engine = engine or HybridMLEngine()
+    recommender.response_cache = TTLCache(f'bench-recommend-{id(recommender)}', ttl=900)
+    recommender.data_version = 0
+    recommender.df = df.reset_index(drop=True)
+    recommender.loader = DestinationLoader()
+    recommender._train_models()
+    recommender.gazetteer = recommender._build_gazetteer()
+    recommender.city_rows = recommender._build_city_rows()
+    recommender.spatial = SpatialIndex(recommender.df)
+    recommender.budget_index = BudgetIndex(recommender.df, recommender.ml_engine)
+    # No matrix: benchmarks measure the per-request prediction path unless they build one
+    recommender.cost_matrix = CostMatrix()
+    return recommender
+
+
+def timeit(fn, repeat=5):
+    # Returns (best seconds, last result)
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(name, results):
+    print(json.dumps({"benchmark": name, "results": results}, indent=2))
+
+
+class AppServer:
+    # Serves a Flask app on a free local port in a background thread
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+def percentiles(samples):
+    ordered = np.sort(np.asarray(samples))
+    return {
+        "p50_ms": round(float(np.percentile(ordered, 50)) * 1000, 1),
+        "p99_ms": round(float(np.percentile(ordered, 99)) * 1000, 1),
+        "max_ms": round(float(ordered[-1]) * 1000, 1)
+    }
+
+
+def load(fn, concurrency, requests_per_worker):
+    # Calls fn() from `concurrency` threads; returns (latencies, errors, wall seconds)
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(requests_per_worker):
+            start = time.perf_counter()
+            try:
+                fn()
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - start
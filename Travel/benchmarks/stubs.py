@@ -0,0 +1,263 @@
+# Local stand-ins for the upstream APIs, with configurable latency and error rate.
+import json
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    # Room for a burst of new connections (the default backlog is 5)
+    request_queue_size = 128
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass # Clients that timed out close their connection before the answer is written
+
+
+class StubServer:
+    # routes maps a path to handler(params, body, headers) -> (status, payload)
+    def __init__(self, routes, latency=0.0, error_rate=0.0):
+        self.routes = routes
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.httpd = _Server(('127.0.0.1', 0), self._handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self, body):
+                with stub._lock:
+                    stub.calls += 1
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if stub.latency:
+                    time.sleep(stub.latency() if callable(stub.latency) else stub.latency)
+                route = stub.routes.get(parsed.path)
+                if route is None:
+                    status, payload = 404, {"error": "not found"}
+                elif stub.error_rate and random.random() < stub.error_rate:
+                    status, payload = 500, {"error": "injected failure"}
+                else:
+                    status, payload = route(params, body, self.headers)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve({})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length).decode() if length else ''
+                self._serve({k: v[0] for k, v in parse_qs(raw).items()})
+
+        return Handler
+
+
+def advisory_routes():
+    def advisory(params, body, headers):
+        code = params.get('countrycode')
+        codes = [code] if code else ['FR', 'JP', 'US', 'ZA']
+        data = {c: {"advisory": {"score": round((sum(map(ord, c)) % 50) / 10, 1)}} for c in codes}
+        return 200, {"data": data}
+    return {'/api': advisory}
+
+
+def weather_routes():
+    def weather(params, body, headers):
+        city = params.get('q', '')
+        return 200, {"main": {"temp": 10 + len(city) % 20}, "weather": [{"description": "clear sky"}]}
+    return {'/weather': weather}
+
+
+class FakeAmadeus:
+    # OAuth token endpoint plus the Amadeus endpoints we call; tokens really expire
+    def __init__(self, token_ttl=1799):
+        self.token_ttl = token_ttl
+        self.tokens = {}
+        self.token_requests = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def revoke_all(self):
+        with self._lock:
+            self.tokens.clear()
+
+    def _authorized(self, headers):
+        token = (headers.get('Authorization') or '').replace('Bearer ', '')
+        with self._lock:
+            expires = self.tokens.get(token)
+            if expires is None or time.monotonic() >= expires:
+                self.rejected += 1
+                return False
+        return True
+
+    def routes(self):
+        def token(params, body, headers):
+            with self._lock:
+                self.token_requests += 1
+                value = f"tok-{self.token_requests}"
+                self.tokens[value] = time.monotonic() + self.token_ttl
+            return 200, {"access_token": value, "expires_in": self.token_ttl, "token_type": "Bearer"}
+
+        def locations(params, body, headers):
+            if not self._authorized(headers):
+                return 401, {"errors": [{"title": "Access token expired"}]}
+            keyword = params.get('keyword', '')
+            return 200, {"data": [{"name": keyword.upper(), "iataCode": keyword[:3].upper(), "address": {"countryCode": "GB"}}]}
+
+        def offers(params, body, headers):
+            if not self._authorized(headers):
+                return 401, {"errors": [{"title": "Access token expired"}]}
+            # A direct and a one-stop flight whose fares move with the date, the direct one also
+            # sold under a second, dearer fare
+            date = params.get('departureDate', '2026-06-01')
+            origin, destination = params.get('originLocationCode', 'LON'), params.get('destinationLocationCode', 'PAR')
+            base = 120 + sum(map(ord, date + destination)) % 80
+            direct = [{"carrierCode": "BA", "number": "304", "departure": {"iataCode": origin, "at": f"{date}T08:15:00"},
+                       "arrival": {"iataCode": destination, "at": f"{date}T10:30:00"}}]
+            one_stop = [
+                {"carrierCode": "AF", "number": "1081", "departure": {"iataCode": origin, "at": f"{date}T06:00:00"},
+                 "arrival": {"iataCode": "AMS", "at": f"{date}T08:00:00"}},
+                {"carrierCode": "AF", "number": "1240", "departure": {"iataCode": "AMS", "at": f"{date}T09:10:00"},
+                 "arrival": {"iataCode": destination, "at": f"{date}T11:05:00"}}
+            ]
+            offers = [("1", base + 40, "BA", "PT2H15M", direct), ("2", base, "AF", "PT5H5M", one_stop),
+                      ("3", base + 95, "BA", "PT2H15M", direct)]
+            return 200, {"data": [
+                {"id": offer_id, "price": {"total": f"{price:.2f}", "currency": "EUR"}, "validatingAirlineCodes": [carrier],
+                 "itineraries": [{"duration": duration, "segments": segments}]}
+                for offer_id, price, carrier, duration, segments in offers
+            ]}
+
+        return {
+            '/v1/security/oauth2/token': token,
+            '/v1/reference-data/locations': locations,
+            '/v2/shopping/flight-offers': offers
+        }
+
+
+def booking_routes():
+    def locations(params, body, headers):
+        return 200, [{"dest_id": f"-{abs(hash(params.get('name', ''))) % 100000}", "dest_type": "city"}]
+
+    def search(params, body, headers):
+        return 200, {"result": [
+            {"hotel_name": f"Stub Hotel {i}", "min_total_price": 100 + 25 * i, "review_score": 8.0} for i in range(5)
+        ]}
+
+    return {'/hotels/locations': locations, '/hotels/search': search}
+
+
+def synthetic_countries(n, seed=0):
+    # restcountries /all payload (fields name,cca2,region,subregion,population,capital,latlng).
+    # Mixes countries the Numbeo sample matches by name, by capital and not at all, plus
+    # records DestinationLoader skips or patches: tiny populations, no capital, no latlng.
+    rng = random.Random(seed)
+    known = [("France", "Paris"), ("Japan", "Tokyo"), ("United Kingdom", "London"), ("Thailand", "Bangkok")]
+    regions = [
+        ("Europe", "Western Europe"), ("Asia", "Eastern Asia"), ("Africa", "Northern Africa"),
+        ("Oceania", "Polynesia"), ("Americas", "North America"), ("Americas", "Caribbean"),
+        ("Americas", "Central America"), ("Americas", "South America"), ("Antarctic", "")
+    ]
+    countries = []
+    for i in range(n):
+        region, subregion = rng.choice(regions)
+        name, capital = f"Country{i}", f"Capital{i}"
+        if i % 10 == 0:
+            name, capital = known[(i // 10) % len(known)]
+        elif i % 10 == 1:
+            capital = known[(i // 10) % len(known)][1]
+        country = {
+            "name": {"common": name, "official": f"Republic of {name}"},
+            "cca2": f"{chr(65 + i % 26)}{chr(65 + (i // 26) % 26)}",
+            "region": region,
+            "subregion": subregion,
+            "population": rng.choice([rng.randint(1000, 99999), rng.randint(100000, 300000000)]),
+            "capital": [capital] if i % 17 else [],
+            "latlng": [round(rng.uniform(-60, 70), 2), round(rng.uniform(-180, 180), 2)] if i % 23 else []
+        }
+        if i % 29 == 0:
+            del country['subregion']
+        countries.append(country)
+    return countries
+
+
+def restcountries_routes(n=250, seed=0):
+    payload = synthetic_countries(n, seed)
+
+    def countries(params, body, headers):
+        return 200, payload
+    return {'/all': countries}
+
+
+def rates_routes():
+    def latest(params, body, headers):
+        return 200, {"base": "USD", "rates": {"EUR": 0.92, "GBP": 0.79, "JPY": 150.0, "INR": 83.1}}
+    return {'/latest': latest}
+
+
+@contextmanager
+def upstream_stubs(latency=0.0, error_rate=0.0, countries=250):
+    # Every upstream the app calls, served locally. Points the clients at the stubs through
+    # the environment (clients read it when constructed) and restores it afterwards.
+    # Yields {service: StubServer}.
+    amadeus = FakeAmadeus()
+    services = {
+        "amadeus": amadeus.routes(),
+        "booking": booking_routes(),
+        "weather": weather_routes(),
+        "advisory": advisory_routes(),
+        "rates": rates_routes(),
+        "restcountries": restcountries_routes(countries)
+    }
+    with ExitStack() as stack:
+        stubs = {name: stack.enter_context(StubServer(routes, latency, error_rate)) for name, routes in services.items()}
+        stubs["amadeus"].fake = amadeus
+        env = {
+            'AMADEUS_URL': stubs["amadeus"].url, 'AMADEUS_API_KEY': 'stub', 'AMADEUS_API_SECRET': 'stub',
+            'BOOKING_URL': stubs["booking"].url, 'RAPIDAPI_KEY': 'stub',
+            'OPENWEATHER_URL': stubs["weather"].url, 'OPENWEATHER_API_KEY': 'stub',
+            'TRAVEL_ADVISORY_URL': f"{stubs['advisory'].url}/api",
+            'EXCHANGE_RATE_URL': f"{stubs['rates'].url}/latest",
+            'RESTCOUNTRIES_URL': stubs["restcountries"].url
+        }
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        try:
+            yield stubs
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
@@ -0,0 +1,68 @@
+import itertools
+import os
+import random
+import sys
+import pytest
+
+# Tests import the app modules the way app.py does, from the Travel directory
+TRAVEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if TRAVEL_DIR not in sys.path:
+    sys.path.insert(0, TRAVEL_DIR)
+# No background refreshes or network calls from anything the tests import
+os.environ.setdefault('REFRESH', '0')
+
+from benchmarks.common import CONTINENTS, VIBES, OfflineCurrency, OfflineSafety, OfflineWeather
+from utils.cache import TTLCache
+from utils.cost_matrix import CostMatrix
+from utils.feature_store import FeatureStore
+from utils.ml_models import HybridMLEngine
+from utils.model_registry import ModelRegistry
+from utils.recommender import TravelRecommender
+
+ORIGINS = ["London", "Paris", "New York", "Tokyo", "Sydney"]
+
+
+def random_queries(n, seed=0):
+    # recommend() keyword arguments over every continent, budget range and filter
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        query = {
+            "continent": rng.choice(CONTINENTS), "budget": rng.choice([50, 200, 400, 700, 1000, 2000, 5000, 20000]),
+            "days": rng.randint(1, 14), "people": rng.randint(1, 4), "currency": rng.choice(["USD", "EUR", "JPY"]),
+            "origin_city": rng.choice(ORIGINS)
+        }
+        if rng.random() < 0.2:
+            query["vibe"] = rng.choice(VIBES)
+        if rng.random() < 0.2:
+            query["max_flight_hours"] = rng.choice([3, 6, 10])
+        queries.append(query)
+    return queries
+
+
+@pytest.fixture(scope='session')
+def ml_engine(tmp_path_factory):
+    # Trained once per session; tests that retrain pass their own. The NumPy evaluators keep
+    # each recommender's cost matrix (every gazetteer origin) quick to build.
+    return HybridMLEngine(registry=ModelRegistry(str(tmp_path_factory.mktemp('engine') / 'models')), fast_inference=True)
+
+
+@pytest.fixture
+def make_recommender(tmp_path, ml_engine):
+    # TravelRecommender(frame=df) with every artifact under tmp_path and offline clients
+    counter = itertools.count()
+
+    def make(df, engine=None):
+        root = tmp_path / f"recommender-{next(counter)}"
+        recommender = TravelRecommender(
+            feature_store=FeatureStore(str(root / 'destinations')),
+            response_cache=TTLCache(f'test-recommend-{root}', ttl=900),
+            cost_matrix=CostMatrix(str(root / 'cost_matrix')),
+            frame=df.reset_index(drop=True),
+            ml_engine=engine or ml_engine
+        )
+        recommender.safety_client = OfflineSafety()
+        recommender.weather_client = OfflineWeather()
+        recommender.currency_client = OfflineCurrency()
+        return recommender
+    return make
@@ -0,0 +1,87 @@
+import threading
+import time
+from contextlib import ExitStack
+import pytest
+from benchmarks.stubs import StubServer, FakeAmadeus
+from utils import circuit
+from utils.api_clients import AmadeusClient
+
+THREADS = 16
+
+
+@pytest.fixture
+def amadeus(monkeypatch):
+    monkeypatch.setenv('AMADEUS_API_KEY', 'stub')
+    monkeypatch.setenv('AMADEUS_API_SECRET', 'stub')
+    # Only the token logic under test: no adaptive timeouts on a busy single-core box
+    monkeypatch.setattr(circuit, 'ENABLED', False)
+
+    with ExitStack() as stack:
+        def start(token_ttl=1799, refresh_margin=60):
+            fake = FakeAmadeus(token_ttl=token_ttl)
+            stub = stack.enter_context(StubServer(fake.routes()))
+            return fake, AmadeusClient(base_url=stub.url, refresh_margin=refresh_margin)
+
+        yield start
+
+
+def together(fn, threads=THREADS):
+    # Runs fn() on every thread at once, returns the results
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def run(i):
+        barrier.wait()
+        results[i] = fn()
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def test_one_token_fetch_under_concurrency(amadeus):
+    fake, client = amadeus()
+    tokens = together(lambda: client.token)
+    assert fake.token_requests == 1
+    assert set(tokens) == {"tok-1"}
+    assert together(lambda: client.get_iata_code('paris')) == ["PAR"] * THREADS
+    assert fake.token_requests == 1
+
+
+def test_one_token_fetch_per_ttl(amadeus):
+    fake, client = amadeus(token_ttl=1.0, refresh_margin=0.3)
+    stop = time.monotonic() + 2.5
+
+    def calls():
+        codes = []
+        while time.monotonic() < stop:
+            codes.append(client.get_iata_code('paris'))
+        return codes
+
+    results = together(calls)
+    assert all(code == "PAR" for codes in results for code in codes)
+    assert fake.rejected == 0
+    # Renewed 0.3s before each expiry: one fetch per 0.7s of the run, never one per thread
+    assert 2 <= fake.token_requests <= 5
+
+
+def test_refresh_on_expiry(amadeus):
+    fake, client = amadeus(token_ttl=0.5, refresh_margin=0.1)
+    assert client.token == "tok-1"
+    time.sleep(0.5)
+    assert client.token == "tok-2"
+    assert fake.token_requests == 2
+
+
+def test_refresh_on_401(amadeus):
+    fake, client = amadeus()
+    assert client.get_iata_code('paris') == "PAR"
+    fake.revoke_all()
+    # Every thread gets a 401 for the revoked token; one refresh serves all the retries
+    assert together(lambda: client.get_iata_code('paris')) == ["PAR"] * THREADS
+    assert fake.rejected >= 1
+    assert fake.token_requests == 2
+    assert client.token == "tok-2"
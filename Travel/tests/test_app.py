@@ -0,0 +1,47 @@
+import os
+import pytest
+from tests.conftest import TRAVEL_DIR
+
+
+@pytest.fixture(scope='module')
+def client():
+    # app builds its recommender at import, from the artifacts under the Travel directory
+    cwd = os.getcwd()
+    os.chdir(TRAVEL_DIR)
+    try:
+        import app
+        yield app.app.test_client()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.mark.parametrize('body', [
+    {"people": 0}, {"people": -2}, {"days": 0}, {"stops": 1}, {"stops": 7}, {"people": "two"}, {"days": None},
+    {"round_trip": "false"}, {"round_trip": 0}, {"round_trip": None}
+])
+def test_itinerary_rejects_bad_arguments(client, body):
+    response = client.post('/api/itinerary', json={"continent": "Europe", "budget": 3000, **body})
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+def test_itinerary(client):
+    response = client.post('/api/itinerary', json={"continent": "Europe", "budget": 3000, "days": 6, "people": 2, "stops": 3})
+    assert response.status_code == 200
+    assert 'analysis' in response.json
+
+
+@pytest.mark.parametrize('days', [0, 31, "week"])
+def test_extra_details_rejects_bad_days(client, days):
+    response = client.post('/api/extra-details', json={"city": "Paris", "country_code": "FR", "days": days})
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+@pytest.mark.parametrize('path', ['/api/similar?city=Paris', '/api/nearby?city=Paris'])
+@pytest.mark.parametrize('k, same_as', [("abc", None), ("0", "1"), ("-3", "1"), ("500", "50")])
+def test_neighbour_count_is_clamped(client, path, k, same_as):
+    response = client.get(f"{path}&k={k}")
+    assert response.status_code == 200
+    if same_as is not None:
+        assert response.json == client.get(f"{path}&k={same_as}").json
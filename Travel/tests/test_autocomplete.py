@@ -0,0 +1,42 @@
+from utils.autocomplete import PrefixIndex
+
+
+def place(city, country_code='XX', iata=None):
+    return {"city": city, "country_code": country_code, "iata": iata}
+
+
+def index(*cities):
+    return PrefixIndex([(city, place(city)) for city in cities])
+
+
+def names(results):
+    return [r['name'] for r in results]
+
+
+def test_ranks_every_prefix_match():
+    # The short names sort after 200 long ones, which used to crowd them out
+    cities = [f"Saaa Long Name {i:03d}" for i in range(200)] + ["Sydney", "Sz", "Salo"]
+    assert names(index(*cities).search('s', 3)) == ["Sz", "Salo", "Sydney"]
+
+
+def test_exact_name_first_then_shorter():
+    assert names(index("Paris", "Paris Las Vegas", "Parisot", "Par").search('paris')) == ["Paris", "Parisot", "Paris Las Vegas"]
+
+
+def test_aliases_return_a_place_once():
+    london = place("London", "GB", "LON")
+    results = PrefixIndex([("London", london), ("Londres", london), ("Londonderry", place("Londonderry", "GB"))]).search('lond')
+    assert names(results) == ["London", "Londonderry"]
+
+
+def test_typos():
+    cities = ["London", "Lisbon", "Paris"]
+    assert names(index(*cities).search('Lodnon')) == ["London"]
+    assert names(index(*cities).search('Parsi')) == ["Paris"]
+
+
+def test_edit_alphabet_is_normalized_latin():
+    idx = index("Tokyo", "東京", "Москва", "São Paulo")
+    assert idx.alphabet == sorted(set("tokyosao paulo"))
+    assert names(idx.search('Tokoy')) == ["Tokyo"]
+    assert names(idx.search('東京')) == ["東京"]
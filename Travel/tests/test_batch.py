@@ -0,0 +1,79 @@
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from benchmarks.common import synthetic_destinations
+from benchmarks.stubs import StubServer, weather_routes
+from tests.conftest import random_queries
+from utils import circuit
+from utils.api_clients import WeatherClient
+from utils.cache import TTLCache
+from utils.concurrency import fan_out, iter_fan_out
+from utils.recommender import BATCH_PROCESS_MIN
+
+
+@pytest.fixture
+def recommender(monkeypatch, make_recommender):
+    # Adaptive timeouts would turn slow answers from a busy single-core box into fallbacks
+    monkeypatch.setattr(circuit, 'ENABLED', False)
+    with StubServer(weather_routes(), latency=0.005) as stub:
+        recommender = make_recommender(synthetic_destinations(2000))
+        # Weather through the shared fan-out pool, with a deadline so a stuck pool shows up as fallbacks
+        recommender.weather_client = WeatherClient(base_url=stub.url, deadline=5, cache=TTLCache('test-batch-weather', ttl=900))
+        recommender.weather_client.api_key = 'stub'
+        yield recommender
+
+
+def _double_all(keys):
+    return fan_out(lambda key: key * 2, keys, None, deadline=2)
+
+
+def test_fan_out_in_forked_child():
+    # Leaves idle threads in the parent's pool, which a forked child doesn't get
+    assert _double_all([1, 2]) == {1: 2, 2: 4}
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('fork')) as pool:
+        assert pool.submit(_double_all, [3]).result(timeout=30) == {3: 6}
+
+
+def test_iter_fan_out_deadline():
+    # Keys still running at the deadline come last with the default instead of raising
+    def slow(key):
+        time.sleep(key)
+        return key
+    assert list(iter_fan_out(slow, [1, 0], None, deadline=0.3)) == [(0, 0), (1, None)]
+
+
+def test_process_pool_after_warm_up(recommender):
+    # A recommend() first leaves idle fan-out threads behind; forked workers must not rely on them
+    recommender.recommend('Europe', 2000, 7, 2, origin_city='Paris')
+    queries = random_queries(BATCH_PROCESS_MIN + 40, seed=1)
+    pooled = recommender.recommend_many(queries, processes=2)
+
+    recommender.invalidate_results()
+    single = [recommender.recommend(**query) for query in queries]
+    assert json.dumps(pooled) == json.dumps(single)
+    weather = [r['weather'] for response in pooled for r in response['recommendations']]
+    assert weather and "Unknown" not in weather
+
+
+def test_concurrent_process_pools(make_recommender):
+    # Two batches at once, each on its own recommender: every worker must use its own pool's
+    recommenders = [make_recommender(synthetic_destinations(1500, seed=seed)) for seed in (1, 2)]
+    queries = random_queries(BATCH_PROCESS_MIN, seed=3)
+    expected = [json.dumps(r.recommend_many(queries)) for r in recommenders]
+    for r in recommenders:
+        r.invalidate_results()
+
+    pooled = [None, None]
+
+    def run(i):
+        pooled[i] = json.dumps(recommenders[i].recommend_many(queries, processes=2))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pooled == expected
@@ -0,0 +1,84 @@
+import json
+import numpy as np
+import pytest
+from benchmarks.common import CONTINENTS, synthetic_destinations
+from tests.conftest import ORIGINS, random_queries
+from utils import recommender as recommender_module
+from utils.budget_index import BudgetIndex
+from utils.cost_matrix import CostMatrix
+from utils.ml_models import HybridMLEngine
+from utils.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def recommender(tmp_path, monkeypatch, make_recommender):
+    # Its own engine (retrained below) with the scikit-learn forests, too slow for a matrix over
+    # every gazetteer origin at construction
+    engine = HybridMLEngine(registry=ModelRegistry(str(tmp_path / 'models')), fast_inference=False)
+    with monkeypatch.context() as m:
+        m.setattr(recommender_module, 'MAX_MATRIX_CELLS', 0)
+        recommender = make_recommender(synthetic_destinations(3000), engine)
+    # Flights from the cost matrix, as in the app, over just the origins queried here
+    origins = sorted({recommender._resolve_origin_coords(origin) for origin in ORIGINS})
+    recommender._known_origins = lambda: origins
+    recommender.cost_matrix = CostMatrix(str(tmp_path / 'cost_matrix'))
+    recommender._prepare_cost_matrix()
+    assert recommender.cost_matrix.meta is not None
+    return recommender
+
+
+def assert_bounds_hold(recommender):
+    # Every bound at or under the real trip cost, for every destination from every origin
+    for origin in ORIGINS:
+        lat, lng = recommender._resolve_origin_coords(origin)
+        base = recommender._score_base(None, origin, None, 50)
+        for days, people in ((1, 1), (7, 2), (14, 4)):
+            scored = recommender._scored_sets(base, [days], [people])[0]
+            bounds = recommender.budget_index.bounds(scored['rows'], lat, lng, days, people)
+            assert len(bounds) == len(recommender.df)
+            assert np.all(bounds <= scored['total'])
+
+
+def assert_pruning_is_exact(recommender, queries):
+    index = recommender.budget_index
+    answers = {}
+    for pruning in (True, False):
+        recommender.budget_index = index if pruning else None
+        recommender.invalidate_results()
+        answers[pruning] = json.dumps([recommender.recommend(**query) for query in queries])
+    recommender.budget_index = index
+    assert answers[True] == answers[False]
+
+
+def test_bounds_and_pruned_results(recommender):
+    assert_bounds_hold(recommender)
+    queries = random_queries(120)
+    assert_pruning_is_exact(recommender, queries)
+    # Tight budgets too, where most destinations are pruned and some queries match nothing
+    assert_pruning_is_exact(recommender, [{**query, "budget": query["budget"] // 10} for query in queries])
+
+
+def test_retrained_model_under_existing_matrix(recommender):
+    fingerprint = recommender.cost_matrix.meta['fingerprint']
+    # Same seed and MODEL_VERSION, different fitted forest: the matrix must not be reused
+    engine = recommender.ml_engine
+    engine.rf_flight_model.set_params(n_estimators=5, max_depth=4)
+    engine._train_models()
+    recommender.budget_index = BudgetIndex(recommender.df, engine)
+    recommender._prepare_cost_matrix()
+    assert recommender.cost_matrix.meta['fingerprint'] != fingerprint
+
+    lat, lng = recommender._resolve_origin_coords(ORIGINS[0])
+    _, flights = recommender.cost_matrix.row(lat, lng)
+    assert np.array_equal(np.asarray(flights).astype(int), engine.predict_flight_costs(lat, lng, recommender.df))
+    assert_bounds_hold(recommender)
+    assert_pruning_is_exact(recommender, random_queries(60, seed=2))
+
+
+def test_lowest_bound_per_continent(recommender):
+    index = recommender.budget_index
+    lat, lng = recommender._resolve_origin_coords(ORIGINS[1])
+    for continent in CONTINENTS:
+        rows = index.groups[continent][0]
+        expected = float(index.bounds(rows, lat, lng, 7, 2).min())
+        assert index.lowest(continent, lat, lng, 7, 2) == expected
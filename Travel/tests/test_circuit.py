@@ -0,0 +1,141 @@
+import itertools
+import time
+import pytest
+from benchmarks.stubs import StubServer, weather_routes
+from utils import circuit
+from utils.api_clients import WeatherClient
+from utils.cache import TTLCache
+from utils.circuit import CircuitBreaker, CircuitOpenError, CLOSED, HALF_OPEN, OPEN
+
+_cities = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    circuit.BREAKERS.clear()
+    yield
+    circuit.BREAKERS.clear()
+
+
+@pytest.fixture
+def weather_stub():
+    with StubServer(weather_routes(), latency=0.01) as stub:
+        client = WeatherClient(base_url=stub.url, timeout=5, cache=TTLCache(f'test-weather-{id(stub)}', ttl=900))
+        client.api_key = 'stub'
+        yield stub, client
+
+
+def get_weather(client):
+    # A new city each time, so nothing comes from the cache
+    return client.get_weather(f"City{next(_cities)}")
+
+
+def test_opens_half_opens_and_closes():
+    breaker = CircuitBreaker('test', window=4, min_calls=4, open_seconds=0.05)
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record(0.01, True)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call() # One trial at a time
+    breaker.record(0.01, False)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker('test', window=4, min_calls=4, open_seconds=0.05)
+    for _ in range(4):
+        breaker.record(0.01, True)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(0.01, True)
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+
+def test_timeout_adapts_down_and_up():
+    breaker = CircuitBreaker('test', min_timeout=0.25, timeout_multiplier=3)
+    assert breaker.timeout(5) == 5
+    for _ in range(40):
+        breaker.record(0.01, False)
+    assert breaker.timeout(5) == 0.25
+
+    # Timed-out calls count with the time they were given, so the timeout climbs back
+    breaker.record(0.25, True, timed_out=True)
+    assert breaker.timeout(5) == pytest.approx(0.75)
+    breaker.record(0.75, True, timed_out=True)
+    assert breaker.timeout(5) == pytest.approx(2.25)
+    breaker.record(2.25, True, timed_out=True)
+    assert breaker.timeout(5) == 5
+
+
+def test_half_open_trial_gets_the_full_timeout():
+    breaker = CircuitBreaker('test', window=4, min_calls=4, open_seconds=0.05)
+    for _ in range(40):
+        breaker.record(0.01, False)
+    for _ in range(4):
+        breaker.record(0.01, True)
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.timeout(5) == 5
+
+
+def test_fallback_while_open(weather_stub):
+    stub, client = weather_stub
+    stub.error_rate = 1.0
+    for _ in range(10):
+        assert get_weather(client)['temp'] == "N/A"
+    assert circuit.breaker('weather').state == OPEN
+
+    stub.error_rate = 0.0
+    calls = stub.calls
+    assert get_weather(client)['temp'] == "N/A"
+    assert stub.calls == calls # Served from the fallback, the upstream never saw it
+    assert circuit.breaker('weather').rejected == 1
+
+
+def test_recovers_when_upstream_slows_down(weather_stub):
+    # A healthy period shrinks the timeout to 0.25s; the upstream then answers in 0.4s, well
+    # inside the client's 5s. Calls must come back, not time out forever.
+    stub, client = weather_stub
+    for _ in range(40):
+        assert get_weather(client)['temp'] != "N/A"
+    assert circuit.breaker('weather').timeout(5) == 0.25
+
+    stub.latency = 0.4
+    results = [get_weather(client)['temp'] for _ in range(12)]
+    assert results.count("N/A") <= 2
+    assert "N/A" not in results[-5:]
+    assert circuit.breaker('weather').state == CLOSED
+
+
+def test_open_circuit_recovers_after_upstream_slows_down(weather_stub):
+    stub, client = weather_stub
+    weather = circuit.breaker('weather')
+    weather.open_seconds = 0.2
+    for _ in range(40):
+        get_weather(client)
+    stub.error_rate = 1.0
+    for _ in range(10):
+        get_weather(client)
+    assert weather.state == OPEN
+
+    # Back, but slower than the adapted timeout: the trial call gets the full timeout
+    stub.error_rate, stub.latency = 0.0, 0.4
+    time.sleep(0.25)
+    assert get_weather(client)['temp'] != "N/A"
+    assert weather.state == CLOSED
+    assert get_weather(client)['temp'] != "N/A"
+
+
+def test_endpoints_have_their_own_breakers():
+    from utils.metrics import upstream_call
+    assert upstream_call('amadeus', 'token').breaker is not upstream_call('amadeus', 'flight-offers').breaker
+    assert circuit.breaker('amadeus/flight-offers').slow_seconds > circuit.breaker('amadeus/token').slow_seconds
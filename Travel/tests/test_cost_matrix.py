@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from benchmarks.common import synthetic_destinations
+from utils.cost_matrix import CostMatrix
+from utils.ml_models import HybridMLEngine
+from utils.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return HybridMLEngine(registry=ModelRegistry(str(tmp_path / 'models')))
+
+
+def test_fingerprint_follows_the_fitted_models(engine, tmp_path):
+    df = synthetic_destinations(50)
+    origins = df[['lat', 'lng']].to_numpy()[:5]
+    matrix = CostMatrix(str(tmp_path / 'cost_matrix'))
+    before = CostMatrix.fingerprint(origins, df, engine)
+    matrix.build(origins, df, engine, before)
+    assert matrix.is_current(CostMatrix.fingerprint(origins, df, engine))
+
+    # Same seed and MODEL_VERSION, different fitted forest
+    engine.rf_flight_model.set_params(n_estimators=10)
+    engine.rf_flight_model.fit(np.column_stack([np.arange(100), np.zeros(100), np.ones(100)]), np.arange(100.0))
+    assert not matrix.is_current(CostMatrix.fingerprint(origins, df, engine))
+
+
+def test_loaded_matrix_is_read_only(engine, tmp_path):
+    df = synthetic_destinations(50)
+    origins = df[['lat', 'lng']].to_numpy()[:5]
+    matrix = CostMatrix(str(tmp_path / 'cost_matrix'))
+    matrix.build(origins, df, engine, CostMatrix.fingerprint(origins, df, engine))
+    _, flights = matrix.row(*origins[0])
+    assert len(flights) == len(df)
+    with pytest.raises(ValueError):
+        flights[0] = 0
+
+
+def test_add_destinations_matches_a_full_build(engine, tmp_path):
+    df = synthetic_destinations(80)
+    old_df, origins = df.iloc[:60], df[['lat', 'lng']].to_numpy()[:6]
+    matrix = CostMatrix(str(tmp_path / 'cost_matrix'))
+    matrix.build(origins[:4], old_df, engine, CostMatrix.fingerprint(origins[:4], old_df, engine))
+    old_row = matrix.row(*origins[0])[1]
+    old_values = np.array(old_row)
+
+    computed = []
+    fill = matrix._fill
+    matrix._fill = lambda distance, flight, o_lat, o_lng, d_lat, *rest, **kw: (
+        computed.append(len(o_lat) * len(d_lat)), fill(distance, flight, o_lat, o_lng, d_lat, *rest, **kw)
+    )
+    assert matrix.appendable(origins, df, engine)
+    fingerprint = CostMatrix.fingerprint(origins, df, engine)
+    matrix.add_destinations(origins, df, engine, fingerprint)
+    # 4 old origins x 20 new destinations, 2 new origins x all 80
+    assert sum(computed) == 4 * 20 + 2 * 80
+    assert matrix.is_current(fingerprint)
+
+    full = CostMatrix(str(tmp_path / 'full'))
+    full.build(origins, df, engine, fingerprint)
+    for lat, lng in origins:
+        np.testing.assert_array_equal(matrix.row(lat, lng)[0], full.row(lat, lng)[0])
+        np.testing.assert_array_equal(matrix.row(lat, lng)[1], full.row(lat, lng)[1])
+    # A worker still mapping the old copy keeps reading it
+    np.testing.assert_array_equal(old_row, old_values)
+
+
+def test_changed_destinations_are_not_appendable(engine, tmp_path):
+    df = synthetic_destinations(60)
+    origins = df[['lat', 'lng']].to_numpy()[:4]
+    matrix = CostMatrix(str(tmp_path / 'cost_matrix'))
+    matrix.build(origins, df.iloc[:50], engine, CostMatrix.fingerprint(origins, df.iloc[:50], engine))
+    moved = df.copy()
+    moved.loc[moved.index[0], 'lat'] += 1
+    assert not matrix.appendable(origins, moved, engine)
+    assert not matrix.appendable(origins[:2], df, engine)
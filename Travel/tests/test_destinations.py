@@ -0,0 +1,28 @@
+import pandas as pd
+from benchmarks.stubs import synthetic_countries
+from utils.destinations_data import DestinationLoader
+
+
+def test_country_populations_never_wrap():
+    countries = synthetic_countries(3)
+    for country, population in zip(countries, (3_000_000_000, 1_400_000_000, 500_000)):
+        country.update(population=population, capital=[country['name']['common']], latlng=[10, 20])
+    df = DestinationLoader().build_frame(countries, pd.DataFrame())
+    assert df['population'].tolist() == [3_000_000_000, 1_400_000_000, 500_000]
+
+    df = DestinationLoader().build_frame(countries[1:], pd.DataFrame())
+    assert df['population'].dtype == 'int32'
+
+
+def test_city_populations_never_wrap():
+    loader = DestinationLoader()
+    countries = synthetic_countries(3)
+    for country in countries:
+        country.update(population=500_000, capital=[country['name']['common']], latlng=[10, 20])
+    frame = loader.build_frame(countries, pd.DataFrame())
+    cities = pd.DataFrame({
+        "city": ["Big", "Small"], "country_code": frame['country_code'][:2].tolist(),
+        "lat": [1.0, 2.0], "lng": [3.0, 4.0], "population": [3_000_000_000, 250_000]
+    })
+    assert loader.build_city_frame(cities, frame, pd.DataFrame())['population'].tolist() == [3_000_000_000, 250_000]
+    assert loader.build_city_frame(cities[1:], frame, pd.DataFrame())['population'].dtype == 'int32'
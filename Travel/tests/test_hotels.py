@@ -0,0 +1,17 @@
+from datetime import date as Date
+from benchmarks.stubs import StubServer, booking_routes
+from utils.api_clients import BookingClient
+from utils.cache import TTLCache
+
+
+def test_stay_follows_departure_and_trip_length(monkeypatch):
+    monkeypatch.setenv('RAPIDAPI_KEY', 'stub')
+    routes = booking_routes()
+    searches = []
+    search = routes['/hotels/search']
+    routes['/hotels/search'] = lambda params, body, headers: (searches.append(params), search(params, body, headers))[1]
+    with StubServer(routes) as stub:
+        booking = BookingClient(base_url=stub.url, cache=TTLCache('test-hotel-locations', ttl=900))
+        assert len(booking.get_hotels('Lisbon', Date(2027, 2, 25), 5)) == 3
+    assert searches[0]['checkin_date'] == '2027-02-25'
+    assert searches[0]['checkout_date'] == '2027-03-02'
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import threading
+import time
+from benchmarks.common import synthetic_destinations
+from utils.cost_matrix import CostMatrix
+from utils.feature_store import artifact_lock
+from utils.ml_models import HybridMLEngine
+from utils.model_registry import ModelRegistry
+from utils.refresh import RefreshScheduler
+
+
+def _bump(path, times):
+    # Read-modify-write that loses updates unless the lock serializes it
+    for _ in range(times):
+        with artifact_lock(path):
+            with open(path, 'a+') as f:
+                f.seek(0)
+                count = int(f.read() or 0)
+            time.sleep(0.005)
+            with open(path, 'w') as f:
+                f.write(str(count + 1))
+
+
+def test_artifact_lock_serializes_processes(tmp_path):
+    path = str(tmp_path / 'counter')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_bump, args=(path, 10)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    with open(path) as f:
+        assert int(f.read()) == 40
+
+
+class CountingRegistry(ModelRegistry):
+    def save(self, engine, train_seconds):
+        super().save(engine, train_seconds)
+        with open(f"{self.path}.saves", 'a') as f:
+            f.write(f"{os.getpid()}\n")
+
+
+def _start_engine(path):
+    HybridMLEngine(registry=CountingRegistry(path))
+
+
+def test_workers_starting_together_train_once(tmp_path):
+    # The first worker trains and publishes, the others wait and load its models
+    path = str(tmp_path / 'models')
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_start_engine, args=(path,)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(120)
+        assert worker.exitcode == 0
+    with open(f"{path}.saves") as f:
+        assert len(f.read().split()) == 1
+
+
+def test_scheduler_starts_once():
+    scheduler = RefreshScheduler()
+    threads = [threading.Thread(target=scheduler.start) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert sum(t.name == 'refresh' for t in threading.enumerate()) == 1
+    finally:
+        scheduler.stop()
+
+
+def test_refresh_extends_the_cost_matrix(make_recommender, monkeypatch):
+    df = synthetic_destinations(300)
+    recommender = make_recommender(df.iloc[:250])
+    appended = []
+    add_destinations = CostMatrix.add_destinations
+    monkeypatch.setattr(CostMatrix, 'add_destinations', lambda matrix, origins, frame, *args: (
+        appended.append(len(frame)), add_destinations(matrix, origins, frame, *args)
+    ))
+    recommender.loader.fetch_frame = lambda allow_fallback=True: df
+
+    fresh = recommender.refreshed()
+    assert appended == [300]
+    assert fresh.data_version == recommender.data_version + 1
+    lat, lng = fresh._resolve_origin_coords('Paris')
+    _, flights = fresh.cost_matrix.row(lat, lng)
+    assert len(flights) == 300
+    assert (flights.astype(int) == fresh.ml_engine.predict_flight_costs(lat, lng, df)).all()
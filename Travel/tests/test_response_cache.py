@@ -0,0 +1,71 @@
+import pytest
+from benchmarks.common import OfflineSafety, synthetic_destinations
+from benchmarks.stubs import StubServer
+from utils import circuit
+from utils.api_clients import SafetyClient
+from utils.cache import TTLCache
+from utils.recommender import DEGRADED_RESULT_TTL
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    circuit.BREAKERS.clear()
+    yield
+    circuit.BREAKERS.clear()
+
+
+def advisory_routes(status):
+    def advisory(params, body, headers):
+        code = params.get('countrycode', '')
+        return status[0], {"data": {code: {"advisory": {"score": 1.0}}}}
+    return {'/': advisory}
+
+
+def cached_ttls(recommender):
+    return [entry[2] for entry in recommender.response_cache._data.values()]
+
+
+def test_entry_ttl():
+    cache = TTLCache('test-entry-ttl', ttl=900)
+    assert cache.get_or_load('a', lambda: 1, lambda value: 0.01) == 1
+    assert cache.get_or_load('b', lambda: 2, lambda value: None) == 2
+    assert cache._data['a'][2:] == (0.01, 0.01)
+    assert cache._data['b'][2:] == (900, 900)
+
+
+def test_fallback_scores_are_cached_briefly(make_recommender):
+    status = [500]
+    with StubServer(advisory_routes(status)) as stub:
+        recommender = make_recommender(synthetic_destinations(200))
+        recommender.safety_client = SafetyClient(base_url=f"{stub.url}/", cache=TTLCache('test-degraded-safety', ttl=900))
+
+        # Advisory API down: every score is the 2.5 fallback, the scored set is kept only briefly
+        degraded = recommender.recommend('Europe', 5000, 7, 1)
+        assert {r['safety_raw'] for r in degraded['recommendations']} == {2.5}
+        assert cached_ttls(recommender) == [DEGRADED_RESULT_TTL]
+
+        # Upstream back (and the short entry dropped rather than waited out): real scores are kept for the full TTL
+        status[0] = 200
+        circuit.BREAKERS.clear()
+        recommender.response_cache.invalidate()
+        recovered = recommender.recommend('Europe', 5000, 7, 1)
+        assert {r['safety_raw'] for r in recovered['recommendations']} == {1.0}
+        assert cached_ttls(recommender) == [recommender.response_cache.ttl]
+
+
+def test_offline_scores_use_the_default_ttl(make_recommender):
+    recommender = make_recommender(synthetic_destinations(200))
+    assert isinstance(recommender.safety_client, OfflineSafety)
+    recommender.recommend('Europe', 5000, 7, 1)
+    assert cached_ttls(recommender) == [recommender.response_cache.ttl]
+
+
+def test_cached_scored_sets_hold_no_frame_columns(make_recommender):
+    # Cached entries keep row positions and numbers only; text columns are read from the frame
+    recommender = make_recommender(synthetic_destinations(2000))
+    response = recommender.recommend('Europe', 5000, 7, 2, origin_city='Paris')
+    assert response['recommendations']
+    for scored, *_ in recommender.response_cache._data.values():
+        arrays = [value for value in scored.values() if hasattr(value, 'dtype')]
+        assert arrays and all(value.dtype != object for value in arrays)
+        assert sum(value.nbytes for value in arrays) <= 8 * 8 * scored['n']
@@ -0,0 +1,19 @@
+from benchmarks.common import synthetic_destinations
+
+
+def test_similar_destinations_by_name(make_recommender):
+    df = synthetic_destinations(300)
+    df.loc[7, 'city'] = "São Paulo"
+    recommender = make_recommender(df)
+    expected = recommender._describe(recommender._nearest(recommender.features[7], 5, exclude=7))
+    for name in ("São Paulo", "sao paulo", "  SAO PAULO "):
+        assert recommender.similar_destinations(name) == expected
+    assert all(r['city'] != "São Paulo" for r in expected)
+    assert recommender.similar_destinations("Atlantis") == []
+
+
+def test_first_row_wins_for_a_shared_name(make_recommender):
+    df = synthetic_destinations(300)
+    df.loc[[3, 9], 'city'] = "Springfield"
+    recommender = make_recommender(df)
+    assert recommender.city_rows["springfield"] == 3
@@ -0,0 +1,93 @@
+import bisect
+import string
+from .gazetteer import normalize_name
+
+# Shorter prefixes are one edit away from too many unrelated names
+MIN_FUZZY_LENGTH = 4
+# Characters typo variants are built from: normalized Latin letters and the space. Other
+# scripts in the index (CJK, Cyrillic...) would multiply the variants without helping.
+EDIT_ALPHABET = string.ascii_lowercase + ' '
+
+
+class PrefixIndex:
+    # Sorted array of normalized place names (and aliases) searched with bisect.
+    # Typo tolerance: when exact prefixes don't fill the result, every prefix one edit
+    # away (delete, insert, replace, swap) is tried as well, each another bisect.
+    # The keys are also kept per length, so prefix matches can be read shortest first.
+    def __init__(self, names):
+        # names: iterable of (name, entry) where entry has city/country_code/iata
+        pairs = []
+        for i, (name, entry) in enumerate(names):
+            key = normalize_name(name)
+            if key:
+                pairs.append((key, i, entry))
+        pairs.sort()
+        self.keys = [k for k, _, _ in pairs]
+        self.entries = [e for _, _, e in pairs]
+        self.alphabet = sorted(set(''.join(self.keys)) & set(EDIT_ALPHABET))
+        # length -> (its keys, their positions in self.keys), both in key order
+        self.by_length = {}
+        for i, key in enumerate(self.keys):
+            keys, positions = self.by_length.setdefault(len(key), ([], []))
+            keys.append(key)
+            positions.append(i)
+        self.lengths = sorted(self.by_length)
+
+    @classmethod
+    def from_gazetteer(cls, gazetteer):
+        return cls(gazetteer.names())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _prefix_matches(self, prefix, limit):
+        i = bisect.bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix) and limit > 0:
+            yield i
+            i += 1
+            limit -= 1
+
+    def _shortest_matches(self, prefix):
+        # Every key starting with prefix, shortest first (alphabetical within a length)
+        for length in self.lengths[bisect.bisect_left(self.lengths, len(prefix)):]:
+            keys, positions = self.by_length[length]
+            j = bisect.bisect_left(keys, prefix)
+            while j < len(keys) and keys[j].startswith(prefix):
+                yield positions[j]
+                j += 1
+
+    def _edits(self, word):
+        splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+        deletes = [a + b[1:] for a, b in splits if b]
+        swaps = [a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1]
+        replaces = [a + c + b[1:] for a, b in splits if b for c in self.alphabet if c != b[0]]
+        inserts = [a + c + b for a, b in splits for c in self.alphabet]
+        return set(deletes + swaps + replaces + inserts) - {word}
+
+    def search(self, query, limit=8):
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+        # Rank: exact name, then exact prefix (shorter names first), then one-typo prefixes.
+        # The only match as long as the prefix is the exact name, so reading matches shortest
+        # first ranks all of them without collecting them.
+        matches = self._shortest_matches(prefix)
+        if len(prefix) >= MIN_FUZZY_LENGTH and sum(1 for _ in self._prefix_matches(prefix, limit)) < limit:
+            exact = list(matches)
+            fuzzy = {}
+            for variant in self._edits(prefix):
+                for i in self._prefix_matches(variant, limit):
+                    fuzzy.setdefault(i, (len(self.keys[i]), self.keys[i]))
+            taken = set(exact)
+            matches = exact + [i for i in sorted(fuzzy, key=fuzzy.get) if i not in taken]
+
+        results, seen = [], set()
+        for i in matches:
+            entry = self.entries[i]
+            if id(entry) in seen:
+                continue
+            seen.add(id(entry))
+            results.append({"name": entry['city'], "iata": entry.get('iata'), "country": entry.get('country_code')})
+            if len(results) == limit:
+                break
+        return results
@@ -0,0 +1,88 @@
+import numpy as np
+from .fast_inference import ForestTableEvaluator
+
+# Advisory scores run from 0 (safe) to 5; the daily-cost model is linear in them
+SAFETY_RANGE = (0.0, 5.0)
+# Taken off model outputs before truncating, so float noise can't lift a bound over the real cost
+EPSILON = 1e-6
+
+
+class BudgetIndex:
+    # Lower bounds on what a trip to each destination can cost, so destinations that can't fit
+    # a budget are dropped before any safety lookup or model inference. For the hybrid costs
+    # recommend() computes:
+    #   daily  >= 0.7 * base_cost + 0.3 * max(30, daily model at the cheaper end of the safety range)
+    #   flight >= max(50, the cheapest flight-model price at this distance from the origin or further)
+    #   trip   >= daily * days * people + flight * people
+    # Every continent's rows are kept sorted by their daily bound: flights cost at least 50,
+    # so a query bisects to the prefix that can fit before checking flights row by row.
+    def __init__(self, df, ml_engine):
+        self.engine = ml_engine
+        self.size = len(df)
+        self.lat = df['lat'].to_numpy(dtype=float)
+        self.lng = df['lng'].to_numpy(dtype=float)
+        self.daily = np.zeros(0)
+        self.groups = {}
+        if not self.size:
+            return
+        self.region = ml_engine._region_codes(df['continent'].to_numpy())
+        pop_scale = np.minimum(100, df['population'].to_numpy(dtype=float) / 1000000)
+        cheapest = np.minimum(*(
+            ml_engine._predict_daily_costs(np.column_stack([self.region, pop_scale, np.full(self.size, safety)]))
+            for safety in SAFETY_RANGE
+        ))
+        self.daily = df['base_cost'].to_numpy() * 0.7 + np.maximum(30, np.trunc(cheapest - EPSILON)) * 0.3
+
+        # recommend() predicts flights with peak=1, so the forest is a step function of distance
+        # per region. Suffix minima turn it into a bound that only grows with distance; starting
+        # one step early covers distances rounded differently elsewhere (e.g. the cost matrix).
+        table = ForestTableEvaluator(
+            ml_engine.rf_flight_model, continuous=0, categorical=1,
+            categories=range(len(ml_engine.region_encoder.classes_)), fixed={2: 1}
+        )
+        self.thresholds = table.thresholds
+        self.flight_floor = np.maximum(50, np.trunc(np.minimum.accumulate(table.table[:, ::-1], axis=1)[:, ::-1] - EPSILON))
+
+        continents = df['continent'].to_numpy()
+        for continent in [None] + list(dict.fromkeys(continents)):
+            rows = np.arange(self.size) if continent is None else np.flatnonzero(continents == continent)
+            rows = rows[np.argsort(self.daily[rows], kind='stable')]
+            self.groups[continent] = (rows, self.daily[rows])
+
+    def flight_bounds(self, origin_lat, origin_lng, rows):
+        dist = self.engine.haversine_distances(origin_lat, origin_lng, self.lat[rows], self.lng[rows])
+        step = np.searchsorted(self.thresholds, dist.astype(np.float32).astype(float), side='left')
+        return self.flight_floor[self.region[rows], np.maximum(0, step - 1)]
+
+    def bounds(self, rows, origin_lat, origin_lng, days, people):
+        # Lowest possible trip cost (USD) for each of `rows`, computed with the same operations in
+        # the same order as the real cost so rounding keeps it a bound
+        return (self.daily[rows] * days * people) + (self.flight_bounds(origin_lat, origin_lng, rows) * people)
+
+    def group(self, continent):
+        # Key of the rows a continent covers: None (every row) when it has no destinations
+        return continent if continent in self.groups else None
+
+    def within(self, continent, origin_lat, origin_lng, days, people, ceiling):
+        # Rows of a continent (None: all rows) whose bound is at most ceiling, ascending
+        rows, daily = self.groups[continent]
+        # Bisect on the daily bound with the cheapest flight, then the exact check; the
+        # limit is loosened a hair so rounding can't cut a row the exact check keeps
+        limit = (ceiling / people - 50) / days
+        end = int(np.searchsorted(daily, limit + abs(limit) * 1e-9 + 1e-9, side='right'))
+        rows = rows[:end]
+        return np.sort(rows[self.bounds(rows, origin_lat, origin_lng, days, people) <= ceiling])
+
+    def lowest(self, continent, origin_lat, origin_lng, days, people):
+        # Smallest bound in a continent: rows in daily-bound order, in growing chunks, until
+        # the next daily bound with the cheapest flight can't beat the best so far
+        rows, daily = self.groups[continent]
+        best, start, size = float('inf'), 0, 256
+        while start < len(rows) and (daily[start] * days * people) + (50 * people) <= best:
+            best = min(best, float(self.bounds(rows[start:start + size], origin_lat, origin_lng, days, people).min()))
+            start, size = start + size, size * 2
+        return best
+
+    def mask(self, rows, origin_lat, origin_lng, days, people, ceiling):
+        # Boolean mask over any set of rows, for candidates already filtered another way
+        return self.bounds(rows, origin_lat, origin_lng, days, people) <= ceiling
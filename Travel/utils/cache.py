@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Background refreshes for stale entries run here, off the request path
+_refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+
+# Every named cache, so counters can be reported in one place
+CACHES = {}
+
+
+class _Flight:
+    # One in-progress load that concurrent callers for the same key wait on
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, name, ttl, maxsize=1024, stale_ttl=None):
+        self.name = name
+        self.ttl = ttl
+        # How long past expiry an entry may still be served while it is refreshed
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict() # key -> (value, stored_at, ttl, stale_ttl)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        CACHES[name] = self
+
+    def get_or_load(self, key, loader, ttl_of=None):
+        # Returns the cached value for key, calling loader() at most once per key at a time.
+        # Errors from loader() are raised to every waiting caller and never cached.
+        # ttl_of(value), when given, may return a shorter TTL for a loaded value (None: the default).
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at, ttl, stale_ttl = entry
+                age = now - stored_at
+                if age < ttl:
+                    self.hits += 1
+                    self._data.move_to_end(key)
+                    return value
+                if age < ttl + stale_ttl:
+                    self.stale_hits += 1
+                    self._data.move_to_end(key)
+                    if key not in self._flights:
+                        self._flights[key] = _Flight()
+                        self.refreshes += 1
+                        _refresher.submit(self._load, key, loader, self._flights[key], ttl_of)
+                    return value
+
+            self.misses += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                owner = True
+            else:
+                owner = False
+
+        if owner:
+            self._load(key, loader, flight, ttl_of)
+        else:
+            flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _load(self, key, loader, flight, ttl_of=None):
+        try:
+            flight.value = loader()
+            self.set(key, flight.value, None if ttl_of is None else ttl_of(flight.value))
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def set(self, key, value, ttl=None):
+        # An entry with its own TTL is served stale for at most that long too
+        if ttl is None:
+            ttl, stale_ttl = self.ttl, self.stale_ttl
+        else:
+            stale_ttl = min(ttl, self.stale_ttl)
+        with self._lock:
+            self._data[key] = (value, time.monotonic(), ttl, stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes
+            }
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+def _after_fork():
+    # A forked child has none of the parent's threads: start a fresh refresher and drop
+    # locks and in-flight loads that only a parent thread could have released
+    global _refresher
+    _refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+    for cache in CACHES.values():
+        cache._lock = threading.Lock()
+        cache._flights = {}
+
+
+os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import deque
+import requests
+
+# Set CIRCUIT_BREAKER=0 to always call the upstreams (timeouts stay at the client defaults)
+ENABLED = os.getenv('CIRCUIT_BREAKER', '1') != '0'
+# Seconds an open circuit rejects calls before letting a trial call through
+OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 30))
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# name -> CircuitBreaker, one per upstream endpoint ("client/endpoint", or just the client)
+BREAKERS = {}
+# CircuitBreaker settings for endpoints that are slow even when healthy
+BREAKER_SETTINGS = {
+    "amadeus/flight-offers": {"slow_seconds": 8.0}
+}
+_registry_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def is_failure(exc_type, exc):
+    # Connection errors, timeouts, bad payloads and 5xx/429 answers count against the
+    # upstream; other exceptions (a 404, a missing key in a good answer) don't
+    if exc_type is None or not issubclass(exc_type, requests.RequestException):
+        return False
+    if issubclass(exc_type, requests.HTTPError) and exc is not None and exc.response is not None:
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+class CircuitBreaker:
+    # closed: calls go through; the last `window` outcomes are kept. Once `min_calls` are in,
+    #   a failure rate >= failure_rate or a share of calls slower than slow_seconds >= slow_rate
+    #   opens the circuit.
+    # open: calls are rejected (CircuitOpenError) for open_seconds, so clients serve their
+    #   fallbacks at once.
+    # half_open: up to half_open_calls trial calls, with the client's full timeout; success
+    #   closes the circuit, failure opens it.
+    # Timeouts adapt to latency: timeout_multiplier x the p99 of recent calls that succeeded or
+    # timed out, between min_timeout and the client's own timeout. A timed-out call counts with
+    # the time it was given, so an upstream that slows down pushes its timeout back up.
+    def __init__(self, name, window=20, min_calls=10, failure_rate=0.5, slow_seconds=2.0, slow_rate=0.8,
+                 open_seconds=None, half_open_calls=1, min_timeout=0.25, timeout_multiplier=3, latency_samples=200):
+        self.name = name
+        self.window = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = OPEN_SECONDS if open_seconds is None else open_seconds
+        self.half_open_calls = half_open_calls
+        self.min_timeout = min_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.latencies = deque(maxlen=latency_samples)
+        self.p99 = None
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trials = 0
+        self.rejected = 0
+        self.opened = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        # Raises CircuitOpenError when the call must not go out
+        if not ENABLED:
+            return
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit open")
+                self.state = HALF_OPEN
+                self.trials = 0
+            if self.state == HALF_OPEN:
+                if self.trials >= self.half_open_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit half-open, trial in progress")
+                self.trials += 1
+
+    def record(self, seconds, failed, timed_out=False):
+        if not ENABLED:
+            return
+        with self._lock:
+            if not failed or timed_out:
+                self.latencies.append(seconds)
+                ordered = sorted(self.latencies) # At most latency_samples values
+                self.p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self.window.clear()
+                return
+            if self.state == OPEN:
+                return # A call that started before the circuit opened
+            self.window.append((failed, seconds > self.slow_seconds))
+            if len(self.window) >= self.min_calls:
+                failures = sum(1 for f, _ in self.window if f)
+                slow = sum(1 for _, s in self.window if s)
+                if failures >= self.failure_rate * len(self.window) or slow >= self.slow_rate * len(self.window):
+                    self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self.window.clear()
+
+    def timeout(self, default):
+        # Adaptive per-call timeout, never above the client's own; a half-open trial gets all of it
+        if not ENABLED or self.p99 is None or self.state == HALF_OPEN:
+            return default
+        return min(default, max(self.min_timeout, self.p99 * self.timeout_multiplier))
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.window.clear()
+            self.latencies.clear()
+            self.p99 = None
+            self.trials = 0
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "adaptive_timeout": None if self.p99 is None else max(self.min_timeout, self.p99 * self.timeout_multiplier),
+            "p99": self.p99,
+            "rejected": self.rejected,
+            "opened": self.opened
+        }
+
+
+def breaker(name):
+    found = BREAKERS.get(name)
+    if found is None:
+        with _registry_lock:
+            found = BREAKERS.setdefault(name, CircuitBreaker(name, **BREAKER_SETTINGS.get(name, {})))
+    return found
+
+
+def breaker_stats():
+    return {name: b.stats() for name, b in BREAKERS.items()}
+
+
+def _after_fork():
+    # Locks a parent thread held at fork time would stay held forever in the child
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    for b in list(BREAKERS.values()):
+        b._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
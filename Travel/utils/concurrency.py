@@ -0,0 +1,109 @@
+import asyncio
+import functools
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+# Not the builtin TimeoutError before Python 3.11
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+import requests
+from requests.adapters import HTTPAdapter
+
+# One bounded pool shared by every fan-out so concurrent requests can't spawn unbounded threads
+MAX_WORKERS = 16
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fanout')
+# Blocking upstream calls awaited from async views; sized for several requests in flight at once
+ASYNC_WORKERS = int(os.getenv('ASYNC_UPSTREAM_WORKERS', 64))
+_async_executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='async-upstream')
+# Every make_session() session, so a forked child can drop the connections it shares with its parent
+_sessions = weakref.WeakSet()
+
+
+def make_session(pool_size=MAX_WORKERS, verify=True):
+    # Keep-alive session whose connection pool matches the fan-out width
+    session = requests.Session()
+    session.pool_size = pool_size
+    _mount(session)
+    session.verify = verify
+    _sessions.add(session)
+    return session
+
+
+def _mount(session):
+    adapter = HTTPAdapter(pool_connections=session.pool_size, pool_maxsize=session.pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+
+def _after_fork():
+    # A forked child (recommend_many workers) inherits the pools but not their threads, and a
+    # pool that thinks it has idle threads never starts new ones. Its sessions would also
+    # share keep-alive sockets with the parent. Give the child its own of both.
+    global _executor, _async_executor
+    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fanout')
+    _async_executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='async-upstream')
+    for session in list(_sessions):
+        _mount(session)
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def fan_out(fn, keys, default, deadline=None):
+    # Runs fn(key) for every distinct key on the shared pool and returns {key: result}.
+    # Keys that fail or are still running when the overall deadline passes get the default.
+    futures = {key: _executor.submit(fn, key) for key in dict.fromkeys(keys)}
+    done, not_done = wait(futures.values(), timeout=deadline)
+    for future in not_done:
+        future.cancel()
+
+    results = {}
+    for key, future in futures.items():
+        if future in done and future.exception() is None:
+            results[key] = future.result()
+        else:
+            results[key] = default() if callable(default) else default
+    return results
+
+
+def iter_fan_out(fn, keys, default, deadline=None):
+    # Like fan_out, but yields (key, result) as each call finishes, in submission order for ties.
+    # Keys still running when the deadline passes are yielded last with the default.
+    futures = {_executor.submit(fn, key): key for key in dict.fromkeys(keys)}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            key = futures.pop(future)
+            if future.exception() is None:
+                yield key, future.result()
+            else:
+                yield key, default() if callable(default) else default
+    except FuturesTimeoutError:
+        pass
+    for future, key in futures.items():
+        future.cancel()
+        yield key, default() if callable(default) else default
+
+
+async def run_blocking(fn, *args):
+    # Await a blocking call on a shared pool. Unlike asyncio.to_thread this doesn't use the
+    # loop's default executor, which is joined when a per-request loop closes.
+    return await asyncio.get_running_loop().run_in_executor(_async_executor, functools.partial(fn, *args))
+
+
+async def gather_with_deadline(coros, deadline):
+    # Awaits {name: coroutine} together. Returns ({name: result}, {name: status}) where status
+    # is "ok", "timeout", "error" or "disabled" (the coroutine returned None).
+    tasks = {name: asyncio.ensure_future(coro) for name, coro in coros.items()}
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    results, status = {}, {}
+    for name, task in tasks.items():
+        if task in pending:
+            status[name] = "timeout"
+        elif task.exception() is not None:
+            status[name] = "error"
+        else:
+            results[name] = task.result()
+            status[name] = "ok" if results[name] is not None else "disabled"
+    return results, status
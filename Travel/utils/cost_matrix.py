@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from .feature_store import make_temp_dir, swap_in
+from .model_registry import MODEL_VERSION
+
+# Bump when the layout or the flight-cost formula changes
+MATRIX_VERSION = 2
+
+
+def origin_key(lat, lng):
+    return (round(float(lat), 4), round(float(lng), 4))
+
+
+class CostMatrix:
+    # Distance (km) and predicted flight cost for every known origin x destination pair,
+    # as float32 .npy files that each worker memory-maps (the OS shares the pages). Layout:
+    #   metadata.json   origins, destination count, fingerprint
+    #   distance.npy    float32 [origins, destinations]
+    #   flight.npy      float32 [origins, destinations]
+    # Published files are never written again: appended destinations (and new origins) are
+    # added in a new copy (add_destinations), anything else builds a new matrix.
+    def __init__(self, path='data/artifacts/cost_matrix', chunk_rows=256):
+        self.path = path
+        self.chunk_rows = chunk_rows # Origins computed per vectorized block while building
+        self.meta = None
+        self.distance = None
+        self.flight = None
+        self._origin_index = {}
+
+    @staticmethod
+    def fingerprint(origins, df, engine):
+        digest = hashlib.sha256()
+        # The fitted models themselves, so a retrained engine never reads flights of the old one
+        digest.update(json.dumps([MATRIX_VERSION, MODEL_VERSION, engine.seed, engine.model_digest()]).encode())
+        # Origins in any order: add_destinations appends new ones after the existing rows
+        digest.update(np.asarray(sorted(map(tuple, np.asarray(origins, dtype=float).reshape(-1, 2).tolist()))).tobytes())
+        digest.update(pd.util.hash_pandas_object(df[['lat', 'lng', 'continent']], index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _file(self, name, root=None):
+        return os.path.join(root or self.path, name)
+
+    def _read_metadata(self):
+        try:
+            with open(self._file('metadata.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return None
+
+    def _write_metadata(self, meta, root=None):
+        with open(self._file('metadata.json', root), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    def is_current(self, fingerprint):
+        meta = self._read_metadata()
+        return meta is not None and meta.get('fingerprint') == fingerprint
+
+    def _fill(self, distance, flight, o_lat, o_lng, d_lat, d_lng, d_codes, engine, cols, first_row=0):
+        # Vectorized over blocks of origins (written from first_row on) x all given destination columns
+        for start in range(0, len(o_lat), self.chunk_rows):
+            end = start + self.chunk_rows
+            d = engine.haversine_distances(o_lat[start:end, None], o_lng[start:end, None], d_lat[None, :], d_lng[None, :])
+            rows = slice(first_row + start, first_row + min(end, len(o_lat)))
+            distance[rows, cols] = d
+            flight[rows, cols] = engine.flight_costs_from_distances(d, d_codes[None, :])
+
+    def build(self, origins, df, engine, fingerprint):
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        n_dest = len(df)
+        tmp = make_temp_dir(self.path)
+        distance = open_memmap(self._file('distance.npy', tmp), mode='w+', dtype=np.float32, shape=(len(origins), n_dest))
+        flight = open_memmap(self._file('flight.npy', tmp), mode='w+', dtype=np.float32, shape=(len(origins), n_dest))
+        self._fill(
+            distance, flight, origins[:, 0], origins[:, 1],
+            df['lat'].to_numpy(dtype=float), df['lng'].to_numpy(dtype=float),
+            engine._region_codes(df['continent'].to_numpy()), engine, slice(0, n_dest)
+        )
+        distance.flush()
+        flight.flush()
+        del distance, flight
+        self._write_metadata({
+            "version": MATRIX_VERSION,
+            "fingerprint": fingerprint,
+            "origins": origins.tolist(),
+            "n_destinations": n_dest
+        }, tmp)
+        swap_in(tmp, self.path)
+        self.load()
+
+    def load(self):
+        self.meta = self._read_metadata()
+        self.distance = np.load(self._file('distance.npy'), mmap_mode='r')
+        self.flight = np.load(self._file('flight.npy'), mmap_mode='r')
+        self._origin_index = {origin_key(lat, lng): i for i, (lat, lng) in enumerate(self.meta['origins'])}
+
+    def row(self, lat, lng):
+        # (distances, flight costs) for one origin over all destinations, or None if unknown
+        if self.meta is None:
+            return None
+        i = self._origin_index.get(origin_key(lat, lng))
+        if i is None:
+            return None
+        n = self.meta['n_destinations']
+        return self.distance[i, :n], self.flight[i, :n]
+
+    def appendable(self, origins, df, engine):
+        # True when the published matrix covers the first rows of df (same model) from some of
+        # these origins, so add_destinations can extend it instead of rebuilding everything
+        meta = self._read_metadata()
+        if meta is None or meta.get('version') != MATRIX_VERSION or not 0 < meta['n_destinations'] <= len(df):
+            return False
+        known = {origin_key(lat, lng) for lat, lng in origins}
+        return (
+            all(origin_key(lat, lng) in known for lat, lng in meta['origins'])
+            and meta['fingerprint'] == self.fingerprint(meta['origins'], df.iloc[:meta['n_destinations']], engine)
+        )
+
+    def add_destinations(self, origins, df, engine, fingerprint):
+        # A new published copy for df, whose first rows the current matrix already covers: the
+        # existing planes are copied, only the new destination columns and new origin rows are
+        # computed, then it is swapped in. Workers still mapping the old copy keep reading it.
+        self.load()
+        n = self.meta['n_destinations']
+        old = self._origin_index
+        new_origins = np.asarray([o for o in origins if origin_key(*o) not in old], dtype=float).reshape(-1, 2)
+        all_origins = np.asarray(self.meta['origins'], dtype=float).reshape(-1, 2)
+        n_old = len(all_origins)
+        all_origins = np.vstack([all_origins, new_origins])
+        d_lat, d_lng = df['lat'].to_numpy(dtype=float), df['lng'].to_numpy(dtype=float)
+        d_codes = engine._region_codes(df['continent'].to_numpy())
+
+        tmp = make_temp_dir(self.path)
+        shape = (len(all_origins), len(df))
+        distance = open_memmap(self._file('distance.npy', tmp), mode='w+', dtype=np.float32, shape=shape)
+        flight = open_memmap(self._file('flight.npy', tmp), mode='w+', dtype=np.float32, shape=shape)
+        distance[:n_old, :n] = self.distance[:, :n]
+        flight[:n_old, :n] = self.flight[:, :n]
+        # Existing origins x new destinations, then new origins x every destination
+        self._fill(
+            distance, flight, all_origins[:n_old, 0], all_origins[:n_old, 1],
+            d_lat[n:], d_lng[n:], d_codes[n:], engine, slice(n, len(df))
+        )
+        self._fill(
+            distance, flight, new_origins[:, 0], new_origins[:, 1],
+            d_lat, d_lng, d_codes, engine, slice(0, len(df)), first_row=n_old
+        )
+        distance.flush()
+        flight.flush()
+        del distance, flight
+        self._write_metadata({
+            "version": MATRIX_VERSION,
+            "fingerprint": fingerprint,
+            "origins": all_origins.tolist(),
+            "n_destinations": len(df)
+        }, tmp)
+        swap_in(tmp, self.path)
+        self.load()
+
+    def nbytes(self):
+        return 0 if self.meta is None else int(self.distance.nbytes + self.flight.nbytes)
@@ -1,107 +1,215 @@
 import requests
+import numpy as np
 import pandas as pd
-import random
 
 import json
 import os
+import sys
+from .metrics import upstream_call, fallback
+
+# Daily base cost (USD) per continent before the Numbeo refinement
+REGION_BASE_COST = {
+    'Europe': 150,
+    'North America': 150,
+    'Africa': 80,
+    'Asia': 90,
+    'Oceania': 140,
+    'South America': 110
+}
+DEFAULT_BASE_COST = 100
+
+
+def compact_ints(values):
+    # int32 when every value fits, int64 otherwise: a bare downcast wraps (3e9 becomes -1294967296)
+    info = np.iinfo(np.int32)
+    fits = len(values) == 0 or (info.min <= values.min() and values.max() <= info.max)
+    return values.astype('int32' if fits else 'int64')
 
 class DestinationLoader:
-    def __init__(self):
+    def __init__(self, countries_url=None, world_cities_path=None):
         # Optimized URL with specific fields to reduce payload size and improve reliability
         self.fields = "name,cca2,region,subregion,population,capital,latlng"
-        self.base_url = f"https://restcountries.com/v3.1/all?fields={self.fields}"
+        countries_url = countries_url or os.getenv('RESTCOUNTRIES_URL', "https://restcountries.com/v3.1")
+        self.base_url = f"{countries_url}/all?fields={self.fields}"
         self.numbeo_path = 'data/numbeo_data.csv'
         self.fallback_path = 'data/fallback_destinations.json'
+        self.cities_path = 'data/cities.csv' # Local city/airport list for name -> coordinates/IATA
+        # Optional world cities CSV (city,country_code,lat,lng,population): every city becomes a
+        # destination instead of one capital per country
+        self.world_cities_path = world_cities_path or os.getenv('WORLD_CITIES_PATH')
+
+    def input_paths(self):
+        # Local files the destination frame is built from
+        paths = [self.numbeo_path, self.fallback_path]
+        if self.world_cities_path:
+            paths.append(self.world_cities_path)
+        return paths
 
     def fetch_data(self):
-        countries_data = []
-        
+        # One dict per destination (same records as fetch_frame)
+        return self.fetch_frame().to_dict('records')
+
+    def fetch_frame(self, allow_fallback=True):
+        # allow_fallback=False raises when restcountries is unreachable instead of using the
+        # bundled fallback list (background refreshes keep the current data instead)
+        countries_data = self._fetch_countries(allow_fallback)
+        if not countries_data:
+            return self.build_frame([], pd.DataFrame())
+
+        # 2. Load Cost Data
+        cost_df = pd.DataFrame()
+        try:
+            cost_df = pd.read_csv(self.numbeo_path)
+        except:
+            pass
+
+        countries = self.build_frame(countries_data, cost_df)
+        if self.world_cities_path:
+            return self.build_city_frame(self.read_world_cities(self.world_cities_path), countries, cost_df)
+        return countries
+
+    def _fetch_countries(self, allow_fallback=True):
         # 1. Fetch Real Country Data (with Fallback)
         try:
-            response = requests.get(self.base_url, timeout=5)
-            response.raise_for_status()
-            countries_data = response.json()
+            with upstream_call('restcountries') as call:
+                response = requests.get(self.base_url, timeout=call.timeout(5))
+                response.raise_for_status()
+                return response.json()
         except Exception as e:
+            if not allow_fallback:
+                raise
+            fallback('restcountries')
             if os.path.exists(self.fallback_path):
                 try:
                     with open(self.fallback_path, 'r', encoding='utf-8') as f:
-                        countries_data = json.load(f)
+                        return json.load(f)
                 except:
                     return []
-            else:
-                return []
+            return []
 
-        # 2. Load Cost Data
-        cost_df = pd.DataFrame()
-        try:
-            cost_df = pd.read_csv(self.numbeo_path)
-        except:
-            pass
+    def build_frame(self, countries_data, cost_df):
+        # Columnar processing of the restcountries records: one row per country with at least
+        # 100k people, its capital as the city
+        raw = pd.json_normalize(countries_data) if len(countries_data) else pd.DataFrame()
+        n = len(raw)
+
+        def column(name, default):
+            return raw[name] if name in raw else pd.Series([default] * n, dtype=object)
+
+        # Records without a common name (or with a malformed latlng) can't be placed
+        name = column('name.common', None)
+        latlng = column('latlng', None)
+        has_latlng = latlng.map(lambda v: isinstance(v, list) and len(v) > 0)
+        valid = name.notna() & (~has_latlng | (latlng.str.len() >= 2))
+
+        region = column('region', 'Unknown').fillna('Unknown').astype(str)
+        subregion = column('subregion', 'Unknown').fillna('Unknown').astype(str)
+        population = pd.to_numeric(column('population', 0), errors='coerce').fillna(0).astype('int64')
+        # Capital is a list
+        capital = column('capital', None).str[0].fillna('Unknown')
+
+        # Map Americas to specific continents for our UI
+        north = subregion.str.contains('North|Central|Caribbean')
+        americas = region == 'Americas'
+        region = region.mask(americas & north, 'North America').mask(americas & ~north, 'South America')
+
+        # Skip non-destinations (e.g. Antarctica) or tiny islands for this demo if needed
+        keep = valid & (population >= 100000)
+
+        # Estimate Base Cost (Heuristic based on region)
+        base_cost = region.map(REGION_BASE_COST).fillna(DEFAULT_BASE_COST).astype(float)
+
+        # Refine with CSV if match found: the country name first, then the capital
+        if not cost_df.empty:
+            by_country = cost_df.drop_duplicates('Country').set_index('Country')['Cost of Living Index']
+            by_city = cost_df.drop_duplicates('City').set_index('City')['Cost of Living Index']
+            country_match = name.isin(by_country.index)
+            city_match = ~country_match & (capital != 'Unknown') & capital.isin(by_city.index)
+            idx = name.map(by_country).where(country_match, capital.map(by_city).where(city_match))
+            matched = country_match | city_match
+            # Normalize: NY is 100 index ~ $250/day
+            base_cost = base_cost.where(~matched, (idx / 100) * 250)
+            # A matched row without an index value can't be costed
+            keep &= ~(matched & idx.isna())
+
+        rows = keep.to_numpy()
+        region, subregion, population, capital = region[rows], subregion[rows], population[rows], capital[rows]
+        coords = latlng[rows]
+        has_coords = has_latlng[rows]
+        lat = coords.str[0].where(has_coords, 0).astype(float)
+        lng = coords.str[1].where(has_coords, 0).astype(float)
+
+        # Construct a description for TF-IDF
+        description = (
+            "A beautiful destination in " + subregion + ", " + region
+            + ". Known for its culture and population of " + population.map('{:,}'.format)
+            + ". Capital city is " + capital + "."
+        )
+
+        df = pd.DataFrame({
+            "city": capital.astype(str),
+            "country": name[rows].astype(str),
+            "country_code": column('cca2', '').fillna('')[rows].astype(str),
+            "continent": region.astype('category'),
+            "subregion": subregion.astype('category'),
+            "base_cost": np.trunc(base_cost[rows].to_numpy()).astype('int32'),
+            "population": compact_ints(population),
+            "lat": lat,
+            "lng": lng,
+            "description": description
+        })
+        return df.reset_index(drop=True)
+
+    def read_world_cities(self, path):
+        # Only the columns we use, already in compact dtypes; "iso2" (simplemaps) is accepted for country_code
+        header = pd.read_csv(path, nrows=0).columns
+        code_column = 'country_code' if 'country_code' in header else 'iso2'
+        cities = pd.read_csv(
+            path, usecols=['city', code_column, 'lat', 'lng', 'population'],
+            dtype={'city': object, code_column: 'category', 'lat': 'float32', 'lng': 'float32'},
+            keep_default_na=False, na_values={'population': [''], 'lat': [''], 'lng': ['']}
+        )
+        return cities.rename(columns={code_column: 'country_code'})
+
+    def build_city_frame(self, cities, countries, cost_df):
+        # One row per city, continent/subregion/base cost inherited from its country (cities of
+        # countries not in the country frame are dropped). A Numbeo row for the city itself
+        # overrides the country's base cost.
+        cities = cities.dropna(subset=['lat', 'lng'])
+        per_country = countries.drop_duplicates('country_code').set_index('country_code')
+        codes = cities['country_code'].astype(str)
+        cities = cities[codes.isin(per_country.index).to_numpy()]
+        codes = cities['country_code'].astype(str)
+        country = per_country.loc[codes.to_numpy()]
+
+        base_cost = country['base_cost'].to_numpy().astype(float)
+        if not cost_df.empty:
+            by_city = cost_df.drop_duplicates('City').set_index('City')['Cost of Living Index']
+            idx = cities['city'].map(by_city).to_numpy(dtype=float)
+            matched = ~np.isnan(idx)
+            # Normalize: NY is 100 index ~ $250/day
+            base_cost[matched] = (idx[matched] / 100) * 250
+
+        # Repeated strings are stored once: the same city name object across rows, and one
+        # description per country (categorical)
+        city = cities['city'].astype(str)
+        names = {name: sys.intern(name) for name in city.unique()}
+        country_name = country['country'].astype(str).to_numpy()
+        description = pd.Categorical(
+            "A beautiful destination in " + country['subregion'].astype(str).to_numpy()
+            + ", " + country['continent'].astype(str).to_numpy()
+            + ". Known for its culture. A city in " + country_name + "."
+        )
 
-        processed_destinations = []
-
-        for country in countries_data:
-            try:
-                name = country['name']['common']
-                region = country.get('region', 'Unknown')
-                subregion = country.get('subregion', 'Unknown')
-                
-                # Map Americas to specific continents for our UI
-                if region == 'Americas':
-                    if 'North' in subregion or 'Central' in subregion or 'Caribbean' in subregion:
-                        region = 'North America'
-                    else:
-                        region = 'South America'
-
-                population = country.get('population', 0)
-                # Capital is a list
-                capital = country.get('capital', ['Unknown'])[0] if country.get('capital') else 'Unknown'
-                
-                # Skip non-destinations (e.g. Antarctica) or tiny islands for this demo if needed
-                if population < 100000:
-                    continue
-
-                # Estimate Base Cost (Heuristic based on region + random variance for demo)
-                base_cost = 100 # Default
-                
-                if region == 'Europe' or region == 'North America':
-                    base_cost = 150
-                elif region == 'Africa':
-                    base_cost = 80
-                elif region == 'Asia':
-                    base_cost = 90
-                elif region == 'Oceania':
-                    base_cost = 140
-                elif region == 'South America':
-                    base_cost = 110
-                
-                # Refine with CSV if match found
-                if not cost_df.empty:
-                    match = cost_df[cost_df['Country'] == name]
-                    if not match.empty:
-                        # Normalize: NY is 100 index ~ $250/day
-                        idx = match.iloc[0]['Cost of Living Index']
-                        base_cost = (idx / 100) * 250
-                    elif capital != 'Unknown':
-                         match_city = cost_df[cost_df['City'] == capital]
-                         if not match_city.empty:
-                             idx = match_city.iloc[0]['Cost of Living Index']
-                             base_cost = (idx / 100) * 250
-
-                processed_destinations.append({
-                    "city": capital,
-                    "country": name,
-                    "country_code": country.get('cca2', ''),
-                    "continent": region,
-                    "subregion": subregion,
-                    "base_cost": int(base_cost),
-                    "population": population,
-                    "lat": country['latlng'][0] if country.get('latlng') else 0,
-                    "lng": country['latlng'][1] if country.get('latlng') else 0,
-                    # Construct a description for TF-IDF
-                    "description": f"A beautiful destination in {subregion}, {region}. Known for its culture and population of {population:,}. Capital city is {capital}."
-                })
-            except Exception as e:
-                continue
-                
-        return processed_destinations
+        return pd.DataFrame({
+            "city": np.array([names[c] for c in city], dtype=object),
+            "country": pd.Categorical(country_name),
+            "country_code": pd.Categorical(codes.to_numpy()),
+            "continent": pd.Categorical(country['continent'].astype(str).to_numpy()),
+            "subregion": pd.Categorical(country['subregion'].astype(str).to_numpy()),
+            "base_cost": np.trunc(base_cost).astype('int32'),
+            "population": compact_ints(pd.to_numeric(cities['population'], errors='coerce').fillna(0).to_numpy().astype('int64')),
+            "lat": cities['lat'].to_numpy(dtype='float32'),
+            "lng": cities['lng'].to_numpy(dtype='float32'),
+            "description": description
+        })
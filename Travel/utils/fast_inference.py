@@ -0,0 +1,103 @@
+import numpy as np
+
+
+class LinearEvaluator:
+    # Closed-form LinearRegression: X @ coef + intercept
+    def __init__(self, model):
+        self.coef = np.asarray(model.coef_, dtype=float).ravel()
+        self.intercept = float(model.intercept_)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float) @ self.coef + self.intercept
+
+
+class ForestEvaluator:
+    # RandomForestRegressor flattened into one set of node arrays, walked for all
+    # (sample, tree) pairs at once. Mirrors sklearn: inputs are cast to float32 and
+    # compared with `<=` against the float64 thresholds, tree outputs are summed in order.
+    def __init__(self, model):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            # Leaves point at themselves so finished walks stay put
+            own = np.arange(tree.node_count) + offset
+            lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own, tree.children_right + offset))
+            values.append(tree.value.reshape(tree.node_count, -1)[:, 0])
+            offset += tree.node_count
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.value = np.concatenate(values)
+        self.roots = np.array(roots)
+        self.max_depth = max(e.tree_.max_depth for e in model.estimators_)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        leaf_values = self.value[node]
+        total = np.zeros(len(X))
+        for t in range(leaf_values.shape[1]):
+            total += leaf_values[:, t]
+        return total / leaf_values.shape[1]
+
+
+class ForestTableEvaluator:
+    # Exact lookup table for a forest whose inputs are one continuous feature plus
+    # categorical/fixed features. With the other features held constant the forest is
+    # piecewise constant in the continuous one, changing only at its split thresholds,
+    # so one evaluation per (category, interval) reproduces it exactly.
+    # Rows whose fixed features don't match fall back to the tree walk.
+    def __init__(self, model, continuous, categorical, categories, fixed):
+        self.walker = ForestEvaluator(model)
+        self.continuous = continuous
+        self.categorical = categorical
+        self.fixed = fixed # {feature index: value}
+        self.thresholds = np.unique(self.walker.threshold[
+            (self.walker.feature == continuous) & (self.walker.left != np.arange(len(self.walker.left)))
+        ])
+
+        # A float32 point inside every interval (t[i-1], t[i]], plus one past the last threshold
+        points = self.thresholds.astype(np.float32)
+        too_high = points.astype(float) > self.thresholds
+        points[too_high] = np.nextafter(points[too_high], np.float32(-np.inf))
+        last = self.thresholds[-1] if len(self.thresholds) else 0.0
+        points = np.append(points, np.float32(abs(last) * 2 + 1))
+
+        n_features = max([continuous, categorical] + list(fixed)) + 1
+        self.table = np.empty((len(categories), len(points)))
+        for i, category in enumerate(categories):
+            X = np.zeros((len(points), n_features), dtype=np.float32)
+            X[:, continuous] = points
+            X[:, categorical] = category
+            for feature, value in fixed.items():
+                X[:, feature] = value
+            self.table[i] = self.walker.predict(X)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        matches = np.ones(len(X), dtype=bool)
+        for feature, value in self.fixed.items():
+            matches &= X[:, feature] == value
+        if not matches.all():
+            out = np.empty(len(X))
+            out[matches] = self.predict(X[matches])
+            out[~matches] = self.walker.predict(X[~matches])
+            return out
+        # Interval i holds values in (t[i-1], t[i]], matching sklearn's `x <= threshold` goes left
+        interval = np.searchsorted(self.thresholds, X[:, self.continuous].astype(float), side='left')
+        return self.table[X[:, self.categorical].astype(int), interval]
+
+
+def max_abs_error(evaluator, model, X):
+    return float(np.max(np.abs(evaluator.predict(X) - model.predict(X)))) if len(X) else 0.0
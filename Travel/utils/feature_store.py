@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from scipy import sparse
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # Windows: no cross-process artifact lock
+
+# Bump when the processed columns or fitted objects change shape
+ARTIFACT_VERSION = 3
+
+
+def file_hash(path):
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_temp_dir(path):
+    # Artifacts are written next to their final location and swapped in with swap_in,
+    # so readers never see a partial artifact
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    return tmp
+
+
+def swap_in(tmp, path):
+    old = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+@contextmanager
+def artifact_lock(path):
+    # One process at a time checks, builds and swaps in the artifact at path. Workers that
+    # start (or refresh) together wait here, then find the artifact current and load it
+    # instead of racing each other's swap_in.
+    f = None
+    if fcntl is not None:
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            f = open(f"{path}.lock", 'w')
+            fcntl.flock(f, fcntl.LOCK_EX)
+        except OSError as e:
+            print(f"Artifact lock unavailable for {path}: {e}")
+    try:
+        yield
+    finally:
+        if f is not None:
+            f.close() # Closing releases the lock
+
+
+def save_csr(matrix, prefix):
+    # CSR arrays as separate .npy files so they can be memory-mapped back
+    matrix = sparse.csr_matrix(matrix)
+    np.save(f"{prefix}.data.npy", matrix.data)
+    np.save(f"{prefix}.indices.npy", matrix.indices)
+    np.save(f"{prefix}.indptr.npy", matrix.indptr)
+    return list(matrix.shape)
+
+
+def load_csr(prefix, shape, mmap_mode=None):
+    arrays = [np.load(f"{prefix}.{part}.npy", mmap_mode=mmap_mode) for part in ('data', 'indices', 'indptr')]
+    return sparse.csr_matrix(tuple(arrays), shape=tuple(shape), copy=False)
+
+
+class FeatureStore:
+    # Processed destinations plus fitted TF-IDF/scaler, persisted so workers skip the
+    # network fetch and refit on startup. Layout of the artifact directory:
+    #   metadata.json        version, input file hashes, build stats, matrix shapes
+    #   columns.json         DataFrame column layout and category values
+    #   col_<name>.npy       one file per DataFrame column: numeric values or category codes
+    #   models.pkl           fitted TfidfVectorizer and MinMaxScaler
+    #   tfidf.*.npy          sparse TF-IDF matrix (CSR data/indices/indptr)
+    #   features.*.npy       normalized similarity index matrix (CSR)
+    #   num_features.npy     scaled numeric features
+    # With mmap (FEATURE_MMAP=1, the default) the numeric/categorical columns and matrices are
+    # memory-mapped read-only, so workers on one host share a single copy through the page cache.
+    def __init__(self, path='data/artifacts/destinations', mmap=None):
+        self.path = path
+        self.mmap = os.getenv('FEATURE_MMAP', '1') == '1' if mmap is None else mmap
+
+    def _file(self, name, root=None):
+        return os.path.join(root or self.path, name)
+
+    def input_hashes(self, input_paths):
+        return {os.path.basename(p): file_hash(p) for p in input_paths}
+
+    def metadata(self):
+        try:
+            with open(self._file('metadata.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return None
+
+    def is_current(self, input_paths):
+        meta = self.metadata()
+        return (
+            meta is not None
+            and meta.get('version') == ARTIFACT_VERSION
+            and meta.get('inputs') == self.input_hashes(input_paths)
+        )
+
+    def _save_columns(self, df, root):
+        # Categoricals keep their codes; string columns are factorized the same way and come
+        # back as object columns holding one string object per distinct value
+        layout = []
+        for name in df.columns:
+            column = df[name]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                kind, values, categories = "category", column.cat.codes.to_numpy(), column.cat.categories.tolist()
+            elif pd.api.types.is_numeric_dtype(column.dtype):
+                kind, values, categories = "numeric", column.to_numpy(), None
+            else:
+                codes, uniques = pd.factorize(column, use_na_sentinel=False)
+                kind, values, categories = "string", codes.astype(np.int32), [str(u) for u in uniques]
+            np.save(self._file(f'col_{name}.npy', root), values)
+            layout.append({"name": name, "kind": kind, "categories": categories})
+        return layout
+
+    def _load_columns(self, layout):
+        mmap_mode = 'r' if self.mmap else None
+        columns = {}
+        for column in layout:
+            values = np.load(self._file(f"col_{column['name']}.npy"), mmap_mode=mmap_mode)
+            if column['kind'] == "category":
+                columns[column['name']] = pd.Categorical.from_codes(values, categories=column['categories'])
+            elif column['kind'] == "string":
+                columns[column['name']] = np.array(column['categories'], dtype=object)[values]
+            else:
+                columns[column['name']] = values
+        return pd.DataFrame(columns, copy=False)
+
+    def save(self, df, tfidf, scaler, tfidf_matrix, num_features, features, input_paths, build_seconds):
+        tmp = make_temp_dir(self.path)
+        layout = self._save_columns(df.reset_index(drop=True), tmp)
+        with open(self._file('models.pkl', tmp), 'wb') as f:
+            pickle.dump({"tfidf": tfidf, "scaler": scaler}, f)
+        tfidf_shape = save_csr(tfidf_matrix, self._file('tfidf', tmp))
+        features_shape = save_csr(features, self._file('features', tmp))
+        np.save(self._file('num_features.npy', tmp), np.asarray(num_features))
+        with open(self._file('columns.json', tmp), 'w', encoding='utf-8') as f:
+            json.dump(layout, f)
+        with open(self._file('metadata.json', tmp), 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": ARTIFACT_VERSION,
+                "inputs": self.input_hashes(input_paths),
+                "rows": len(df),
+                "built_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "build_seconds": round(build_seconds, 3),
+                "tfidf_shape": tfidf_shape,
+                "features_shape": features_shape
+            }, f, indent=2)
+
+        swap_in(tmp, self.path)
+
+    def load(self):
+        meta = self.metadata()
+        mmap_mode = 'r' if self.mmap else None
+        with open(self._file('models.pkl'), 'rb') as f:
+            models = pickle.load(f)
+        with open(self._file('columns.json'), 'r', encoding='utf-8') as f:
+            layout = json.load(f)
+        return {
+            "df": self._load_columns(layout),
+            "tfidf": models['tfidf'],
+            "scaler": models['scaler'],
+            "tfidf_matrix": load_csr(self._file('tfidf'), meta['tfidf_shape'], mmap_mode),
+            "features": load_csr(self._file('features'), meta['features_shape'], mmap_mode),
+            "num_features": np.load(self._file('num_features.npy'), mmap_mode='r')
+        }
+
+
+if __name__ == '__main__':
+    # Build step: python -m utils.feature_store (from the Travel directory)
+    from .recommender import TravelRecommender
+    start = time.perf_counter()
+    recommender = TravelRecommender(rebuild_features=True)
+    print(f"Built feature store with {len(recommender.df)} destinations in {time.perf_counter() - start:.2f}s")
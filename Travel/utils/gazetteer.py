@@ -0,0 +1,88 @@
+import csv
+import re
+import unicodedata
+
+
+def normalize_name(name):
+    # "  São Paulo " -> "sao paulo", "Washington, D.C." -> "washington dc"
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^\w\s]', '', text.casefold())
+    return ' '.join(text.split())
+
+
+class Gazetteer:
+    # In-memory place index: normalized city name / alias, ISO country code or country
+    # name -> {"city", "country", "country_code", "lat", "lng", "iata"}.
+    # The first source to add a place wins its coordinates; later sources can only fill
+    # in a missing IATA code and add aliases.
+    def __init__(self):
+        self._by_name = {}
+        self._by_code = {}
+        self._by_country = {}
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, city, country, country_code, lat, lng, iata=None, aliases=()):
+        key = normalize_name(city)
+        if not key:
+            return None
+        entry = self._by_name.get(key)
+        if entry is None:
+            entry = {
+                "city": city,
+                "country": country,
+                "country_code": country_code,
+                "lat": lat,
+                "lng": lng,
+                "iata": iata or None
+            }
+            self._by_name[key] = entry
+            self.entries.append(entry)
+        elif not entry['iata'] and iata:
+            entry['iata'] = iata
+
+        for alias in aliases:
+            self._by_name.setdefault(normalize_name(alias), entry)
+        if country_code:
+            self._by_code.setdefault(str(country_code).upper(), entry)
+        if country:
+            self._by_country.setdefault(normalize_name(country), entry)
+        return entry
+
+    def add_destinations(self, df):
+        # Destination rows (capital per country) from DestinationLoader
+        for row in df[['city', 'country', 'country_code', 'lat', 'lng']].itertuples(index=False):
+            if row.city != 'Unknown':
+                self.add(row.city, row.country, row.country_code, row.lat, row.lng)
+
+    def load_csv(self, path):
+        # Columns: city,country,country_code,lat,lng,iata,aliases (aliases separated by "|")
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                aliases = [a for a in (row.get('aliases') or '').split('|') if a]
+                self.add(
+                    row['city'], row.get('country'), row.get('country_code'),
+                    float(row['lat']), float(row['lng']), row.get('iata'), aliases
+                )
+
+    def names(self):
+        # (normalized name or alias, entry) for every searchable city name
+        return list(self._by_name.items())
+
+    def lookup(self, query):
+        if not query:
+            return None
+        key = normalize_name(query)
+        entry = self._by_name.get(key)
+        if entry is None and len(key) == 2:
+            entry = self._by_code.get(key.upper())
+        if entry is None:
+            entry = self._by_country.get(key)
+        return entry
+
+    def iata(self, query):
+        entry = self.lookup(query)
+        return entry['iata'] if entry else None
@@ -0,0 +1,117 @@
+import math
+import numpy as np
+
+# Above this many (visited set, last stop) states the exact search gives way to a beam search
+EXACT_STATE_LIMIT = 250000
+# States kept per route length by the beam search
+BEAM_WIDTH = 2000
+
+
+def exact_state_count(n, stops):
+    # States Held-Karp goes through choosing `stops` of n: sum over lengths j of C(n, j) * j
+    return sum(math.comb(n, j) * j for j in range(1, stops + 1))
+
+
+def _extra_cost(masks, extra_daily, extra_days):
+    # Days that don't split evenly go to the cheapest stops of each route's set
+    if extra_days == 0 or len(masks) == 0:
+        return np.zeros(len(masks))
+    n = len(extra_daily)
+    members = ((masks[:, None] >> np.arange(n, dtype=np.uint64)[None, :]) & np.uint64(1)).astype(bool)
+    daily = np.where(members, extra_daily[None, :], np.inf)
+    return np.partition(daily, extra_days - 1, axis=1)[:, :extra_days].sum(axis=1)
+
+
+class RoutePlanner:
+    # Cheapest ordered route through exactly `stops` of n candidate stops:
+    #   legs[i, j]    cost of flying stop i -> stop j
+    #   outbound[j]   origin -> stop j; inbound[i] stop i -> origin (zeros for one-way trips)
+    #   stays[j]      cost of the evenly split days at stop j
+    #   extra_daily   cost of one more day at each stop; the extra_days left over from the even
+    #                 split go to the cheapest stops of the chosen set
+    # The search grows routes one stop at a time, keeping the cheapest route per (visited set,
+    # last stop) like Held-Karp. States whose cost plus a completion lower bound exceeds the
+    # best known route (greedy to start with) are pruned (branch and bound). Above
+    # EXACT_STATE_LIMIT states only the BEAM_WIDTH most promising per length are kept.
+    def __init__(self, legs, outbound, inbound, stays, extra_daily, extra_days=0):
+        self.legs = np.array(legs, dtype=float)
+        np.fill_diagonal(self.legs, np.inf)
+        self.outbound = np.asarray(outbound, dtype=float)
+        self.inbound = np.asarray(inbound, dtype=float)
+        self.stays = np.asarray(stays, dtype=float)
+        self.extra_daily = np.asarray(extra_daily, dtype=float)
+        self.extra_days = int(extra_days)
+        self.n = len(self.stays)
+        self.bits = np.uint64(1) << np.arange(self.n, dtype=np.uint64)
+        # Ingredients of the completion lower bound
+        self.min_out = self.legs.min(axis=1) if self.n > 1 else np.zeros(self.n)
+        self.min_leg = float(self.min_out.min()) if self.n > 1 else 0.0
+        self.min_stay = float(self.stays.min()) if self.n else 0.0
+        self.min_in = float(self.inbound.min()) if self.n else 0.0
+
+    def _bound(self, last, remaining):
+        # Cheapest possible cost still to come for routes ending at `last`
+        if remaining == 0:
+            return self.inbound[last]
+        return self.min_out[last] + (remaining - 1) * self.min_leg + remaining * self.min_stay + self.min_in
+
+    def _total(self, route):
+        cost = self.outbound[route[0]] + self.stays[route].sum() + self.inbound[route[-1]]
+        cost += sum(self.legs[a, b] for a, b in zip(route, route[1:]))
+        mask = np.array([sum(int(self.bits[i]) for i in route)], dtype=np.uint64)
+        return float(cost + _extra_cost(mask, self.extra_daily, self.extra_days)[0])
+
+    def greedy(self, stops):
+        # Cheapest next stop each time; the first upper bound for pruning
+        route = [int(np.argmin(self.outbound + self.stays))]
+        while len(route) < stops:
+            step = self.legs[route[-1]] + self.stays
+            step[route] = np.inf
+            route.append(int(np.argmin(step)))
+        return self._total(route), route
+
+    def plan(self, stops, beam_width=None):
+        # Returns (cost, route as stop indices, info); (None, None, info) with fewer than `stops` stops
+        exact = exact_state_count(self.n, stops) <= EXACT_STATE_LIMIT if beam_width is None else False
+        beam_width = None if exact else (beam_width or BEAM_WIDTH)
+        info = {"method": "held_karp" if exact else "beam", "exact": exact, "states": 0}
+        if stops < 1 or self.n < stops:
+            return None, None, info
+        best_cost, best_route = self.greedy(stops)
+
+        mask = self.bits.copy()
+        last = np.arange(self.n)
+        cost = self.outbound + self.stays
+        layers = [(mask, last, np.full(self.n, -1))]
+        for length in range(2, stops + 1):
+            # Branch and bound: drop routes that can't beat the best known one
+            alive = cost + self._bound(last, stops - length + 1) <= best_cost
+            mask, last, cost = mask[alive], last[alive], cost[alive]
+            parent = np.flatnonzero(alive)
+
+            state, nxt = np.nonzero((mask[:, None] & self.bits[None, :]) == 0)
+            new_mask = mask[state] | self.bits[nxt]
+            new_cost = cost[state] + self.legs[last[state], nxt] + self.stays[nxt]
+            # Held-Karp merge: one route per (visited set, last stop), the cheapest
+            order = np.lexsort((new_cost, nxt, new_mask))
+            keep = np.ones(len(order), dtype=bool)
+            keep[1:] = (new_mask[order][1:] != new_mask[order][:-1]) | (nxt[order][1:] != nxt[order][:-1])
+            order = order[keep]
+            if beam_width is not None and len(order) > beam_width:
+                promise = new_cost[order] + self._bound(nxt[order], stops - length)
+                order = order[np.argsort(promise, kind='stable')[:beam_width]]
+            mask, last, cost = new_mask[order], nxt[order], new_cost[order]
+            layers.append((mask, last, parent[state[order]]))
+            info['states'] += len(order)
+
+        totals = cost + self.inbound[last] + _extra_cost(mask, self.extra_daily, self.extra_days)
+        if len(totals):
+            i = int(np.argmin(totals))
+            if totals[i] < best_cost:
+                # Walk the parent pointers back to the first stop
+                route = []
+                for layer_mask, layer_last, layer_parent in reversed(layers):
+                    route.append(int(layer_last[i]))
+                    i = int(layer_parent[i])
+                best_cost, best_route = float(totals.min()), route[::-1]
+        return best_cost, best_route, info
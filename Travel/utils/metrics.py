@@ -0,0 +1,260 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+import requests
+from .cache import cache_stats
+from .circuit import STATE_CODES, breaker, breaker_stats, is_failure
+
+# Set METRICS=0 to turn recording off (spans and upstream counters become no-ops)
+ENABLED = os.getenv('METRICS', '1') != '0'
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HELP = {
+    "travel_stage_seconds": ("histogram", "Time spent in each recommendation stage"),
+    "travel_request_seconds": ("histogram", "Request latency per endpoint"),
+    "travel_upstream_seconds": ("histogram", "Upstream API call latency per client"),
+    "travel_upstream_calls_total": ("counter", "Upstream API calls per client"),
+    "travel_upstream_errors_total": ("counter", "Upstream API calls that failed, timeouts excluded"),
+    "travel_upstream_timeouts_total": ("counter", "Upstream API calls that timed out"),
+    "travel_upstream_fallbacks_total": ("counter", "Fallback values served instead of upstream data"),
+    "travel_refresh_total": ("counter", "Background refresh runs per job and outcome"),
+    "travel_refresh_seconds": ("histogram", "Background refresh duration per job")
+}
+
+# (stage, seconds) recorded for the current request, when Server-Timing was asked for
+_timings = ContextVar('timings', default=None)
+
+
+class Histogram:
+    # Recording is a bare list.append (atomic, no lock); samples are folded into the buckets
+    # in batches, when enough have piled up or when the histogram is read
+    FOLD_EVERY = 512
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        self._pending.append(value)
+        if len(self._pending) >= self.FOLD_EVERY:
+            self._fold()
+
+    def _fold(self):
+        with self._lock:
+            # Consume a prefix in place so appends that race with the fold are kept
+            n = len(self._pending)
+            values = self._pending[:n]
+            del self._pending[:n]
+            for value in values:
+                # bisect_left puts a value equal to a bound in that bound's bucket (Prometheus `le`)
+                self.counts[bisect_left(self.buckets, value)] += 1
+                self.sum += value
+            self.count += n
+
+    def snapshot(self):
+        self._fold()
+        with self._lock:
+            return list(self.counts), self.sum, self.count, self.buckets
+
+
+class Metrics:
+    # Counters and histograms keyed on (name, labels); labels is a tuple of (key, value) pairs
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def histogram(self, name, labels):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name, labels, value):
+        self.histogram(name, labels).observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+        _stage_histograms.clear()
+
+    def render(self):
+        # Prometheus text exposition format
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+        histograms = [(key, h.snapshot()) for key, h in histograms]
+        lines = []
+        described = set()
+
+        def describe(name, default_type):
+            if name not in described:
+                described.add(name)
+                kind, text = HELP.get(name, (default_type, name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(buckets + ('+Inf',), counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def _after_fork():
+    # Locks a parent thread held at fork time would stay held forever in the child
+    METRICS._lock = threading.Lock()
+    for histogram in list(METRICS.histograms.values()):
+        histogram._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def inc(name, amount=1, **labels):
+    if ENABLED:
+        METRICS.inc(name, tuple(labels.items()), amount)
+
+
+def observe(name, value, **labels):
+    if ENABLED:
+        METRICS.observe(name, tuple(labels.items()), value)
+
+
+# stage -> its travel_stage_seconds histogram, skipping the label tuple on the hot path
+_stage_histograms = {}
+
+
+class span:
+    # with span('weather'): ...  -> travel_stage_seconds{stage="weather"}, plus a
+    # Server-Timing entry when the current request asked for one
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            elapsed = time.perf_counter() - self.start
+            histogram = _stage_histograms.get(self.stage)
+            if histogram is None:
+                histogram = _stage_histograms[self.stage] = METRICS.histogram('travel_stage_seconds', (('stage', self.stage),))
+            histogram.observe(elapsed)
+            timings = _timings.get()
+            if timings is not None:
+                timings.append((self.stage, elapsed))
+        return False
+
+
+class upstream_call:
+    # with upstream_call('weather') as call: response = session.get(..., timeout=call.timeout(5))
+    # Goes through the circuit breaker of the client's endpoint (CircuitOpenError instead of a
+    # call while it is open) and counts the call, its latency and whether it failed or timed
+    # out; exceptions propagate. Endpoints of one client with different latencies get their own
+    # breaker: upstream_call('amadeus', 'token').
+    __slots__ = ('labels', 'start', 'breaker')
+
+    def __init__(self, client, endpoint=None):
+        self.labels = (('client', client),)
+        self.breaker = breaker(f"{client}/{endpoint}" if endpoint else client)
+
+    def __enter__(self):
+        self.breaker.before_call()
+        self.start = time.perf_counter()
+        return self
+
+    def timeout(self, default):
+        # Per-call timeout adapted to the upstream's recent latency, at most `default`
+        return self.breaker.timeout(default)
+
+    def __exit__(self, exc_type, exc, tb):
+        timed_out = exc_type is not None and issubclass(exc_type, requests.Timeout)
+        self.breaker.record(time.perf_counter() - self.start, is_failure(exc_type, exc), timed_out)
+        if ENABLED:
+            METRICS.observe('travel_upstream_seconds', self.labels, time.perf_counter() - self.start)
+            METRICS.inc('travel_upstream_calls_total', self.labels)
+            if exc_type is not None:
+                failure = 'timeouts' if timed_out else 'errors'
+                METRICS.inc(f'travel_upstream_{failure}_total', self.labels)
+        return False
+
+
+def fallback(client):
+    inc('travel_upstream_fallbacks_total', client=client)
+
+
+def start_timing():
+    # Collect this request's spans for a Server-Timing header
+    _timings.set([])
+
+
+def server_timing(total=None):
+    # "currency;dur=0.41, weather;dur=12.80, total;dur=14.02" (milliseconds)
+    entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in _timings.get() or ()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def render_prometheus():
+    # Application metrics plus the TTLCache counters
+    lines = [METRICS.render()]
+    gauges = ("size", "maxsize")
+    stats = cache_stats()
+    for field in ("size", "maxsize", "hits", "stale_hits", "misses", "evictions", "refreshes"):
+        name = f"travel_cache_{field}" if field in gauges else f"travel_cache_{field}_total"
+        lines.append(f"# HELP {name} TTLCache {field.replace('_', ' ')}")
+        lines.append(f"# TYPE {name} {'gauge' if field in gauges else 'counter'}")
+        for cache, values in sorted(stats.items()):
+            lines.append(f'{name}{{cache="{cache}"}} {values[field]}')
+
+    # Circuit breaker per upstream endpoint
+    breakers = sorted(breaker_stats().items())
+    for name, kind, text, value in (
+        ("travel_circuit_state", "gauge", "Circuit state (0 closed, 1 half-open, 2 open)", lambda b: STATE_CODES[b['state']]),
+        ("travel_circuit_timeout_seconds", "gauge", "Adaptive upstream timeout before the client cap", lambda b: b['adaptive_timeout']),
+        ("travel_circuit_rejected_total", "counter", "Calls rejected by an open circuit", lambda b: b['rejected']),
+        ("travel_circuit_opened_total", "counter", "Times the circuit opened", lambda b: b['opened'])
+    ):
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for upstream, values in breakers:
+            if value(values) is not None:
+                lines.append(f'{name}{{upstream="{upstream}"}} {value(values)}')
+    return "\n".join(lines) + "\n"
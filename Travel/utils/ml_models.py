@@ -3,17 +3,59 @@ import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import LabelEncoder
+import hashlib
 import math
+import os
+import pickle
+import time
 import warnings
 import urllib3
+from .model_registry import ModelRegistry
+from .feature_store import artifact_lock
+from .fast_inference import LinearEvaluator, ForestTableEvaluator, max_abs_error
 
 # Suppress Warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+REGIONS = ['Europe', 'Asia', 'Americas', 'Africa', 'Oceania']
+
+
+def synthesize_training_data(region_encoder, rng, n=500):
+    # Vectorized synthetic data for both models; same formulas as the original per-row loops
+    regions = np.array(REGIONS)
+
+    # --- 1. Flight prices (Random Forest) ---
+    dist = rng.integers(200, 15000, size=n)
+    region = rng.choice(regions, size=n)
+    is_peak = rng.integers(0, 2, size=n)
+    # Synthetic Formula: Base + (0.1 * dist) + Peak_Multiplier + Region_Variance
+    price = 50 + (0.08 * dist) + (100 * is_peak)
+    price = price + np.where(region == 'Oceania', 200, 0) + np.where(region == 'Africa', 150, 0)
+    # Add noise
+    price = price + rng.normal(0, 50, size=n)
+    df_flight = pd.DataFrame({
+        'dist': dist, 'region': region_encoder.transform(region), 'peak': is_peak, 'price': price
+    })
+
+    # --- 2. Daily costs (Linear Regression) ---
+    region = rng.choice(regions, size=n)
+    pop_scale = rng.integers(1, 100, size=n) # 1m to 100m equivalent
+    safety = rng.uniform(0, 5, size=n) # 0 is safe, 5 is unsafe
+    # Formula: Base + Region + Pop - Safety_Penalty
+    base = pd.Series(region).map({'Europe': 120, 'Americas': 100, 'Asia': 60}).fillna(50).to_numpy()
+    cost = np.maximum(20, base + (0.5 * pop_scale) - (5 * safety)) # Min floor
+    df_cost = pd.DataFrame({
+        'region': region_encoder.transform(region), 'pop': pop_scale, 'safety': safety, 'cost': cost
+    })
+    return df_flight, df_cost
+
+
 class HybridMLEngine:
-    def __init__(self):
-        self.rf_flight_model = RandomForestRegressor(n_estimators=50, random_state=42)
+    def __init__(self, seed=42, registry=None, retrain=False, fast_inference=None, fast_tolerance=0.5):
+        self.seed = seed
+        self.regions = REGIONS
+        self.rf_flight_model = RandomForestRegressor(n_estimators=50, random_state=seed)
         self.lr_cost_model = LinearRegression()
         self.region_encoder = LabelEncoder()
         
@@ -21,56 +63,103 @@ class HybridMLEngine:
         self.flight_features = ['dist', 'region', 'peak']
         self.cost_features = ['region', 'pop', 'safety']
         
-        # We need to train on initialization
-        self._train_models()
+        self.registry = registry or ModelRegistry()
+        self._init_models(retrain)
+
+        # Optional pure-NumPy evaluators in place of sklearn predict()
+        self.fast_inference = False
+        self.fast_tolerance = fast_tolerance # Max abs difference from sklearn, in USD
+        if fast_inference is None:
+            fast_inference = os.getenv('FAST_INFERENCE') == '1'
+        if fast_inference:
+            self.enable_fast_inference()
+
+    def _init_models(self, retrain):
+        # Load the published models, or train (deterministically) and publish them
+        with artifact_lock(self.registry.path):
+            if not retrain and self.registry.is_current(self):
+                try:
+                    self._load_models(self.registry.load())
+                    return
+                except Exception as e:
+                    print(f"Model registry unreadable, retraining: {e}")
+
+            start = time.perf_counter()
+            self._train_models()
+            try:
+                self.registry.save(self, time.perf_counter() - start)
+            except Exception as e:
+                print(f"Could not save models: {e}")
+
+    def models(self):
+        # The fitted models, as published to the registry
+        return {
+            "rf_flight_model": self.rf_flight_model,
+            "lr_cost_model": self.lr_cost_model,
+            "region_encoder": self.region_encoder
+        }
+
+    def model_digest(self):
+        # Hash of the fitted models: changes whenever they are retrained or replaced
+        return hashlib.sha256(pickle.dumps(self.models())).hexdigest()
+
+    def _load_models(self, models):
+        self.rf_flight_model = models['rf_flight_model']
+        self.lr_cost_model = models['lr_cost_model']
+        self.region_encoder = models['region_encoder']
+        self._region_index = {r: i for i, r in enumerate(self.region_encoder.classes_)}
 
     def _train_models(self):
-        # ... (rest of the method stays same)
-        regions = ['Europe', 'Asia', 'Americas', 'Africa', 'Oceania']
-        self.region_encoder.fit(regions)
-        
-        flight_data = []
-        for _ in range(500):
-            dist = np.random.randint(200, 15000)
-            region = np.random.choice(regions)
-            region_code = self.region_encoder.transform([region])[0]
-            is_peak = np.random.choice([0, 1])
-            
-            # Synthetic Formula: Base + (0.1 * dist) + Peak_Multiplier + Region_Variance
-            price = 50 + (0.08 * dist) + (100 * is_peak) 
-            if region == 'Oceania': price += 200
-            if region == 'Africa': price += 150
-            
-            # Add noise
-            price += np.random.normal(0, 50)
-            
-            flight_data.append([dist, region_code, is_peak, price])
-            
-        df_flight = pd.DataFrame(flight_data, columns=self.flight_features + ['price'])
+        self.region_encoder.fit(self.regions)
+        self._region_index = {r: i for i, r in enumerate(self.region_encoder.classes_)}
+        rng = np.random.default_rng(self.seed)
+        df_flight, df_cost = synthesize_training_data(self.region_encoder, rng)
         self.rf_flight_model.fit(df_flight[self.flight_features], df_flight['price'])
-
-        # --- 2. Synthesize Data for Daily Costs (Linear Regression) ---
-        cost_data = []
-        for _ in range(500):
-            region = np.random.choice(regions)
-            region_code = self.region_encoder.transform([region])[0]
-            pop_scale = np.random.randint(1, 100) # 1m to 100m equivalent
-            safety = np.random.uniform(0, 5) # 0 is safe, 5 is unsafe
-            
-            # Formula: Base + Region + Pop - Safety_Penalty
-            base = 50
-            if region == 'Europe': base = 120
-            if region == 'Americas': base = 100
-            if region == 'Asia': base = 60
-            
-            cost = base + (0.5 * pop_scale) - (5 * safety)
-            cost = max(20, cost) # Min floor
-            
-            cost_data.append([region_code, pop_scale, safety, cost])
-            
-        df_cost = pd.DataFrame(cost_data, columns=self.cost_features + ['cost'])
         self.lr_cost_model.fit(df_cost[self.cost_features], df_cost['cost'])
 
+    def _validation_inputs(self):
+        # Covers the whole input domain recommend() can produce, with peak fixed at 1
+        codes = np.arange(len(self.regions))
+        dist, region = np.meshgrid(np.arange(0, 20025, 25), codes)
+        X_flight = np.column_stack([dist.ravel(), region.ravel(), np.ones(dist.size)])
+        region, pop, safety = np.meshgrid(codes, np.linspace(0, 100, 101), np.linspace(0, 5, 21))
+        X_cost = np.column_stack([region.ravel(), pop.ravel(), safety.ravel()])
+        return X_flight, X_cost
+
+    def enable_fast_inference(self, tolerance=None):
+        # Export both models to NumPy and switch to them if they agree with sklearn
+        tolerance = self.fast_tolerance if tolerance is None else tolerance
+        # recommend() always predicts with peak=1, so the forest becomes a per-region table over distance
+        flight = ForestTableEvaluator(
+            self.rf_flight_model, continuous=0, categorical=1,
+            categories=range(len(self.region_encoder.classes_)), fixed={2: 1}
+        )
+        cost = LinearEvaluator(self.lr_cost_model)
+        X_flight, X_cost = self._validation_inputs()
+        self.fast_inference_errors = {
+            "flight": max_abs_error(flight, self.rf_flight_model, pd.DataFrame(X_flight, columns=self.flight_features)),
+            "daily": max_abs_error(cost, self.lr_cost_model, pd.DataFrame(X_cost, columns=self.cost_features))
+        }
+        if max(self.fast_inference_errors.values()) > tolerance:
+            print(f"Fast inference disabled, error above {tolerance}: {self.fast_inference_errors}")
+            self.fast_inference = False
+            return False
+        self._fast_flight = flight
+        self._fast_cost = cost
+        self.fast_inference = True
+        return True
+
+    def _predict_flight_prices(self, X):
+        if self.fast_inference:
+            return self._fast_flight.predict(X)
+        # Use DataFrame for prediction to avoid feature name warnings
+        return self.rf_flight_model.predict(pd.DataFrame(X, columns=self.flight_features))
+
+    def _predict_daily_costs(self, X):
+        if self.fast_inference:
+            return self._fast_cost.predict(X)
+        return self.lr_cost_model.predict(pd.DataFrame(X, columns=self.cost_features))
+
     def haversine_distance(self, lat1, lon1, lat2, lon2):
         R = 6371 # Earth radius in km
         phi1, phi2 = math.radians(lat1), math.radians(lat2)
@@ -81,32 +170,73 @@ class HybridMLEngine:
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         return R * c
 
+    def haversine_distances(self, lat1, lon1, lat2, lon2):
+        # Vectorized version of haversine_distance (any argument may be an array)
+        R = 6371
+        lat1, lon1 = np.asarray(lat1, dtype=float), np.asarray(lon1, dtype=float)
+        lat2, lon2 = np.asarray(lat2, dtype=float), np.asarray(lon2, dtype=float)
+        phi1, phi2 = np.radians(lat1), np.radians(lat2)
+        dphi = np.radians(lat2 - lat1)
+        dlambda = np.radians(lon2 - lon1)
+
+        a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlambda/2)**2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+        return R * c
+
+    def _region_code(self, region):
+        # Same result as region_encoder.transform([...])[0] without sklearn's per-call validation
+        return self._region_index[self._clean_region(region)]
+
+    def _clean_region(self, region):
+        # Handle region encoding safely
+        if region in self.region_encoder.classes_:
+            return region
+        if 'America' in region:
+            return 'Americas'
+        return 'Europe' # Fallback
+
+    def _region_codes(self, regions):
+        # Encode a whole column at once, cleaning each distinct value only once
+        uniques, inverse = np.unique(np.asarray(regions, dtype=object).astype(str), return_inverse=True)
+        return np.array([self._region_code(r) for r in uniques], dtype=int)[inverse]
+
     def predict_flight_cost(self, origin_lat, origin_lng, dest_lat, dest_lng, region):
         dist = self.haversine_distance(origin_lat, origin_lng, dest_lat, dest_lng)
+        region_code = self._region_code(region)
         
-        # Handle region encoding safely
-        region_clean = region
-        if region not in self.region_encoder.classes_:
-            if 'America' in region: region_clean = 'Americas'
-            else: region_clean = 'Europe' # Fallback
-            
-        region_code = self.region_encoder.transform([region_clean])[0]
-        
-        # Use DataFrame for prediction to avoid feature name warnings
-        X = pd.DataFrame([[dist, region_code, 1]], columns=self.flight_features)
-        prediction = self.rf_flight_model.predict(X)[0]
+        prediction = self._predict_flight_prices(np.array([[dist, region_code, 1]], dtype=float))[0]
         return max(50, int(prediction))
 
     def predict_daily_cost(self, region, population, safety_score):
-        region_clean = region
-        if region not in self.region_encoder.classes_:
-            if 'America' in region: region_clean = 'Americas'
-            else: region_clean = 'Europe'
-            
-        region_code = self.region_encoder.transform([region_clean])[0]
+        region_code = self._region_code(region)
         pop_scale = min(100, population / 1000000) # Scale down
         
-        # Use DataFrame for prediction to avoid feature name warnings
-        X = pd.DataFrame([[region_code, pop_scale, safety_score]], columns=self.cost_features)
-        prediction = self.lr_cost_model.predict(X)[0]
+        prediction = self._predict_daily_costs(np.array([[region_code, pop_scale, safety_score]], dtype=float))[0]
         return max(30, int(prediction))
+
+    # --- Batch API (one predict call per model for a whole candidate frame) ---
+
+    def predict_flight_costs(self, origin_lat, origin_lng, df):
+        # df needs 'lat', 'lng' and 'continent' columns
+        if len(df) == 0:
+            return np.zeros(0, dtype=int)
+        dist = self.haversine_distances(origin_lat, origin_lng, df['lat'].to_numpy(), df['lng'].to_numpy())
+        return self.flight_costs_from_distances(dist, self._region_codes(df['continent'].to_numpy()))
+
+    def flight_costs_from_distances(self, dist, region_codes):
+        # dist in km and encoded destination regions (see _region_codes), any matching shapes
+        dist = np.asarray(dist, dtype=float)
+        X = np.column_stack([dist.ravel(), np.broadcast_to(region_codes, dist.shape).ravel(), np.ones(dist.size)])
+        predictions = self._predict_flight_prices(X).reshape(dist.shape)
+        return np.maximum(50, np.trunc(predictions).astype(int))
+
+    def predict_daily_costs(self, df, safety_scores):
+        # df needs 'continent' and 'population' columns; safety_scores aligns with df rows
+        if len(df) == 0:
+            return np.zeros(0, dtype=int)
+        pop_scale = np.minimum(100, df['population'].to_numpy(dtype=float) / 1000000)
+        X = np.column_stack([
+            self._region_codes(df['continent'].to_numpy()), pop_scale, np.asarray(safety_scores, dtype=float)
+        ])
+        predictions = self._predict_daily_costs(X)
+        return np.maximum(30, np.trunc(predictions).astype(int))
@@ -0,0 +1,72 @@
+import json
+import os
+import pickle
+import time
+import sklearn
+from .feature_store import make_temp_dir, swap_in
+
+# Bump when the synthetic data, model types or feature schema change
+MODEL_VERSION = 1
+
+
+class ModelRegistry:
+    # Fitted HybridMLEngine models saved once and loaded by every worker. Layout:
+    #   metadata.json   version, seed, feature schema, sklearn version
+    #   models.pkl      fitted RandomForest, LinearRegression and region encoder
+    def __init__(self, path='data/artifacts/models'):
+        self.path = path
+
+    def _file(self, name, root=None):
+        return os.path.join(root or self.path, name)
+
+    def metadata(self):
+        try:
+            with open(self._file('metadata.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return None
+
+    def schema_for(self, engine):
+        return {
+            "flight_features": list(engine.flight_features),
+            "cost_features": list(engine.cost_features),
+            "regions": list(engine.regions)
+        }
+
+    def is_current(self, engine):
+        meta = self.metadata()
+        return (
+            meta is not None
+            and meta.get('version') == MODEL_VERSION
+            and meta.get('seed') == engine.seed
+            and meta.get('schema') == self.schema_for(engine)
+            # Pickled estimators are only safe to load under the version that wrote them
+            and meta.get('sklearn_version') == sklearn.__version__
+        )
+
+    def save(self, engine, train_seconds):
+        tmp = make_temp_dir(self.path)
+        with open(self._file('models.pkl', tmp), 'wb') as f:
+            pickle.dump(engine.models(), f)
+        with open(self._file('metadata.json', tmp), 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MODEL_VERSION,
+                "seed": engine.seed,
+                "schema": self.schema_for(engine),
+                "sklearn_version": sklearn.__version__,
+                "trained_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "train_seconds": round(train_seconds, 3)
+            }, f, indent=2)
+        swap_in(tmp, self.path)
+
+    def load(self):
+        with open(self._file('models.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+
+if __name__ == '__main__':
+    # Train and publish: python -m utils.model_registry (from the Travel directory)
+    from .ml_models import HybridMLEngine
+    start = time.perf_counter()
+    HybridMLEngine(retrain=True)
+    print(f"Trained and saved models in {time.perf_counter() - start:.2f}s")
@@ -1,27 +1,207 @@
+import functools
+import heapq
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
+from scipy import sparse
 from .api_clients import WeatherClient, SafetyClient, CurrencyClient
 from .destinations_data import DestinationLoader
 from .ml_models import HybridMLEngine
+from .feature_store import FeatureStore, artifact_lock
+from .gazetteer import Gazetteer, normalize_name
+from .cache import TTLCache
+from .cost_matrix import CostMatrix
+from .metrics import span
+from .spatial import SpatialIndex, flight_hours_to_km, km_to_flight_hours
+from .itinerary import RoutePlanner
+from .budget_index import BudgetIndex
+
+# Destinations added to the gazetteer (largest first) when the dataset is bigger than this
+GAZETTEER_MAX_DESTINATIONS = 20000
+# Above origins x destinations cells the cost matrix isn't built and flights are predicted per request
+MAX_MATRIX_CELLS = 50000000
+# Weather is fetched in batches of this many rows, best possible score first
+WEATHER_BATCH = 64
+# Cheapest single-stop trips considered as itinerary stops
+ITINERARY_CANDIDATES = 40
+# recommend_many() only spreads work over processes for batches at least this big
+BATCH_PROCESS_MIN = 200
+# recommend() scores only destinations whose lower-bound cost fits the budget rounded up to a
+# power of this, so nearby budgets share one scored set
+BUDGET_CEILING_STEP = 2
+# Seconds a scored set is cached when some of its safety scores are fallbacks (advisory API
+# down or its circuit open), so real scores replace them soon after the upstream recovers
+DEGRADED_RESULT_TTL = 30
+# recommend() defaults, filled into recommend_many() queries
+QUERY_DEFAULTS = {
+    "currency": 'USD', "origin_city": 'London', "vibe": None, "top_k": 50, "cursor": 0, "page_size": 4,
+    "max_distance_km": None, "max_flight_hours": None
+}
+
+# Recommender of a recommend_many() worker process, set by _init_pool_worker
+_pool_recommender = None
+
+
+def _init_pool_worker(recommender):
+    # Runs in each forked worker; the recommender comes from the pool's own initargs (inherited
+    # through fork, never pickled), so concurrent pools can't see each other's
+    global _pool_recommender
+    _pool_recommender = recommender
+
+
+def _recommend_chunk(args):
+    queries, rates = args
+    return _pool_recommender._recommend_batch(queries, rates)
+
+def same_frame(a, b):
+    # Same rows and values, whatever the column dtypes (stored frames come back memory-mapped/categorical)
+    return (
+        a.shape == b.shape and list(a.columns) == list(b.columns)
+        and a.reset_index(drop=True).astype(object).equals(b.reset_index(drop=True).astype(object))
+    )
 
 class TravelRecommender:
-    def __init__(self):
+    def __init__(self, feature_store=None, rebuild_features=False, response_cache=None, cost_matrix=None, frame=None,
+                 ml_engine=None):
+        # frame: an already fetched destination frame to build from (see refreshed)
         self.weather_client = WeatherClient()
         self.safety_client = SafetyClient()
         self.currency_client = CurrencyClient()
         self.loader = DestinationLoader()
-        self.ml_engine = HybridMLEngine()
-        
+        self.ml_engine = ml_engine or HybridMLEngine()
+        self.feature_store = feature_store or FeatureStore()
+        # Scored candidate sets per normalized query; any backend with get_or_load(key, loader, ttl_of)/invalidate/stats works
+        self.response_cache = response_cache or TTLCache('recommend', ttl=900, maxsize=512)
+        self.data_version = 0
+        inputs = self.loader.input_paths()
+
+        # Load the prebuilt artifact when its inputs are unchanged, otherwise build it
+        with artifact_lock(self.feature_store.path):
+            loaded = False
+            if frame is None and not rebuild_features and self.feature_store.is_current(inputs):
+                try:
+                    self._load_features(self.feature_store.load())
+                    loaded = True
+                except Exception as e:
+                    print(f"Feature store unreadable, rebuilding: {e}")
+            if not loaded:
+                self._build_features(inputs, frame)
+
+        self.gazetteer = self._build_gazetteer()
+        self.city_rows = self._build_city_rows()
+        self.spatial = SpatialIndex(self.df)
+        self.budget_index = BudgetIndex(self.df, self.ml_engine)
+        self.cost_matrix = cost_matrix or CostMatrix()
+        self._prepare_cost_matrix()
+
+    def _build_features(self, inputs, frame=None):
+        start = time.perf_counter()
         # Load and Cache Data
-        self.destinations_data = self.loader.fetch_data()
-        self.df = pd.DataFrame(self.destinations_data)
+        self.df = self.loader.fetch_frame() if frame is None else frame
         
         # Initialize ML Models
         self._train_models()
 
+        if not self.df.empty:
+            try:
+                self.feature_store.save(
+                    self.df, self.tfidf, self.scaler, self.tfidf_matrix, self.num_features, self.features,
+                    inputs, time.perf_counter() - start
+                )
+            except Exception as e:
+                print(f"Could not write feature store: {e}")
+
+    def refreshed(self):
+        # A new recommender over freshly fetched destinations (TF-IDF, NN, gazetteer, spatial
+        # index and cost matrix all rebuilt, except that a cost matrix whose destinations were
+        # only appended to gets just the new columns), or None when nothing changed. This
+        # instance is left untouched so requests already running on it finish on consistent
+        # data; the caller swaps the new one in. Clients (and their snapshots), the fitted models
+        # and the result cache are shared, and the bumped data_version keeps results of the old
+        # data out of the cache.
+        df = self.loader.fetch_frame(allow_fallback=False)
+        if df.empty:
+            raise ValueError("no destinations fetched")
+        if same_frame(df, self.df):
+            return None
+        fresh = TravelRecommender(
+            feature_store=self.feature_store, response_cache=self.response_cache,
+            cost_matrix=CostMatrix(self.cost_matrix.path), frame=df, ml_engine=self.ml_engine
+        )
+        fresh.weather_client = self.weather_client
+        fresh.safety_client = self.safety_client
+        fresh.currency_client = self.currency_client
+        fresh.data_version = self.data_version + 1
+        return fresh
+
+    @property
+    def destinations_data(self):
+        # Destinations as a list of dicts (built on demand; prefer self.df)
+        return self.df.to_dict('records')
+
+    def _build_gazetteer(self):
+        # Destinations first so their coordinates win, then the local city/airport list
+        gazetteer = Gazetteer()
+        if len(self.df) > GAZETTEER_MAX_DESTINATIONS:
+            # Multi-city datasets: only the largest places, which also win shared names
+            gazetteer.add_destinations(self.df.nlargest(GAZETTEER_MAX_DESTINATIONS, 'population'))
+        elif not self.df.empty:
+            gazetteer.add_destinations(self.df)
+        try:
+            gazetteer.load_csv(self.loader.cities_path)
+        except Exception as e:
+            print(f"City list unavailable: {e}")
+        return gazetteer
+
+    def _build_city_rows(self):
+        # Normalized destination name -> its first row, for lookups by name
+        rows = {}
+        if not self.df.empty:
+            for position, city in enumerate(self.df['city'].tolist()):
+                rows.setdefault(normalize_name(city), position)
+        return rows
+
+    def _known_origins(self):
+        # Every place the gazetteer can resolve an origin to
+        return sorted({(float(e['lat']), float(e['lng'])) for e in self.gazetteer.entries})
+
+    def _prepare_cost_matrix(self):
+        # Load (or build once) the origin x destination flight-cost matrix
+        if self.df.empty:
+            return
+        origins = self._known_origins()
+        if len(origins) * len(self.df) > MAX_MATRIX_CELLS:
+            print(f"Cost matrix skipped ({len(origins)} origins x {len(self.df)} destinations), predicting per request")
+            return
+        fingerprint = CostMatrix.fingerprint(origins, self.df, self.ml_engine)
+        try:
+            with artifact_lock(self.cost_matrix.path):
+                if self.cost_matrix.is_current(fingerprint):
+                    self.cost_matrix.load()
+                elif self.cost_matrix.appendable(origins, self.df, self.ml_engine):
+                    # Destinations only appended (a refresh): extend the published matrix
+                    self.cost_matrix.add_destinations(origins, self.df, self.ml_engine, fingerprint)
+                else:
+                    self.cost_matrix.build(origins, self.df, self.ml_engine, fingerprint)
+        except Exception as e:
+            print(f"Cost matrix unavailable, predicting per request: {e}")
+            self.cost_matrix.meta = None
+
+    def _load_features(self, state):
+        self.df = state['df']
+        self.tfidf = state['tfidf']
+        self.scaler = state['scaler']
+        self.tfidf_matrix = state['tfidf_matrix']
+        self.num_features = state['num_features']
+        self._build_index(state.get('features'))
+
     def _train_models(self):
         if self.df.empty:
             return
@@ -36,130 +216,661 @@ class TravelRecommender:
         # Normalize cost and population
         self.num_features = self.scaler.fit_transform(self.df[['base_cost', 'population']])
 
+        self._build_index()
+
+    def _build_index(self, features=None):
         # 3. Combine Features
-        # Stack numerical and text features
-        # Note: TF-IDF is sparse, so we convert to array for simple concatenation 
-        # (okay for <300 countries)
-        self.features = np.hstack([self.num_features, self.tfidf_matrix.toarray()])
+        # Stack numerical and text features, keeping TF-IDF sparse so this scales past a
+        # few hundred rows. Rows are L2-normalized so a dot product is cosine similarity.
+        # A stored (possibly memory-mapped) matrix is used as is.
+        if features is None:
+            features = normalize(sparse.hstack([sparse.csr_matrix(self.num_features), self.tfidf_matrix]).tocsr())
+        self.features = features
 
         # 4. Nearest Neighbors Model
-        self.nn_model = NearestNeighbors(n_neighbors=10, metric='cosine')
+        self.nn_model = NearestNeighbors(n_neighbors=10, metric='cosine', algorithm='brute')
         self.nn_model.fit(self.features)
 
+    def _text_query_vector(self, text):
+        # Free-text "vibe" query in the same space as self.features (numeric part left at 0)
+        q = self.tfidf.transform([text])
+        return normalize(sparse.hstack([sparse.csr_matrix((1, self.num_features.shape[1])), q]).tocsr())
+
+    def _nearest(self, query, k, exclude=None):
+        # Returns [(row position, similarity)] best first
+        n = min(len(self.df), k + (1 if exclude is not None else 0))
+        if n <= 0:
+            return []
+        distances, indices = self.nn_model.kneighbors(query, n_neighbors=n)
+        matches = [(int(i), round(1 - float(d), 4)) for d, i in zip(distances[0], indices[0]) if i != exclude]
+        return matches[:k]
+
+    def _describe(self, matches):
+        rows = self.df.iloc[[i for i, _ in matches]]
+        return [
+            {
+                "city": row['city'],
+                "country": row['country'],
+                "country_code": row['country_code'],
+                "continent": row['continent'],
+                "description": row['description'],
+                "similarity": sim
+            }
+            for row, (_, sim) in zip(rows.to_dict('records'), matches)
+        ]
+
+    def similar_destinations(self, city, k=5):
+        # "More like this destination"
+        if self.df.empty:
+            return []
+        row = self.city_rows.get(normalize_name(city))
+        if row is None:
+            return []
+        return self._describe(self._nearest(self.features[row], k, exclude=row))
+
+    def search_vibe(self, text, k=10):
+        if self.df.empty or not text:
+            return []
+        return self._describe(self._nearest(self._text_query_vector(text), k))
+
+    def _radius_km(self, max_distance_km=None, max_flight_hours=None):
+        # Tightest of the two limits in km, None when neither is set
+        limits = []
+        if max_distance_km is not None:
+            limits.append(float(max_distance_km))
+        if max_flight_hours is not None:
+            limits.append(flight_hours_to_km(max_flight_hours))
+        return min(limits) if limits else None
+
+    def nearby_destinations(self, city, k=10, max_distance_km=None, max_flight_hours=None):
+        # Destinations closest to any place the gazetteer knows, optionally within a radius
+        place = self.gazetteer.lookup(city)
+        if place is None or self.df.empty:
+            return []
+        radius_km = self._radius_km(max_distance_km, max_flight_hours)
+        if radius_km is None:
+            positions, distances = self.spatial.nearest(place['lat'], place['lng'], k + 1)
+        else:
+            positions, distances = self.spatial.within(place['lat'], place['lng'], radius_km)
+            positions, distances = positions[:k + 1], distances[:k + 1]
+
+        # The place itself is not one of its neighbours
+        own_name = normalize_name(place['city'])
+        rows = self.df.iloc[positions]
+        results = []
+        for row, distance in zip(rows[['city', 'country', 'country_code', 'continent', 'lat', 'lng']].itertuples(index=False), distances.tolist()):
+            if normalize_name(row.city) == own_name:
+                continue
+            results.append({
+                "city": row.city,
+                "country": row.country,
+                "country_code": row.country_code,
+                "continent": row.continent,
+                "lat": float(str(row.lat)),
+                "lng": float(str(row.lng)),
+                "distance_km": round(distance, 1),
+                "flight_hours": round(km_to_flight_hours(distance), 1)
+            })
+        return results[:k]
+
+    def _preselect(self, eligible_df, vibe, top_k):
+        # Keep only the top_k rows most similar to the vibe text, before any expensive scoring
+        if len(eligible_df) <= top_k:
+            return eligible_df
+        rows = eligible_df.index.to_numpy()
+        sims = (self.features[rows] @ self._text_query_vector(vibe).T).toarray().ravel()
+        best = np.argpartition(-sims, top_k - 1)[:top_k]
+        return eligible_df.iloc[np.sort(best)]
+
     def _resolve_origin_coords(self, city):
-        if not self.df.empty:
-            match = self.df[self.df['city'].str.lower() == city.lower()]
-            if not match.empty:
-                return match.iloc[0]['lat'], match.iloc[0]['lng']
+        place = self.gazetteer.lookup(city)
+        if place:
+            return place['lat'], place['lng']
         return 51.5, -0.12
 
-    def recommend(self, continent, budget, days, people, currency='USD', origin_city='London'):
-        if self.df.empty:
-            return {"recommendations": [], "analysis": {"error": "No data available"}}
+    def _score_values(self, total_cost, safety_raw, weather_temp, budget_usd):
+        # Distance from ideal budget (0 is best)
+        cost_score = np.minimum(1, total_cost / budget_usd)
+        # Safety (0 is best in raw)
+        safe_score = safety_raw / 5.0
+        # Weather (25 is ideal)
+        weather_diff = np.abs(weather_temp - 25) / 20.0
 
-        # 0. Handle Currency Conversion
-        rates = self.currency_client.get_rates()
-        budget_usd = float(budget)
-        if currency != 'USD' and currency in rates:
-            budget_usd = float(budget) / rates[currency]
-        
-        # Resolve Origin
-        origin_lat, origin_lng = self._resolve_origin_coords(origin_city)
-        
-        # 1. Filter and Score Candidates
-        candidates = []
-        eligible_df = self.df[self.df['continent'] == continent].copy()
+        # Composite Score (Lower is better)
+        raw_score = (cost_score * 0.5) + (safe_score * 0.3) + (weather_diff * 0.2)
+        return np.maximum(0, (1 - raw_score) * 100)
+
+    def _rank_candidates(self, candidates, budget_usd, limit=None):
+        # Best `limit` candidates by ml_score (all of them when limit is None)
+        total_cost = np.array([c['total_cost_usd'] for c in candidates], dtype=float)
+        safety_raw = np.array([c['safety_raw'] for c in candidates], dtype=float)
+        weather_temp = np.array([float(c['weather_temp']) for c in candidates], dtype=float)
+        scores = self._score_values(total_cost, safety_raw, weather_temp, budget_usd)
+        rounded = [round(score, 1) for score in scores.tolist()]
+        for c, score in zip(candidates, rounded):
+            c['ml_score'] = score
+
+        # Bounded heap instead of a full sort; nlargest is stable, so ties keep the original row order
+        limit = len(candidates) if limit is None else limit
+        return [candidates[i] for i in heapq.nlargest(limit, range(len(candidates)), key=rounded.__getitem__)]
+
+    def _score_key(self, continent, days, people, origin_city, vibe, top_k, radius_km=None, ceiling=None):
+        # Normalized request key: the origin is reduced to the coordinates it resolves to and
+        # budget/currency are left out, since the scored set is in USD before the budget cut
+        # (only its ceiling, see _budget_ceiling)
+        return (
+            self.data_version, continent, int(days), int(people),
+            self._resolve_origin_coords(origin_city),
+            normalize_name(vibe) if vibe else None, int(top_k) if vibe else None,
+            radius_km, ceiling
+        )
+
+    def _budget_ceiling(self, budget_usd, days, people):
+        # The budget rounded up to a power of BUDGET_CEILING_STEP; None scores every destination
+        if budget_usd is None or self.budget_index is None or not budget_usd < float('inf') or min(days, people) < 1:
+            return None
+        if budget_usd <= 1:
+            return 1.0
+        return float(BUDGET_CEILING_STEP ** math.ceil(math.log(budget_usd, BUDGET_CEILING_STEP) - 1e-12))
+
+    def _eligible(self, continent, origin_lat, origin_lng, vibe, top_k, radius_km=None):
+        # (rows a query considers, message when its continent has no data)
+        eligible_df = self.df[self.df['continent'] == continent]
         
         if eligible_df.empty:
-            eligible_df = self.df.copy()
+            eligible_df = self.df
             continent_msg = f"No data for {continent}, searching globally."
         else:
             continent_msg = None
 
-        min_cost_found = float('inf')
-        rejected_count = 0
-
-        for index, row in eligible_df.iterrows():
-            # A. Safety Score
-            safety_score = self.safety_client.get_safety_score(row['country_code'])
-            
-            # B. Daily Cost (Hybrid)
-            ml_daily = self.ml_engine.predict_daily_cost(row['continent'], row['population'], safety_score)
-            final_daily_cost = (row['base_cost'] * 0.7) + (ml_daily * 0.3)
-            
-            # C. Flight Cost (ML Prediction)
-            ml_flight_cost = self.ml_engine.predict_flight_cost(
-                origin_lat, origin_lng, row['lat'], row['lng'], row['continent']
-            )
-            
+        if radius_km is not None:
+            # Spatial index lookup around the origin, then intersected with the continent
+            in_range = self.spatial.mask_within(origin_lat, origin_lng, radius_km)
+            eligible_df = eligible_df[in_range[eligible_df.index.to_numpy()]]
+
+        if vibe:
+            eligible_df = self._preselect(eligible_df, vibe, top_k)
+        return eligible_df, continent_msg
+
+    def _score_base(self, continent, origin_city, vibe, top_k, radius_km=None, bound=None):
+        # Per-destination quantities that don't depend on days/people: the eligible rows, their
+        # safety, daily cost and flight cost. bound=(days, people, ceiling) leaves out the rows
+        # whose lower-bound trip cost is over the ceiling ("pruned" counts them).
+        # Resolve Origin
+        with span('origin'):
+            origin_lat, origin_lng = self._resolve_origin_coords(origin_city)
+        
+        # 1. Filter and Score Candidates
+        with span('filter'):
+            pruned = 0
+            if bound is not None and radius_km is None and not vibe:
+                # The whole continent: bisect its rows kept in bound order, no scan of the frame
+                group = self.budget_index.group(continent)
+                continent_msg = None if group is not None else f"No data for {continent}, searching globally."
+                rows = self.budget_index.within(group, origin_lat, origin_lng, *bound)
+                pruned = len(self.budget_index.groups[group][0]) - len(rows)
+                eligible_df = self.df.iloc[rows]
+            else:
+                eligible_df, continent_msg = self._eligible(continent, origin_lat, origin_lng, vibe, top_k, radius_km)
+                if bound is not None:
+                    eligible = len(eligible_df)
+                    eligible_df = eligible_df[self.budget_index.mask(
+                        eligible_df.index.to_numpy(), origin_lat, origin_lng, *bound
+                    )]
+                    pruned = eligible - len(eligible_df)
+
+        # A. Safety Score (looked up concurrently for all candidates)
+        with span('safety'):
+            # One lookup per distinct country, spread back over its cities
+            codes, unique_codes = pd.factorize(eligible_df['country_code'])
+            unique_codes = list(unique_codes)
+            safety_by_code, fallbacks = self.safety_client.lookup_safety_scores(unique_codes)
+            safety_scores = np.array([safety_by_code[code] for code in unique_codes], dtype=float)[codes]
+
+        with span('inference'):
+            # B. Daily Cost (Hybrid) and C. Flight Cost (ML Prediction), batched over all rows
+            ml_daily = self.ml_engine.predict_daily_costs(eligible_df, safety_scores)
+            final_daily_cost = (eligible_df['base_cost'].to_numpy() * 0.7) + (ml_daily * 0.3)
+            # Known origins read their precomputed row; anything else is predicted now
+            matrix_row = self.cost_matrix.row(origin_lat, origin_lng)
+            if matrix_row is not None:
+                ml_flight_cost = matrix_row[1][eligible_df.index.to_numpy()].astype(int)
+            else:
+                ml_flight_cost = self.ml_engine.predict_flight_costs(origin_lat, origin_lng, eligible_df)
+
+        return {
+            # Row positions in self.df rather than copies of its columns (this dict is cached);
+            # _row reads the few rows that are shown
+            "n": len(eligible_df),
+            "pruned": pruned,
+            "rows": eligible_df.index.to_numpy(),
+            "safety": safety_scores,
+            "daily": final_daily_cost,
+            "flight": ml_flight_cost,
+            "continent_msg": continent_msg,
+            "fallbacks": fallbacks
+        }
+
+    def _scored_sets(self, base, days, people):
+        # One scored set per (days[j], people[j]) pair, all trip costs computed as one matrix
+        days = np.asarray(days)[:, None]
+        people = np.asarray(people)[:, None]
+        with span('inference'):
             # D. Total Trip Cost
-            total_trip_cost = (final_daily_cost * days * people) + (ml_flight_cost * people)
-            
-            if total_trip_cost < min_cost_found:
-                min_cost_found = total_trip_cost
-
-            # Budget Check
-            if total_trip_cost > budget_usd:
-                rejected_count += 1
-                continue
+            totals = (base['daily'][None, :] * days * people) + (base['flight'][None, :] * people)
+            by_cost = np.argsort(totals, axis=1, kind='stable')
+            sorted_totals = np.take_along_axis(totals, by_cost, axis=1)
+        return [
+            {**base, "total": totals[j], "by_cost": by_cost[j], "sorted_total": sorted_totals[j]}
+            for j in range(len(totals))
+        ]
 
-            # Fetch Weather
-            weather_data = self.weather_client.get_weather(row['city'])
-            
-            candidates.append({
-                "city": row['city'],
-                "country": row['country'],
-                "country_code": row['country_code'],
-                "lat": row['lat'],
-                "lng": row['lng'],
-                "estimated_cost": int(total_trip_cost * (rates.get(currency, 1) if currency != 'USD' else 1)),
-                "flight_cost_est": int(ml_flight_cost),
-                "currency": currency,
-                "safety_raw": safety_score,
-                "safety_score": round(safety_score, 1),
-                "description": row['description'],
-                "weather": f"{weather_data['temp']}°C, {weather_data['description']}" if weather_data['temp'] != "N/A" else "Unknown",
-                "weather_temp": weather_data['temp'] if weather_data['temp'] != "N/A" else 20,
-                "total_cost_usd": total_trip_cost
-            })
+    def _score(self, continent, days, people, origin_city, vibe, top_k, radius_km=None, ceiling=None):
+        # Every eligible destination with its trip cost, ordered by cost. With a ceiling, only
+        # those whose lower bound fits it, plus whatever it takes to know the cheapest trip:
+        # when nothing costs less than the ceiling, the search widens (branch and bound) to the
+        # rows whose bound is under the cheapest cost found, until that cost is within reach.
+        days, people = int(days), int(people)
+        while True:
+            bound = None if ceiling is None else (days, people, ceiling)
+            base = self._score_base(continent, origin_city, vibe, top_k, radius_km, bound)
+            scored = self._scored_sets(base, [days], [people])[0]
+            cheapest = float(scored['sorted_total'][0]) if scored['n'] else float('inf')
+            if not base['pruned'] or cheapest <= ceiling:
+                return scored
+            if cheapest == float('inf'):
+                ceiling = self._lowest_bound(continent, origin_city, vibe, top_k, radius_km, days, people)
+            else:
+                ceiling = cheapest
+
+    def _lowest_bound(self, continent, origin_city, vibe, top_k, radius_km, days, people):
+        # Smallest lower bound over the eligible rows, the first ceiling that lets one through
+        origin_lat, origin_lng = self._resolve_origin_coords(origin_city)
+        if radius_km is None and not vibe:
+            return self.budget_index.lowest(self.budget_index.group(continent), origin_lat, origin_lng, days, people)
+        eligible_df, _ = self._eligible(continent, origin_lat, origin_lng, vibe, top_k, radius_km)
+        return float(self.budget_index.bounds(eligible_df.index.to_numpy(), origin_lat, origin_lng, days, people).min())
+
+    def scored_candidates(self, continent, days, people, origin_city='London', vibe=None, top_k=50, radius_km=None,
+                          budget_usd=None):
+        # With budget_usd, destinations that can't fit it are pruned by their lower-bound cost
+        ceiling = self._budget_ceiling(budget_usd, int(days), int(people))
+        key = self._score_key(continent, days, people, origin_city, vibe, top_k, radius_km, ceiling)
+        return self.response_cache.get_or_load(
+            key, lambda: self._score(continent, days, people, origin_city, vibe, top_k, radius_km, ceiling),
+            self._result_ttl
+        )
+
+    def _result_ttl(self, scored):
+        # Shorter cache lifetime for scored sets built on fallback safety scores
+        return DEGRADED_RESULT_TTL if scored['fallbacks'] else None
 
-        if not candidates:
-             return {
-                "recommendations": [], 
-                "analysis": {
-                    "rejected_budget": rejected_count,
-                    "min_cost_found": int(min_cost_found * (rates.get(currency, 1) if currency != 'USD' else 1)) if min_cost_found != float('inf') else 0,
-                    "user_budget": budget,
-                    "currency": currency,
-                    "continent_message": continent_msg
-                }
+    def invalidate_results(self):
+        # Call whenever destination data is reloaded; cached entries of the old version are ignored
+        self.data_version += 1
+        self.response_cache.invalidate()
+
+    def _budget_cut(self, continent, budget, days, people, currency, origin_city, vibe, top_k, radius_km=None):
+        # 0. Handle Currency Conversion
+        with span('currency'):
+            rates = self.currency_client.get_rates()
+        budget_usd, _ = self._budget_usd(budget, currency, rates)
+        scored = self.scored_candidates(continent, days, people, origin_city, vibe, top_k, radius_km, budget_usd)
+        return self._cut(scored, budget, currency, rates)
+
+    def _budget_usd(self, budget, currency, rates):
+        # (budget in USD, USD -> currency rate)
+        if currency != 'USD' and currency in rates:
+            return float(budget) / rates[currency], rates[currency]
+        return float(budget), 1
+
+    def _cut(self, scored, budget, currency, rates):
+        budget_usd, rate = self._budget_usd(budget, currency, rates)
+        # Pruned rows are over budget by their lower bound alone
+        total_checked = scored['n'] + scored['pruned']
+
+        # Budget Check: costs are sorted, so what fits is a prefix (kept in original row order)
+        fits = int(np.searchsorted(scored['sorted_total'], budget_usd, side='right'))
+        min_cost_found = float(scored['sorted_total'][0]) if total_checked else float('inf')
+        return {
+            "scored": scored,
+            "kept": np.sort(scored['by_cost'][:fits]),
+            "budget_usd": budget_usd,
+            "rate": rate,
+            "total_checked": total_checked,
+            "rejected_count": total_checked - fits,
+            "min_cost_found": min_cost_found
+        }
+
+    @functools.cached_property
+    def _columns(self):
+        # The frame's display columns as arrays, shared by every scored set of this recommender
+        return {
+            column: self.df[column].to_numpy()
+            for column in ('city', 'country', 'country_code', 'lat', 'lng', 'description')
+        }
+
+    def _city(self, scored, i):
+        return self._columns['city'][scored['rows'][i]]
+
+    def _row(self, scored, i):
+        # Plain Python values for row i (str() keeps float32 coordinates at their short form)
+        columns, r = self._columns, scored['rows'][i]
+        row = {column: columns[column][r] for column in ('city', 'country', 'country_code', 'description')}
+        row['lat'] = float(str(columns['lat'][r]))
+        row['lng'] = float(str(columns['lng'][r]))
+        return row
+
+    def _candidate(self, scored, i, currency, rate, weather_data=None):
+        # One budget-fitting destination; weather_data=None leaves the weather pending
+        row = self._row(scored, i)
+        safety_score = float(scored['safety'][i])
+        total_cost = float(scored['total'][i])
+        candidate = {
+            "city": row['city'],
+            "country": row['country'],
+            "country_code": row['country_code'],
+            "lat": row['lat'],
+            "lng": row['lng'],
+            "estimated_cost": int(total_cost * rate),
+            "flight_cost_est": int(scored['flight'][i]),
+            "currency": currency,
+            "safety_raw": safety_score,
+            "safety_score": round(safety_score, 1),
+            "description": row['description'],
+            "weather": "Pending",
+            "weather_temp": 20,
+            "total_cost_usd": total_cost
+        }
+        if weather_data is not None:
+            self._apply_weather(candidate, weather_data)
+        return candidate
+
+    def _apply_weather(self, candidate, weather_data):
+        candidate['weather'] = f"{weather_data['temp']}°C, {weather_data['description']}" if weather_data['temp'] != "N/A" else "Unknown"
+        candidate['weather_temp'] = weather_data['temp'] if weather_data['temp'] != "N/A" else 20
+
+    def _no_match(self, cut, budget, currency):
+        rate = cut['rate']
+        min_cost_found = cut['min_cost_found']
+        return {
+            "recommendations": [],
+            "analysis": {
+                "rejected_budget": cut['rejected_count'],
+                "min_cost_found": int(min_cost_found * rate) if min_cost_found != float('inf') else 0,
+                "user_budget": budget,
+                "currency": currency,
+                "continent_message": cut['scored']['continent_msg']
             }
+        }
 
-        # 2. ML Ranking
-        for c in candidates:
-            # Distance from ideal budget (0 is best)
-            cost_score = min(1, c['total_cost_usd'] / budget_usd)
-            
-            # Safety (0 is best in raw)
-            safe_score = c['safety_raw'] / 5.0
-            
-            # Weather (25 is ideal)
-            weather_diff = abs(float(c['weather_temp']) - 25) / 20.0
-            
-            # Composite Score (Lower is better)
-            raw_score = (cost_score * 0.5) + (safe_score * 0.3) + (weather_diff * 0.2)
-            c['ml_score'] = round(max(0, (1 - raw_score) * 100), 1)
-
-        candidates.sort(key=lambda x: x['ml_score'], reverse=True)
-        
+    def _page(self, ranked, cut, budget, currency, cursor, page_size):
+        fits = cut['total_checked'] - cut['rejected_count']
+        next_cursor = cursor + page_size
         return {
-            "recommendations": candidates[:4],
+            "recommendations": ranked[cursor:cursor + page_size],
             "analysis": {
-                "total_checked": len(eligible_df),
-                "rejected_budget": rejected_count,
+                "total_checked": cut['total_checked'],
+                "rejected_budget": cut['rejected_count'],
                 "min_cost_found": 0,
-                "continent_message": continent_msg,
+                "continent_message": cut['scored']['continent_msg'],
                 "user_budget": budget,
-                "currency": currency
+                "currency": currency,
+                "next_cursor": next_cursor if next_cursor < fits else None
             }
         }
+
+    def _weather_order(self, cut):
+        # Best possible score of each kept row (weather at its 25°C ideal) and the rows by it
+        scored, kept = cut['scored'], cut['kept']
+        bound = self._score_values(
+            scored['total'][kept], scored['safety'][kept], np.full(len(kept), 25.0), cut['budget_usd']
+        )
+        return bound, np.argsort(-bound, kind='stable')
+
+    def _ranked(self, cut, currency, limit):
+        # Top `limit` of everything that fits the budget, fetching weather best-first.
+        # Weather only moves a score down from its 25°C best case, so rows are visited by
+        # that upper bound and fetching stops once no unvisited row can reach the top `limit`.
+        scored, kept = cut['scored'], cut['kept']
+        bound, order = self._weather_order(cut)
+        visited = []
+        candidates = []
+        for start in range(0, len(order), WEATHER_BATCH):
+            batch = order[start:start + WEATHER_BATCH]
+            with span('weather'):
+                weather_by_city = self.weather_client.get_weather_many(
+                    [self._city(scored, kept[j]) for j in batch]
+                )
+            with span('candidates'):
+                for j in batch:
+                    i = kept[j]
+                    visited.append(j)
+                    candidates.append(self._candidate(scored, i, currency, cut['rate'], weather_by_city[self._city(scored, i)]))
+            if start + WEATHER_BATCH >= len(order) or len(candidates) < limit:
+                continue
+            with span('ranking'):
+                kth = self._rank_candidates(candidates, cut['budget_usd'], limit)[-1]['ml_score']
+            if round(float(bound[order[start + WEATHER_BATCH]]), 1) < kth:
+                break
+
+        # Back in row order, so ties rank exactly as if every row had been fetched
+        with span('ranking'):
+            candidates = [candidates[k] for k in np.argsort(visited, kind='stable')]
+            return self._rank_candidates(candidates, cut['budget_usd'], limit)
+
+    def recommend(self, continent, budget, days, people, currency='USD', origin_city='London', vibe=None, top_k=50,
+                  cursor=0, page_size=4, max_distance_km=None, max_flight_hours=None):
+        # cursor/page_size page through the ranking; later pages reuse the cached scored set
+        # and cached weather, so nothing is rescored. max_distance_km/max_flight_hours keep
+        # only destinations that close to the origin.
+        if self.df.empty:
+            return {"recommendations": [], "analysis": {"error": "No data available"}}
+
+        radius_km = self._radius_km(max_distance_km, max_flight_hours)
+        cut = self._budget_cut(continent, budget, days, people, currency, origin_city, vibe, top_k, radius_km)
+        return self._response(cut, budget, currency, cursor, page_size)
+
+    def _response(self, cut, budget, currency, cursor, page_size):
+        if not len(cut['kept']):
+            return self._no_match(cut, budget, currency)
+        return self._page(self._ranked(cut, currency, cursor + page_size), cut, budget, currency, cursor, page_size)
+
+    def recommend_many(self, queries, processes=0):
+        # Many recommend() calls at once: queries are dicts of recommend() keyword arguments,
+        # responses come back in the same order and match recommend() exactly. Rates are read
+        # once; queries sharing an origin/continent/vibe/radius share one filter, safety and
+        # model pass, with all their days/people combinations costed as one matrix. With
+        # processes > 1, big batches are split over that many forked worker processes.
+        if self.df.empty:
+            return [{"recommendations": [], "analysis": {"error": "No data available"}} for _ in queries]
+        with span('currency'):
+            rates = self.currency_client.get_rates()
+        queries = [{**QUERY_DEFAULTS, **query} for query in queries]
+        if processes > 1 and len(queries) >= BATCH_PROCESS_MIN and 'fork' in multiprocessing.get_all_start_methods():
+            return self._recommend_pool(queries, rates, processes)
+        return self._recommend_batch(queries, rates)
+
+    def _batch_group(self, query):
+        # Scored-set key of a query without its days/people
+        radius_km = self._radius_km(query['max_distance_km'], query['max_flight_hours'])
+        return self._score_key(query['continent'], 0, 0, query['origin_city'], query['vibe'], query['top_k'], radius_km)
+
+    def _recommend_batch(self, queries, rates):
+        groups = {}
+        for position, query in enumerate(queries):
+            groups.setdefault(self._batch_group(query), []).append(position)
+
+        cuts = [None] * len(queries)
+        for positions in groups.values():
+            first = queries[positions[0]]
+            radius_km = self._radius_km(first['max_distance_km'], first['max_flight_hours'])
+            pairs = sorted({(int(queries[p]['days']), int(queries[p]['people'])) for p in positions})
+            computed = []
+
+            def scored_set(j):
+                # Only costed when some pair isn't cached yet, then for every pair of the group
+                if not computed:
+                    base = self._score_base(first['continent'], first['origin_city'], first['vibe'], first['top_k'], radius_km)
+                    computed.extend(self._scored_sets(base, [d for d, _ in pairs], [p for _, p in pairs]))
+                return computed[j]
+
+            scored_by_pair = {
+                (days, people): self.response_cache.get_or_load(
+                    self._score_key(first['continent'], days, people, first['origin_city'], first['vibe'], first['top_k'], radius_km),
+                    lambda j=j: scored_set(j), self._result_ttl
+                )
+                for j, (days, people) in enumerate(pairs)
+            }
+            for p in positions:
+                query = queries[p]
+                scored = scored_by_pair[(int(query['days']), int(query['people']))]
+                cuts[p] = self._cut(scored, query['budget'], query['currency'], rates)
+
+        # Weather for the first rows every query's ranking visits, in one concurrent fetch
+        with span('weather'):
+            cities = set()
+            for cut in cuts:
+                if len(cut['kept']):
+                    _, order = self._weather_order(cut)
+                    cities.update(self._city(cut['scored'], cut['kept'][j]) for j in order[:WEATHER_BATCH])
+            if cities:
+                self.weather_client.get_weather_many(sorted(cities))
+
+        return [
+            self._response(cut, query['budget'], query['currency'], query['cursor'], query['page_size'])
+            for cut, query in zip(cuts, queries)
+        ]
+
+    def _recommend_pool(self, queries, rates, processes):
+        # Contiguous chunks of queries ordered by group, so each worker sees few groups.
+        # Workers are forked from this process and inherit this recommender as it is.
+        order = sorted(range(len(queries)), key=lambda p: repr(self._batch_group(queries[p])))
+        size = -(-len(order) // processes)
+        chunks = [order[start:start + size] for start in range(0, len(order), size)]
+        with ProcessPoolExecutor(
+            len(chunks), mp_context=multiprocessing.get_context('fork'), initializer=_init_pool_worker, initargs=(self,)
+        ) as pool:
+            answers = pool.map(_recommend_chunk, [([queries[p] for p in chunk], rates) for chunk in chunks])
+            results = [None] * len(queries)
+            for chunk, responses in zip(chunks, answers):
+                for p, response in zip(chunk, responses):
+                    results[p] = response
+        return results
+
+    def recommend_stream(self, continent, budget, days, people, currency='USD', origin_city='London', vibe=None,
+                         top_k=50, cursor=0, page_size=4, max_distance_km=None, max_flight_hours=None):
+        # Yields events for a streaming response:
+        #   {"event": "ranked", "stage": "cost", ...}   page ranked on cost and safety, weather pending
+        #   {"event": "weather", "city", "weather", "weather_temp"}   as each page city's weather arrives
+        #   {"event": "ranked", "stage": "final", ...}  same shape as recommend()
+        if self.df.empty:
+            yield {"event": "ranked", "stage": "final", "recommendations": [], "analysis": {"error": "No data available"}}
+            return
+
+        radius_km = self._radius_km(max_distance_km, max_flight_hours)
+        cut = self._budget_cut(continent, budget, days, people, currency, origin_city, vibe, top_k, radius_km)
+        scored, kept = cut['scored'], cut['kept']
+        if not len(kept):
+            yield {"event": "ranked", "stage": "final", **self._no_match(cut, budget, currency)}
+            return
+
+        # Provisional ranking with every weather pending (20°C), built only for the page
+        with span('ranking'):
+            limit = cursor + page_size
+            scores = self._score_values(
+                scored['total'][kept], scored['safety'][kept], np.full(len(kept), 20.0), cut['budget_usd']
+            )
+            rounded = [round(score, 1) for score in scores.tolist()]
+            top = heapq.nlargest(limit, range(len(kept)), key=rounded.__getitem__)
+        with span('candidates'):
+            ranked = []
+            for j in top:
+                candidate = self._candidate(scored, kept[j], currency, cut['rate'])
+                candidate['ml_score'] = rounded[j]
+                ranked.append(candidate)
+        first = self._page(ranked, cut, budget, currency, cursor, page_size)
+        yield {"event": "ranked", "stage": "cost", **first}
+
+        # Weather for the provisional page as it arrives, fetched along with the first rows the
+        # final ranking visits (which then reads them from the cache)
+        page_cities = [c['city'] for c in first['recommendations']]
+        _, order = self._weather_order(cut)
+        cities = page_cities + [self._city(scored, kept[j]) for j in order[:WEATHER_BATCH]]
+        shown = set(page_cities)
+        for city, weather_data in self.weather_client.iter_weather(cities):
+            if city in shown:
+                update = {"weather": "Pending", "weather_temp": 20}
+                self._apply_weather(update, weather_data)
+                yield {"event": "weather", "city": city, **update}
+
+        ranked = self._ranked(cut, currency, limit)
+        yield {"event": "ranked", "stage": "final", **self._page(ranked, cut, budget, currency, cursor, page_size)}
+
+    def plan_itinerary(self, continent, budget, days, people, stops=3, currency='USD', origin_city='London',
+                       round_trip=True, candidates=ITINERARY_CANDIDATES):
+        # Cheapest ordered route through `stops` destinations of a continent, days split evenly
+        # (left-over days at the cheapest stops). Legs use the flight model between every pair
+        # of the `candidates` cheapest single-stop trips, stays the hybrid daily cost.
+        if self.df.empty:
+            return {"itinerary": None, "analysis": {"error": "No data available"}}
+        with span('currency'):
+            rates = self.currency_client.get_rates()
+        budget_usd, rate = self._budget_usd(budget, currency, rates)
+        base = self._score_base(continent, origin_city, None, 50)
+        stay_days, extra_days = divmod(int(days), stops)
+        analysis = {
+            "stops": stops, "eligible": base['n'], "user_budget": budget, "currency": currency,
+            "continent_message": base['continent_msg']
+        }
+        if stay_days < 1 or base['n'] < stops:
+            analysis['error'] = f"Needs at least {stops} days and {stops} destinations"
+            return {"itinerary": None, "analysis": analysis}
+
+        with span('legs'):
+            stays = base['daily'] * stay_days * people
+            outbound = base['flight'] * people
+            pool = np.argsort(stays + outbound, kind='stable')[:candidates]
+            rows = base['rows'][pool]
+            lat = self.df['lat'].to_numpy(dtype=float)[rows]
+            lng = self.df['lng'].to_numpy(dtype=float)[rows]
+            # Batched predict_flight_cost for every pair (destination region of each leg)
+            distance = self.ml_engine.haversine_distances(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+            region_codes = self.ml_engine._region_codes(self.df['continent'].to_numpy()[rows])
+            legs = self.ml_engine.flight_costs_from_distances(distance, region_codes[None, :]) * people
+            # Flying home is costed like the flight out
+            inbound = outbound[pool] if round_trip else np.zeros(len(pool))
+            planner = RoutePlanner(legs, outbound[pool], inbound, stays[pool], base['daily'][pool] * people, extra_days)
+        with span('route'):
+            total, route, info = planner.plan(stops)
+        analysis.update(candidates=len(pool), **info)
+
+        if total > budget_usd:
+            analysis['min_cost_found'] = int(total * rate)
+            return {"itinerary": None, "analysis": analysis}
+
+        # Extra days at the cheapest stops of the route
+        extra = set(sorted(route, key=lambda i: (base['daily'][pool[i]], route.index(i)))[:extra_days])
+        legs_in = [outbound[pool[route[0]]]] + [legs[a, b] for a, b in zip(route, route[1:])]
+        itinerary = []
+        for i, leg in zip(route, legs_in):
+            j = pool[i]
+            row = self._row(base, j)
+            row.pop('description')
+            itinerary.append({
+                **row,
+                "days": stay_days + (1 if i in extra else 0),
+                "daily_cost": int(base['daily'][j] * rate),
+                "flight_cost_est": int(leg / people * rate),
+                "safety_score": round(float(base['safety'][j]), 1)
+            })
+        return {
+            "itinerary": {
+                "stops": itinerary,
+                "return_flight_cost_est": int(inbound[route[-1]] / people * rate),
+                "total_cost": int(total * rate),
+                "total_cost_usd": round(total, 2),
+                "currency": currency
+            },
+            "analysis": analysis
+        }
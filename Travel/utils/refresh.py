@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from .metrics import inc, observe
+
+# Seconds between refreshes of each dataset (REFRESH=0 turns the scheduler off)
+REFRESH_ENABLED = os.getenv('REFRESH', '1') != '0'
+DESTINATIONS_INTERVAL = float(os.getenv('REFRESH_DESTINATIONS_SECONDS', 24 * 3600))
+RATES_INTERVAL = float(os.getenv('REFRESH_RATES_SECONDS', 3600))
+ADVISORIES_INTERVAL = float(os.getenv('REFRESH_ADVISORIES_SECONDS', 6 * 3600))
+
+
+class RefreshScheduler:
+    # Runs refresh jobs on their own intervals in one daemon thread. A job builds a new
+    # snapshot off the request path and swaps it in with a single reference assignment, so
+    # readers never wait on it. A failed job keeps the previous snapshot and is retried at
+    # its next interval.
+    def __init__(self):
+        self.jobs = {}
+        self._lock = threading.Lock() # Jobs are added/run from one thread at a time
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def add(self, name, fn, interval, run_now=False):
+        with self._lock:
+            self.jobs[name] = {
+                "fn": fn,
+                "interval": interval,
+                "next_run": time.monotonic() + (0 if run_now else interval),
+                "last_success": None,
+                "failures": 0
+            }
+        self._wake.set()
+
+    def run(self, name):
+        # Runs one job right away; True when it succeeded
+        job = self.jobs[name]
+        start = time.perf_counter()
+        try:
+            job['fn']()
+            job['last_success'] = time.time()
+            job['failures'] = 0
+            outcome = 'ok'
+        except Exception as e:
+            job['failures'] += 1
+            outcome = 'error'
+            print(f"Refresh of {name} failed, keeping the current data: {e}")
+        job['next_run'] = time.monotonic() + job['interval']
+        inc('travel_refresh_total', job=name, outcome=outcome)
+        observe('travel_refresh_seconds', time.perf_counter() - start, job=name)
+        return outcome == 'ok'
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            with self._lock:
+                now = time.monotonic()
+                due = [name for name, job in self.jobs.items() if job['next_run'] <= now]
+                for name in due:
+                    self.run(name)
+                wait = min((job['next_run'] for job in self.jobs.values()), default=now + 60) - time.monotonic()
+            self._wake.wait(max(0.0, wait))
+            self._wake.clear()
+
+    def start(self):
+        # Safe to call on every request: only the first call starts the thread
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name='refresh', daemon=True)
+                    self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self):
+        return {
+            name: {"interval": job['interval'], "last_success": job['last_success'], "failures": job['failures']}
+            for name, job in self.jobs.items()
+        }
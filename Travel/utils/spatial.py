@@ -0,0 +1,58 @@
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371 # Same radius as HybridMLEngine.haversine_distance
+# Flight time model for "within N hours": cruise speed plus a fixed taxi/climb/descent allowance
+FLIGHT_SPEED_KMH = 800
+FLIGHT_OVERHEAD_HOURS = 0.5
+
+
+def flight_hours_to_km(hours):
+    return max(0.0, float(hours) - FLIGHT_OVERHEAD_HOURS) * FLIGHT_SPEED_KMH
+
+
+def km_to_flight_hours(km):
+    return FLIGHT_OVERHEAD_HOURS + km / FLIGHT_SPEED_KMH
+
+
+class SpatialIndex:
+    # Ball tree (haversine metric) over destination coordinates, built once per frame.
+    # Results are row positions into the frame it was built from, nearest first, with
+    # great-circle distances in km.
+    def __init__(self, df, leaf_size=40):
+        self.size = len(df)
+        self.tree = None
+        if self.size:
+            points = np.radians(np.column_stack([
+                df['lat'].to_numpy(dtype=float), df['lng'].to_numpy(dtype=float)
+            ]))
+            self.tree = BallTree(points, leaf_size=leaf_size, metric='haversine')
+
+    def __len__(self):
+        return self.size
+
+    def _query_point(self, lat, lng):
+        return np.radians([[float(lat), float(lng)]])
+
+    def within(self, lat, lng, radius_km):
+        # (positions, distances_km) of every destination within radius_km
+        if self.tree is None or radius_km < 0:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        indices, distances = self.tree.query_radius(
+            self._query_point(lat, lng), r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+        )
+        return indices[0], distances[0] * EARTH_RADIUS_KM
+
+    def nearest(self, lat, lng, k):
+        # (positions, distances_km) of the k closest destinations
+        k = min(int(k), self.size)
+        if self.tree is None or k <= 0:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        distances, indices = self.tree.query(self._query_point(lat, lng), k=k)
+        return indices[0], distances[0] * EARTH_RADIUS_KM
+
+    def mask_within(self, lat, lng, radius_km):
+        # Boolean mask over the frame's rows
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.within(lat, lng, radius_km)[0]] = True
+        return mask